@@ -0,0 +1,160 @@
+"""
+Simulated hardware, for running and benchmarking off-device.
+
+- MemorySpi stands in for spidev.SpiDev and records every frame sent to the LEDs.
+- MemoryHid stands in for a HidGadget (or ReportSender) and records every report.
+- fifo_gadget() makes a real HidGadget that writes to a named pipe instead of /dev/hidgN.
+- HostOutputPipe stands in for the host's side of a gadget, for sending LED output reports from a named pipe.
+- mock_pin_factory() lets Keys run on gpiozero's mock pins instead of real GPIO.
+"""
+
+import collections
+import os
+import time
+
+
+class MemorySpi:
+    """
+    In-memory SPI sink. Implements the parts of spidev.SpiDev that Lights uses.
+    """
+
+    def __init__(self, history=1000, clock=time.perf_counter):
+        """
+        :param history: Number of recent frames to keep.
+        :param clock: Clock used to timestamp frames.
+        """
+        self.max_speed_hz = 0
+        self.frames = collections.deque(maxlen=history)
+        self.frame_count = 0
+        self.clock = clock
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def writebytes2(self, data):
+        """
+        Record a frame.
+
+        :param data: Bytes sent to the LEDs.
+        """
+        self.frames.append((self.clock(), bytes(data)))
+        self.frame_count += 1
+
+    def xfer2(self, data):
+        self.writebytes2(data)
+        return [0 for _ in data]
+
+    @property
+    def last_frame(self):
+        """
+        The most recent frame, or None.
+        """
+        return self.frames[-1][1] if self.frames else None
+
+
+class MemoryHid:
+    """
+    In-memory HID sink. Has the same send_report() interface as HidGadget.
+    """
+
+    def __init__(self, history=10000, clock=time.perf_counter):
+        """
+        :param history: Number of recent reports to keep.
+        :param clock: Clock used to timestamp reports.
+        """
+        self.reports = collections.deque(maxlen=history)
+        self.reports_sent = 0
+        self.reports_refused = 0
+        self.stalled = False
+        self.clock = clock
+        self.on_report = None
+
+    def send_report(self, report_bytes):
+        """
+        Record a report.
+
+        :param report_bytes: Report data.
+        :return: True, or False if `stalled` is set to simulate a host that isn't polling.
+        """
+        if self.stalled:
+            self.reports_refused += 1
+            return False
+        timestamp = self.clock()
+        report = bytes(report_bytes)
+        self.reports.append((timestamp, report))
+        self.reports_sent += 1
+        if self.on_report is not None:
+            self.on_report(timestamp, report)
+        return True
+
+    @property
+    def last_report(self):
+        """
+        The most recent report, or None.
+        """
+        return self.reports[-1][1] if self.reports else None
+
+
+def fifo_gadget(path, **kwargs):
+    """
+    Create a HidGadget that writes to a named pipe, creating the pipe if needed. Read reports from the other end with
+    e.g. `os.read(os.open(path, os.O_RDONLY), report_len)`.
+
+    :param path: Path of the FIFO.
+    :param kwargs: Passed on to HidGadget.
+    :return: HidGadget.
+    """
+    from hid.gadget import HidGadget
+
+    if not os.path.exists(path):
+        os.mkfifo(path)
+    return HidGadget(path, **kwargs)
+
+
+class HostOutputPipe:
+    """
+    Output reports from a pretend host, read from a named pipe. Has the fileno() and read_report() parts of HidGadget
+    that hid.host_leds.HostLedReader uses, so e.g. turning on caps lock is:
+
+        printf '\x02' > /tmp/njak-hidg1-leds
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the FIFO. Created if needed.
+        """
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        self.dev = path
+        # Opened read/write so the pipe never sees end of file when a writer closes it.
+        self._fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+
+    def fileno(self):
+        return self._fd
+
+    def read_report(self, size=64):
+        """
+        :param size: Report length. Pipes don't keep writes apart, so exactly this much is read.
+        :return: Report bytes, or None if there isn't one waiting.
+        """
+        try:
+            return os.read(self._fd, size) or None
+        except BlockingIOError:
+            return None
+
+    def close(self):
+        os.close(self._fd)
+
+
+def mock_pin_factory():
+    """
+    Create a gpiozero mock pin factory, for passing to Key(..., pin_factory=...).
+
+    :return: gpiozero.pins.mock.MockFactory.
+    """
+    from gpiozero.pins.mock import MockFactory
+
+    return MockFactory()
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark for BitmapReport press/release.
+
+Compares the old per-event range search against the lookup tables, using the 248 key NKRO range from config.py.
+
+    python3 bench/bench_bitmap_report.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid.bitmap_report import BitmapReport
+
+
+class NullGadget:
+    def send_report(self, report_bytes):
+        return True
+
+
+class RangeSearchReport(BitmapReport):
+    """
+    BitmapReport with the original generator-based keycode search, for comparison.
+    """
+
+    def __init__(self, gadget, report_len, ranges, report_id=None):
+        super().__init__(gadget, report_len, ranges, report_id)
+        self.chunks = [
+            (start, start + count - 1, offset) for (start, count, offset) in ranges
+        ]
+
+    def press(self, key_code):
+        (byte, bit) = self._key_to_index(key_code)
+        self._buf[byte] |= 1 << bit
+
+    def release(self, key_code):
+        (byte, bit) = self._key_to_index(key_code)
+        self._buf[byte] &= ~(1 << bit)
+
+    def _key_to_index(self, key_code):
+        (offset, start) = next(
+            (
+                (offset, start)
+                for (start, end, offset) in self.chunks
+                if start <= key_code <= end
+            ),
+            (None, None),
+        )
+        pos = key_code - start
+        (byte, bit) = divmod(pos, 8)
+        return byte + offset + self._id_offset, bit
+
+
+def bench(report, number):
+    codes = list(range(0, 248, 7))
+
+    def events():
+        for code in codes:
+            report.press(code)
+            report.release(code)
+
+    best = min(timeit.repeat(events, number=number, repeat=5))
+    return best / (number * len(codes) * 2)
+
+
+def main():
+    number = 2000
+    before = bench(RangeSearchReport(NullGadget(), 32, [(0, 248, 1)]), number)
+    after = bench(BitmapReport(NullGadget(), 32, [(0, 248, 1)]), number)
+
+    print("range search: {:8.1f} ns/event".format(before * 1e9))
+    print("lookup table: {:8.1f} ns/event".format(after * 1e9))
+    print("speedup:      {:8.2f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main()
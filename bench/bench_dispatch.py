@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark for Keypad key event dispatch.
+
+Compares the old dict + list lookup per event against the compiled dispatch rows, with handlers that do nothing so
+only the dispatch itself is measured.
+
+    python3 bench/bench_dispatch.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import backends
+import config
+from keys import PRESSED, RELEASED, Key, Keypad, KeyEvent
+
+
+class LookupKeypad(Keypad):
+    """
+    Keypad with the original per-event layer lookup, for comparison.
+    """
+
+    def _key_handler(self, event, key):
+        if self.state == Keypad.SELECTING:
+            if event.type == PRESSED:
+                if key.num in self.layers:
+                    self.current_layer = key.num
+        else:
+            self.layers[self.current_layer][key.num - 1](event, key)
+        self._notify()
+
+
+def nothing(event, key):
+    pass
+
+
+def bench(keypad_class, keys, number):
+    keypad = keypad_class(keys)
+    keypad.add_layer(1, [nothing for _ in range(11)])
+    keypad.add_layer(2, [nothing for _ in range(11)])
+
+    press = KeyEvent(PRESSED, 0.0)
+    release = KeyEvent(RELEASED, 0.0)
+    handler = keypad._key_handler
+    chord = keys[1:]
+
+    def events():
+        for k in chord:
+            handler(press, k)
+        for k in chord:
+            handler(release, k)
+
+    best = min(timeit.repeat(events, number=number, repeat=5))
+    return best / (number * 2 * len(chord))
+
+
+def main():
+    pin_factory = backends.mock_pin_factory()
+    keys = [Key(i, pin, pin_factory=pin_factory) for (i, (_, pin)) in enumerate(config.layout)]
+
+    number = 20000
+    before = bench(LookupKeypad, keys, number)
+    after = bench(Keypad, keys, number)
+
+    print("layer lookup:  {:8.1f} ns/event".format(before * 1e9))
+    print("dispatch rows: {:8.1f} ns/event".format(after * 1e9))
+    print("speedup:       {:8.2f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main()
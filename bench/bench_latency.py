@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+"""
+End-to-end key to report latency benchmark.
+
+Drives synthetic press/release storms through the same chains the daemon uses, using mock pins and an in-memory HID
+sink:
+
+- asyncio runtime (the default): gpiozero Button -> Key -> call_soon_threadsafe hand-off to an event loop -> Keypad ->
+  layer handler -> BitmapReport -> LoopSender -> gadget. Scenarios are suffixed "_asyncio".
+- threads runtime: gpiozero Button -> Key -> Keypad -> layer handler -> BitmapReport -> ReportSender -> gadget.
+
+Latency is measured from driving the pin to the report reaching the sink. Chords drive all their pins at once and
+are timed from the first edge to the report with every key down (or up).
+
+    python3 bench/bench_latency.py                   # run, compare against the stored baseline if there is one
+    python3 bench/bench_latency.py --save-baseline   # run and store the results as the new baseline
+
+Exits with status 1 if any scenario's p99 latency or throughput is worse than the baseline by more than the tolerance,
+or if any edge produced no report.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import backends
+import config
+from hid.bitmap_report import BitmapReport
+from hid.sender import LoopSender, ReportSender
+from hid.usages import Keyboard
+from keys import Key, Keypad
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "latency_baseline.json")
+
+
+class Rig:
+    """
+    The daemon's input chain, built on simulated hardware.
+    """
+
+    def __init__(self, runtime="threads"):
+        """
+        :param runtime: "asyncio" or "threads", as in config.py.
+        """
+        self.pin_factory = backends.mock_pin_factory()
+        self.hid = backends.MemoryHid()
+        self.loop = None
+        self._loop_thread = None
+        if runtime == "asyncio":
+            self.loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self.loop.run_forever, name="bench-loop", daemon=True)
+            self._loop_thread.start()
+            self.sender = LoopSender(self.hid, self.loop)
+        else:
+            self.sender = ReportSender(self.hid)
+        self.report = BitmapReport.from_descriptor(
+            self.sender, os.path.join(config.descriptor_dir, "ext_hid.bin"))
+
+        self.gpios = [pin for (_, pin) in config.layout]
+        # Edges are driven far faster than a real switch bounces, so debouncing would swallow most of them.
+        self.keys = [Key(i, pin, pin_factory=self.pin_factory, debounce=0) for (i, pin) in enumerate(self.gpios)]
+        if self.loop is not None:
+            for k in self.keys:
+                k.handoff = self.loop.call_soon_threadsafe
+        self.keypad = Keypad(self.keys)
+        self.keypad.add_layer(1, [self.report.key_handler(Keyboard.KEY_A + i) for i in range(11)])
+        self.keypad.add_layer(2, [self.report.key_handler(Keyboard.KEY_F13) for _ in range(11)])
+
+        self._reported = threading.Event()
+        self._report_time = None
+        self._expected = None
+        self.hid.on_report = self._on_report
+
+    def _on_report(self, timestamp, report):
+        expected = self._expected
+        if expected is None or report == expected:
+            self._report_time = timestamp
+            self._reported.set()
+
+    def edge(self, key, pressed):
+        """
+        Drive a key's pin without waiting for a report.
+        """
+        pin = self.pin_factory.pin(self.gpios[key])
+        if pressed:
+            pin.drive_low()
+        else:
+            pin.drive_high()
+
+    def timed_edge(self, key, pressed):
+        """
+        Drive a key's pin and wait for the resulting report.
+
+        :return: Latency in seconds, or None if no report arrived.
+        """
+        self._reported.clear()
+        start = time.perf_counter()
+        self.edge(key, pressed)
+        if not self._reported.wait(1.0):
+            return None
+        return self._report_time - start
+
+    def timed_edges(self, edges, expected):
+        """
+        Drive several pins back to back, without waiting in between, then wait for the report they add up to.
+
+        :param edges: (key, pressed) for each edge, in order.
+        :param expected: Report bytes the host should end up with.
+        :return: Latency in seconds from the first edge to that report, or None if it didn't arrive.
+        """
+        self._expected = expected
+        self._reported.clear()
+        start = time.perf_counter()
+        for (key, pressed) in edges:
+            self.edge(key, pressed)
+        arrived = self._reported.wait(1.0)
+        self._expected = None
+        if not arrived:
+            return None
+        return self._report_time - start
+
+    def flush(self, timeout):
+        """
+        Wait until every edge driven so far has been handled and its report written.
+
+        :return: True if everything was written, False on timeout.
+        """
+        if self.loop is None:
+            return self.sender.flush(timeout)
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            # A round trip through the loop also waits for edges that are still queued on it.
+            if not self._on_loop(lambda: self.sender.depth):
+                return True
+            time.sleep(0.001)
+        return False
+
+    def _on_loop(self, fn):
+        result = concurrent.futures.Future()
+        self.loop.call_soon_threadsafe(lambda: result.set_result(fn()))
+        return result.result(1.0)
+
+    def close(self):
+        if self.loop is None:
+            self.sender.stop()
+        else:
+            self._on_loop(self.sender.stop)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._loop_thread.join()
+            self.loop.close()
+        for k in self.keys:
+            k.button.close()
+
+
+def single_key(rig, rounds):
+    latencies = []
+    for _ in range(rounds):
+        latencies.append(rig.timed_edge(1, True))
+        latencies.append(rig.timed_edge(1, False))
+    return latencies, 2 * rounds
+
+
+def chord(rig, rounds):
+    # All eleven edges land before the first report is out, so this exercises coalescing and merging in the sender.
+    down = rig.report.render([Keyboard.KEY_A + i for i in range(11)])
+    up = rig.report.render(())
+    latencies = []
+    for _ in range(rounds):
+        latencies.append(rig.timed_edges([(k, True) for k in range(1, 12)], down))
+        latencies.append(rig.timed_edges([(k, False) for k in range(1, 12)], up))
+    return latencies, 22 * rounds
+
+
+def layer_switch(rig, rounds):
+    latencies = []
+    for i in range(rounds):
+        rig.edge(0, True)
+        rig.edge(1 + i % 2, True)
+        rig.edge(1 + i % 2, False)
+        rig.edge(0, False)
+        latencies.append(rig.timed_edge(3, True))
+        latencies.append(rig.timed_edge(3, False))
+    return latencies, 6 * rounds
+
+
+SCENARIOS = [
+    ("single_key", single_key, 2000),
+    ("chord_11", chord, 200),
+    ("layer_switch", layer_switch, 1000),
+]
+
+# Runtime -> suffix for its scenario names. The threads runtime keeps the plain names, so older baselines still apply.
+RUNTIMES = [("asyncio", "_asyncio"), ("threads", "")]
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def run_scenario(fn, rounds, runtime):
+    rig = Rig(runtime)
+    try:
+        start = time.perf_counter()
+        (latencies, events) = fn(rig, rounds)
+        rig.flush(5.0)
+        elapsed = time.perf_counter() - start
+    finally:
+        rig.close()
+
+    missing = latencies.count(None)
+    latencies = sorted(l for l in latencies if l is not None)
+    return {
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "p999_us": percentile(latencies, 0.999) * 1e6,
+        "events_per_sec": events / elapsed,
+        "missing_reports": missing,
+    }
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for (name, result) in results.items():
+        if result["missing_reports"]:
+            failures.append("{}: {} edges produced no report".format(name, result["missing_reports"]))
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["p99_us"] > base["p99_us"] * (1 + tolerance):
+            failures.append("{}: p99 {:.1f}us > baseline {:.1f}us".format(name, result["p99_us"], base["p99_us"]))
+        if result["events_per_sec"] < base["events_per_sec"] * (1 - tolerance):
+            failures.append("{}: {:.0f} events/s < baseline {:.0f}".format(
+                name, result["events_per_sec"], base["events_per_sec"]))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = {}
+    print("{:<22} {:>10} {:>10} {:>10} {:>12}".format("scenario", "p50 us", "p99 us", "p999 us", "events/s"))
+    for (runtime, suffix) in RUNTIMES:
+        for (name, fn, rounds) in SCENARIOS:
+            r = results[name + suffix] = run_scenario(fn, rounds, runtime)
+            print("{:<22} {:>10.1f} {:>10.1f} {:>10.1f} {:>12.0f}".format(
+                name + suffix, r["p50_us"], r["p99_us"], r["p999_us"], r["events_per_sec"]))
+
+    baseline = {}
+    if not args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        else:
+            print("No baseline at {}, not comparing".format(args.baseline))
+
+    failures = compare(results, baseline, args.tolerance)
+    if args.save_baseline and not failures:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline saved to {}".format(args.baseline))
+    for failure in failures:
+        print("REGRESSION: {}".format(failure))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+Benchmark for Lights.show.
+
+Compares the old per-frame list building against the preallocated frame buffer, for a few chain lengths. SPI
+transfers go to a sink that discards them, so this only measures the Python side. Every frame is forced out, so
+skipping unchanged frames doesn't flatter the numbers.
+
+    python3 bench/bench_lights.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from leds import Lights
+
+
+class NullSpi:
+    def writebytes2(self, data):
+        pass
+
+    def xfer2(self, data):
+        pass
+
+
+class ListBuildingLights(Lights):
+    """
+    Lights with the original list-building show(), for comparison.
+    """
+
+    def show(self, force=False):
+        buf = [0x00 for _ in range(8)]
+        for p in self.pixels:
+            buf += p.raw()
+
+        buf += [0xFF for _ in range(8)]
+        self.spi.xfer2(buf)
+
+
+def bench(lights, number):
+    for i in range(len(lights.pixels)):
+        lights.set_pixel(i, i & 0xFF, 0x80, 0x40, 0x03)
+
+    def show():
+        lights.show(force=True)
+
+    per_frame = min(timeit.repeat(show, number=number, repeat=5)) / number
+
+    tracemalloc.start()
+    for _ in range(10):
+        show()
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_frame, peak
+
+
+def main():
+    print("{:>6}  {:>14}  {:>14}  {:>12}  {:>12}".format("LEDs", "list (us)", "buffer (us)", "list peak", "buffer peak"))
+    for count in (12, 144, 1024):
+        mapping = list(range(count))
+        number = max(100, 20000 // count)
+        (before, before_peak) = bench(ListBuildingLights(mapping, NullSpi()), number)
+        (after, after_peak) = bench(Lights(mapping, NullSpi()), number)
+        print("{:>6}  {:>14.2f}  {:>14.2f}  {:>11}B  {:>11}B".format(
+            count, before * 1e6, after * 1e6, before_peak, after_peak))
+
+
+if __name__ == "__main__":
+    main()
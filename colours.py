@@ -26,3 +26,83 @@ class ColourCycler:
     def next_step(self):
         self.curr_step += 1
         self.curr_step %= self.steps
+
+
+class ColourWheel:
+    """
+    Rainbow cycle driven by elapsed time rather than frame count, so it looks the same at any frame rate.
+
+    The gamma-corrected palette and each LED's phase and frame offset are worked out once; rendering a frame just
+    copies palette entries straight into the Lights frame buffer.
+    """
+
+    animated = True
+
+    def __init__(self, lights, period=10.0, steps=1000, gamma=2.2):
+        """
+        Set up the effect.
+
+        :param lights: Lights to render into.
+        :param period: Time in seconds for one full trip around the colour wheel.
+        :param steps: Number of distinct colours in the palette.
+        :param gamma: Gamma correction exponent. 1 disables correction.
+        """
+        self.lights = lights
+        self.period = period
+        self.steps = steps
+
+        # Palette in frame order (B, G, R), repeated twice so a phase offset never needs wrapping.
+        palette = bytearray()
+        for x in range(steps):
+            (r, g, b) = colorsys.hsv_to_rgb(x / steps, 1, 1)
+            palette += bytes(round((c ** gamma) * 0xFF) for c in (b, g, r))
+        self._palette = memoryview(bytes(palette * 2))
+
+        count = len(lights.mapping)
+        self._targets = [
+            (lights.pixel_offset(i) + 1, (steps - i * steps // count) * 3)
+            for i in range(count)
+        ]
+
+    def __call__(self, now):
+        """
+        Render the frame for a point in time.
+
+        :param now: Time in seconds.
+        """
+        base = int(now * self.steps / self.period) % self.steps * 3
+        frame = self.lights.frame
+        palette = self._palette
+        for (offset, shift) in self._targets:
+            p = base + shift
+            frame[offset:offset + 3] = palette[p:p + 3]
+
+
+class SolidColour:
+    """
+    Every LED the same, unchanging colour.
+    """
+
+    animated = False
+
+    def __init__(self, lights, r, g, b):
+        """
+        Set up the effect.
+
+        :param lights: Lights to render into.
+        :param r: Red
+        :param g: Green
+        :param b: Blue
+        """
+        self.lights = lights
+        self.colour = (r, g, b)
+
+    def __call__(self, now):
+        """
+        Render the frame for a point in time.
+
+        :param now: Time in seconds.
+        """
+        (r, g, b) = self.colour
+        for i in range(len(self.lights.mapping)):
+            self.lights.set_pixel(i, r, g, b)
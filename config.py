@@ -2,16 +2,57 @@
 IO Mapping for buttons and lights.
 
 Options:
+    keymap_file: JSON keymap with the layers, and optionally the layout and LED settings (see keymap.py). Settings in
+        the keymap override the defaults below.
+    keymap_cache_dir: where compiled keymaps are cached, or None to not cache them.
+    watch_keymap: if True, reload the keymap's layers whenever keymap_file changes, without restarting.
     layout: list of (led position, gpio pin) for each key. io_mapping[n] represents the nth key.
+    descriptor_dir: where the binary HID report descriptors written by init-usb-gadgets.sh live.
+    consumer_control: if True, drive the consumer and system control interface (/dev/hidg2), so keymaps can use
+        media keys ("consumer" actions) and power/sleep/wake up ("system" actions).
+    boot_fallback: if True, also drive the boot keyboard interface (/dev/hidg0), and send to it instead of the NKRO
+        one whenever the host isn't reading NKRO reports, e.g. in a BIOS or bootloader.
+    animate_leds: if True, run the rainbow animation. If False, the LEDs are a static colour and are only redrawn
+        when a key or layer event happens, so the LED loop sleeps while idle.
+    static_colour: (r, g, b) used when animate_leds is False.
+    lock_leds: {host LED usage: key index} of the keys that light up while the host has Num/Caps/Scroll Lock on.
+    lock_colour: (r, g, b) for lit lock keys.
+    brightness: LED brightness as a fraction of the maximum.
+    input_backend: how keys are read. "buttons" gives each key its own gpiozero Button. "gpiod" or "gpiomem" scan
+        every key pin in one operation and report chords as a single change set (see keyscan.py).
+    scan_interval: time between scans in seconds, for the scanning backends.
+    debounce_time: default key debounce window in seconds.
+    key_debounce: per-key debounce overrides: {key index: seconds}.
+    runtime: "asyncio" runs key handling, HID writes, host LED reads and the LED frame clock on one asyncio event loop
+        (see runtime.py), with other threads only handing work to it. "threads" gives each of those its own thread.
+    metrics: if True, collect timing metrics and serve them on metrics_socket and metrics_tcp.
+    metrics_socket: Unix socket path to serve metrics on, or None.
+    metrics_tcp: (host, port) to serve metrics on, or None. e.g. ("10.0.0.2", 9100) to serve them over the RNDIS link.
 """
 
+import asyncio
+import os
+
+import backends
+import keymap
+import keyscan
+from hid.array_report import ArrayReport
 from hid.bitmap_report import *
+from hid.dual_report import DualReport
+from hid.descriptor import load_descriptor
 from hid.gadget import *
+from hid.host_leds import CAPS_LOCK, NUM_LOCK, SCROLL_LOCK, HostLedReader
+from hid.macro import MacroPlayer
+from hid.sender import *
 import keys
 from keys import Key
 import leds
 
 
+keymap_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keymap.json")
+keymap_cache_dir = os.path.expanduser("~/.cache/njak")
+watch_keymap = True
+
 layout = [
     (3, 17),
     (7, 27),
@@ -27,14 +68,143 @@ layout = [
     (8, 26),
 ]
 
+descriptor_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "descriptors")
+boot_fallback = True
+consumer_control = True
+
+animate_leds = True
+static_colour = (0x00, 0x40, 0xFF)
+brightness = 0.1
+
+lock_leds = {NUM_LOCK: 9, CAPS_LOCK: 10, SCROLL_LOCK: 11}
+lock_colour = (0xFF, 0xFF, 0xFF)
+
+input_backend = "buttons"
+scan_interval = 0.001
+
+debounce_time = 0.005
+key_debounce = {}
+
+runtime = "asyncio"
+
+metrics = True
+metrics_socket = "/tmp/njak-metrics.sock"
+metrics_tcp = None
+
 
 class Configuration:
-    def __init__(self):
-        self.layout = layout
-        self.gadget = HidGadget("/dev/hidg1")
-        self.reports = [BitmapReport(self.gadget, 32, [(0, 248, 1)])]
+    def __init__(self, simulate=False):
+        """
+        :param simulate: If True, use simulated hardware: mock GPIO pins, an in-memory SPI sink for the LEDs, and
+            named pipes at /tmp/njak-hidgN instead of the HID gadgets.
+        """
+        self.keymap_file = keymap_file
+        self.keymap_cache_dir = keymap_cache_dir
+        self.watch_keymap = watch_keymap
+        self.compiled_keymap = keymap.load(keymap_file, keymap_cache_dir)
+
+        if self.compiled_keymap["layout"] is not None:
+            self.layout = [tuple(k) for k in self.compiled_keymap["layout"]]
+        else:
+            self.layout = layout
+        led_settings = self.compiled_keymap["leds"]
+        self.animate_leds = led_settings.get("animate", animate_leds)
+        self.static_colour = tuple(led_settings.get("static_colour", static_colour))
+        self.brightness = led_settings.get("brightness", brightness)
+        self.metrics = metrics
+        self.metrics_socket = metrics_socket
+        self.metrics_tcp = metrics_tcp
+
+        if runtime == "asyncio":
+            self.loop = asyncio.new_event_loop()
+            # Writes must never block the loop: a refused report is retried when the device becomes writable.
+            gadget_options = {"write_timeout": 0}
+        elif runtime == "threads":
+            self.loop = None
+            gadget_options = {}
+        else:
+            raise ValueError("Unknown runtime {}".format(runtime))
+
+        def make_gadget(n):
+            if simulate:
+                return backends.fifo_gadget("/tmp/njak-hidg{}".format(n), **gadget_options)
+            return HidGadget("/dev/hidg{}".format(n), **gadget_options)
+
+        if simulate:
+            self.pin_factory = backends.mock_pin_factory()
+            self.spi = backends.MemorySpi()
+        else:
+            self.pin_factory = None
+            self.spi = None
+        self.gadget = make_gadget(1)
+        self.boot_gadget = make_gadget(0) if boot_fallback else None
+        self.consumer_gadget = make_gadget(2) if consumer_control else None
+
+        nkro_layout = load_descriptor(os.path.join(descriptor_dir, "ext_hid.bin"))
+        boot_layout = load_descriptor(os.path.join(descriptor_dir, "bootkbd.bin"))
+
+        self.sender = self._sender(self.gadget)
+        self.nkro_report = BitmapReport.from_layout(self.sender, nkro_layout)
+        if self.boot_gadget is not None:
+            self.boot_sender = self._sender(self.boot_gadget)
+            self.boot_report = ArrayReport.from_layout(self.boot_sender, boot_layout)
+            keyboard = DualReport(self.nkro_report, self.boot_report, self.sender)
+        else:
+            self.boot_sender = None
+            self.boot_report = None
+            keyboard = self.nkro_report
+
+        fallback = (self.boot_sender, self.boot_report) if self.boot_report is not None else None
+        self.macros = MacroPlayer(self.sender, self.nkro_report, threaded=self.loop is None, fallback=fallback)
+        self.reports = [keyboard]
+        self.reports_by_kind = {"keyboard": keyboard, "text": self.macros, "sequence": self.macros}
+
+        if self.consumer_gadget is not None:
+            consumer_layout = load_descriptor(os.path.join(descriptor_dir, "consumer.bin"))
+            self.consumer_sender = self._sender(self.consumer_gadget, report_ids=True)
+            self.consumer_report = ArrayReport.from_layout(self.consumer_sender, consumer_layout, 1)
+            self.system_report = BitmapReport.from_layout(self.consumer_sender, consumer_layout, 2)
+            self.reports += [self.consumer_report, self.system_report]
+            self.reports_by_kind["consumer"] = self.consumer_report
+            self.reports_by_kind["system"] = self.system_report
+        else:
+            self.consumer_sender = None
+        self.senders = [s for s in (self.sender, self.boot_sender, self.consumer_sender) if s is not None]
+
+        # Simulated gadgets are pipes that only carry reports to the host, so LED reports come from a pipe of their own.
+        self.host_leds = HostLedReader()
+        if simulate:
+            self.host_leds.add_source(backends.HostOutputPipe("/tmp/njak-hidg1-leds"), nkro_layout)
+        else:
+            self.host_leds.add_source(self.gadget, nkro_layout)
+            if self.boot_gadget is not None:
+                self.host_leds.add_source(self.boot_gadget, boot_layout)
+        self.lock_leds = lock_leds
+        self.lock_colour = lock_colour
 
         self.ledmap = [l for (l, _) in self.layout]
-        self.keymap = [Key(i, pin)
+
+        self.scan_interval = scan_interval
+        pins = [pin for (_, pin) in self.layout]
+        if input_backend == "buttons":
+            self.levels = None
+        elif simulate:
+            self.levels = keyscan.PinFactoryLevels(pins, self.pin_factory)
+        elif input_backend == "gpiod":
+            self.levels = keyscan.GpiodLevels(pins)
+        elif input_backend == "gpiomem":
+            self.levels = keyscan.GpioMemLevels(pins)
+        else:
+            raise ValueError("Unknown input backend {}".format(input_backend))
+
+        self.keymap = [Key(i, pin,
+                           pin_factory=self.pin_factory,
+                           debounce=key_debounce.get(i, debounce_time),
+                           bind=self.levels is None)
                 for (i, (_, pin))
                 in enumerate(self.layout)]
+
+    def _sender(self, gadget, **kwargs):
+        if self.loop is not None:
+            return LoopSender(gadget, self.loop, **kwargs)
+        return ReportSender(gadget, **kwargs)
@@ -0,0 +1,26 @@
+0x05, 0x0C,         /*  Usage Page (Consumer),              */
+0x09, 0x01,         /*  Usage (Consumer Control),           */
+0xA1, 0x01,         /*  Collection (Application),           */
+0x85, 0x01,         /*      Report ID (1),                  */
+0x15, 0x00,         /*      Logical Minimum (0),            */
+0x26, 0xFF, 0x03,   /*      Logical Maximum (1023),         */
+0x19, 0x00,         /*      Usage Minimum (00h),            */
+0x2A, 0xFF, 0x03,   /*      Usage Maximum (03FFh),          */
+0x75, 0x10,         /*      Report Size (16),               */
+0x95, 0x04,         /*      Report Count (4),               */
+0x81, 0x00,         /*      Input,                          */
+0xC0,               /*  End Collection,                     */
+0x05, 0x01,         /*  Usage Page (Desktop),               */
+0x09, 0x80,         /*  Usage (Sys Control),                */
+0xA1, 0x01,         /*  Collection (Application),           */
+0x85, 0x02,         /*      Report ID (2),                  */
+0x15, 0x00,         /*      Logical Minimum (0),            */
+0x25, 0x01,         /*      Logical Maximum (1),            */
+0x19, 0x81,         /*      Usage Minimum (Sys Power Down), */
+0x29, 0x83,         /*      Usage Maximum (Sys Wake Up),    */
+0x75, 0x01,         /*      Report Size (1),                */
+0x95, 0x03,         /*      Report Count (3),               */
+0x81, 0x02,         /*      Input (Variable),               */
+0x95, 0x05,         /*      Report Count (5),               */
+0x81, 0x01,         /*      Input (Constant),               */
+0xC0                /*  End Collection                      */
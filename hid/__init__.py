@@ -1 +1 @@
-__all__ = ["bitmap_report", "gadget", "usages"]
+__all__ = ["array_report", "bitmap_part", "bitmap_report", "descriptor", "dual_report", "gadget", "macro", "report", "sender", "usages"]
@@ -0,0 +1,203 @@
+"""
+Array (n-key rollover) reports, like the 6KRO boot keyboard report.
+"""
+
+import logging
+
+from hid.bitmap_part import BitmapPart
+from hid.descriptor import ARRAY, BITMAP, INPUT, KEYBOARD_PAGE, DescriptorError, load_descriptor
+from hid.report import Report
+from hid.usages import describe
+
+log = logging.getLogger(__name__)
+
+# Usage reported in every slot when more keys are down than there are slots.
+ERROR_ROLL_OVER = 0x01
+
+
+class ArrayReport(Report):
+    """
+    HID array key report: a modifier bitmap plus a fixed number of slots, each holding the usage of one key that is
+    down.
+
+    Pressing and releasing are O(1): a table maps each usage to the slot it occupies, and free slots are kept on a
+    stack. If more keys are down than there are slots, the extra keys wait in order for a slot to free up. Until then,
+    keyboard reports fill every slot with ErrorRollOver, as the HID spec asks; other pages just report the keys that
+    have slots.
+
+    The same class serves 16-bit arrays, like consumer control, with slot_size=2.
+    """
+
+    def __init__(self, gadget, report_len, modifiers, array_offset, slots, slot_size=1, usage_max=0xFF,
+                 report_id=None, usage_page=KEYBOARD_PAGE):
+        """
+        Set up an array report.
+
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
+        :param report_len: Total length of the report data (not including report_id).
+        :param modifiers: BitmapPart for the modifier bitmap, or None if the report doesn't have one.
+        :param array_offset: Byte offset of the first slot in the report data.
+        :param slots: Number of slots.
+        :param slot_size: Bytes per slot.
+        :param usage_max: Highest usage the slots can hold.
+        :param report_id: Optional report ID for HID descriptors with multiple reports defined.
+        :param usage_page: Usage page of the slots, for log messages.
+        """
+        super().__init__(gadget)
+        self.report_id = report_id
+        self.usage_page = usage_page
+        self.len = report_len + (0 if report_id is None else 1)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.usage_max = usage_max
+
+        self._id_offset = 0 if report_id is None else 1
+        self._buf = bytearray(self.len)
+        if report_id is not None:
+            self._buf[0] = report_id
+
+        self._array_start = array_offset + self._id_offset
+        self._slot_offsets = [self._array_start + n * slot_size for n in range(slots)]
+
+        # Usage -> modifier (byte, mask), with -1 for usages that aren't modifiers.
+        self._mod_byte = [-1] * (usage_max + 1)
+        self._mod_mask = bytearray(usage_max + 1)
+        if modifiers is not None:
+            modifiers.fill_tables(self._mod_byte, self._mod_mask, self._id_offset)
+
+        # Usage -> slot number + 1, with 0 for keys that aren't in a slot.
+        self._slot_of = [0] * (usage_max + 1)
+        self._free = list(range(slots - 1, -1, -1))
+        self._overflow = []
+
+        self.rollovers = 0
+
+    @classmethod
+    def from_layout(cls, gadget, layout, report_id=None):
+        """
+        Set up a report from a parsed report descriptor, using the first array field of the input report and the
+        first bitmap field, if any, as the modifiers.
+
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
+        :param layout: hid.descriptor.ReportLayout.
+        :param report_id: Report ID to use, or None for descriptors without report IDs.
+        """
+        arrays = layout.fields_for(report_id, INPUT, ARRAY)
+        if not arrays:
+            raise DescriptorError("No array fields in input report {}".format(report_id))
+        field = arrays[0]
+        if field.bit_offset % 8 or field.bit_size % 8:
+            raise DescriptorError("Array field {} isn't byte aligned".format(field))
+        if field.usage_min != field.logical_min:
+            raise DescriptorError("Array field {} doesn't map values straight to usages".format(field))
+
+        bitmaps = layout.fields_for(report_id, INPUT, BITMAP)
+        return cls(
+            gadget,
+            layout.report_length(report_id, INPUT),
+            BitmapPart.from_field(bitmaps[0]) if bitmaps else None,
+            field.byte_offset,
+            field.count,
+            field.bit_size // 8,
+            field.logical_max,
+            report_id,
+            field.usage_page,
+        )
+
+    @classmethod
+    def from_descriptor(cls, gadget, path, report_id=None):
+        """
+        Set up a report from a binary report descriptor file, e.g. descriptors/bootkbd.bin.
+
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
+        :param path: Path to the descriptor.
+        :param report_id: Report ID to use, or None for descriptors without report IDs.
+        """
+        return cls.from_layout(gadget, load_descriptor(path), report_id)
+
+    def press(self, key_code):
+        """
+        Mark a key as pressed.
+
+        :param key_code: Key to press.
+        """
+        if not 0 < key_code <= self.usage_max:
+            log.warning("Unmapped keycode %s", describe(self.usage_page, key_code))
+            return
+        byte = self._mod_byte[key_code]
+        if byte >= 0:
+            self._buf[byte] |= self._mod_mask[key_code]
+        elif not self._slot_of[key_code] and key_code not in self._overflow:
+            if self._free:
+                slot = self._free.pop()
+                self._set_slot(slot, key_code)
+                self._slot_of[key_code] = slot + 1
+            else:
+                self._overflow.append(key_code)
+                self.rollovers += 1
+
+    def release(self, key_code):
+        """
+        Mark a key as released.
+
+        :param key_code: Key to release.
+        """
+        if not 0 < key_code <= self.usage_max:
+            log.warning("Unmapped keycode %s", describe(self.usage_page, key_code))
+            return
+        byte = self._mod_byte[key_code]
+        if byte >= 0:
+            self._buf[byte] &= ~self._mod_mask[key_code]
+            return
+
+        slot = self._slot_of[key_code] - 1
+        if slot >= 0:
+            self._slot_of[key_code] = 0
+            if self._overflow:
+                waiting = self._overflow.pop(0)
+                self._set_slot(slot, waiting)
+                self._slot_of[waiting] = slot + 1
+            else:
+                self._set_slot(slot, 0)
+                self._free.append(slot)
+        elif key_code in self._overflow:
+            self._overflow.remove(key_code)
+
+    def render(self, key_codes):
+        """
+        Build a standalone report with exactly these keys pressed, without touching the live state.
+
+        :param key_codes: Keys to press.
+        :return: Report bytes, including the report ID if there is one.
+        """
+        buf = bytearray(self.len)
+        if self.report_id is not None:
+            buf[0] = self.report_id
+        keys = []
+        for key_code in key_codes:
+            if 0 < key_code <= self.usage_max and self._mod_byte[key_code] >= 0:
+                buf[self._mod_byte[key_code]] |= self._mod_mask[key_code]
+            elif key_code not in keys:
+                keys.append(key_code)
+        if len(keys) > self.slots and self.usage_page == KEYBOARD_PAGE:
+            keys = [ERROR_ROLL_OVER] * self.slots
+        for (offset, key_code) in zip(self._slot_offsets, keys):
+            buf[offset:offset + self.slot_size] = key_code.to_bytes(self.slot_size, "little")
+        return bytes(buf)
+
+    def _set_slot(self, slot, key_code):
+        offset = self._slot_offsets[slot]
+        if self.slot_size == 1:
+            self._buf[offset] = key_code
+        else:
+            self._buf[offset:offset + self.slot_size] = key_code.to_bytes(self.slot_size, "little")
+
+    def _send(self):
+        if self._overflow and self.usage_page == KEYBOARD_PAGE:
+            # Too many keys down: keep the modifiers, fill every slot with ErrorRollOver.
+            phantom = bytearray(self._buf)
+            end = self._array_start + self.slots * self.slot_size
+            phantom[self._array_start:end] = ERROR_ROLL_OVER.to_bytes(self.slot_size, "little") * self.slots
+            self.gadget.send_report(phantom)
+        else:
+            self.gadget.send_report(self._buf)
@@ -1,17 +1,55 @@
 class BitmapPart:
-    def __init__(self, usage, count, size, offset):
+    """
+    One bitmap field of a report: a run of consecutive usages, one bit each.
+    """
+
+    def __init__(self, usage, count, size=1, offset=0):
+        """
+        :param usage: First usage code in the bitmap.
+        :param count: Number of usages in the bitmap.
+        :param size: Bits per usage. Bitmaps are always 1.
+        :param offset: Bit offset of the bitmap in the report data, not counting the report ID byte.
+        """
+        if size != 1:
+            raise ValueError("Bitmap fields must be 1 bit per usage, not {}".format(size))
+
         self.usage = usage
         self.count = count
         self.size = size
         self.offset = offset
 
-        self._usages = [False for _ in range(count)]
+    @classmethod
+    def from_field(cls, field):
+        """
+        Create a part from a bitmap field of a parsed report descriptor.
+
+        :param field: hid.descriptor.ReportField of kind BITMAP.
+        """
+        return cls(field.usage_min, field.count, field.bit_size, field.bit_offset)
+
+    @property
+    def last_usage(self):
+        return self.usage + self.count - 1
+
+    def locate(self, usage):
+        """
+        Find the bit for a usage.
 
-    def set(self, usage):
-        pass
+        :param usage: Usage code. Must be within this part.
+        :return: (byte offset in the report data, bit mask)
+        """
+        (byte, bit) = divmod(self.offset + usage - self.usage, 8)
+        return byte, 1 << bit
 
-    def clear(self, usage):
-        pass
+    def fill_tables(self, byte_index, bit_mask, byte_offset=0):
+        """
+        Write this part's usages into usage -> (byte, mask) lookup tables.
 
-    def fill_buffer(self, buf):
-        pass
+        :param byte_index: Table of byte offsets, indexed by usage.
+        :param bit_mask: Table of bit masks, indexed by usage.
+        :param byte_offset: Added to every byte offset, e.g. 1 to skip a report ID.
+        """
+        for usage in range(self.usage, self.usage + self.count):
+            (byte, mask) = self.locate(usage)
+            byte_index[usage] = byte + byte_offset
+            bit_mask[usage] = mask
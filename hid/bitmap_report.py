@@ -2,43 +2,98 @@
 Classes to mess with HID (USB key etc) output.
 """
 
+import logging
+from array import array
 
-class BitmapReport:
+from hid.bitmap_part import BitmapPart
+from hid.descriptor import BITMAP, INPUT, KEYBOARD_PAGE, DescriptorError, load_descriptor
+from hid.report import Report
+from hid.usages import describe
+
+log = logging.getLogger(__name__)
+
+
+class BitmapReport(Report):
     """
     HID Bitmapped key report.
 
     TODO: This is broken for reports with bitmaps *and* full keys.
     """
 
-    def __init__(self, gadget, report_len, ranges, report_id=None):
+    def __init__(self, gadget, report_len, ranges, report_id=None, usage_page=KEYBOARD_PAGE):
         """
         Set up a bitmapped key report.
 
-        :param gadget: HidGadget this report belongs to.
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
         :param report_len: Total length of the report data (not including report_id)
-        :param ranges: List of ranges of elements in the report: (start code, count of items, byte offset in the report)
+        :param ranges: List of ranges of elements in the report: either (start code, count of items, byte offset in
+            the report) or BitmapParts.
         :param report_id: Optional report ID for HID descriptors with multiple reports defined.
+        :param usage_page: Usage page of the bitmaps, for log messages.
         """
-        self.gadget = gadget
+        super().__init__(gadget)
         self.report_id = report_id
-        self.chunks = [
-            (start, start + count - 1, offset) for (start, count, offset) in ranges
+        self.usage_page = usage_page
+        self.parts = [
+            r if isinstance(r, BitmapPart) else BitmapPart(r[0], r[1], 1, r[2] * 8)
+            for r in ranges
         ]
         self.len = report_len + (0 if report_id is None else 1)
-        self._buf = bytearray([0x00 for _ in range(report_len)])
+        self._buf = bytearray(self.len)
         self._id_offset = 0
         if report_id is not None:
             self._buf[0] = self.report_id
             self._id_offset = 1
 
+        # Dense keycode -> (byte, bit mask) tables, so press/release don't have to search the ranges.
+        # Filled back to front so that where ranges overlap (e.g. the modifier byte and an NKRO bitmap that also
+        # covers 0xE0..0xE7), the first range wins.
+        table_len = max((p.last_usage + 1 for p in self.parts), default=0)
+        self._byte_index = array("h", [-1]) * table_len
+        self._bit_mask = bytearray(table_len)
+        for p in reversed(self.parts):
+            p.fill_tables(self._byte_index, self._bit_mask, self._id_offset)
+
+    @classmethod
+    def from_layout(cls, gadget, layout, report_id=None):
+        """
+        Set up a report from a parsed report descriptor, using every bitmap field of the input report.
+
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
+        :param layout: hid.descriptor.ReportLayout.
+        :param report_id: Report ID to use, or None for descriptors without report IDs.
+        """
+        fields = layout.fields_for(report_id, INPUT, BITMAP)
+        if not fields:
+            raise DescriptorError("No bitmap fields in input report {}".format(report_id))
+        return cls(
+            gadget,
+            layout.report_length(report_id, INPUT),
+            [BitmapPart.from_field(f) for f in fields],
+            report_id,
+            fields[0].usage_page,
+        )
+
+    @classmethod
+    def from_descriptor(cls, gadget, path, report_id=None):
+        """
+        Set up a report from a binary report descriptor file, e.g. descriptors/ext_hid.bin.
+
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
+        :param path: Path to the descriptor.
+        :param report_id: Report ID to use, or None for descriptors without report IDs.
+        """
+        return cls.from_layout(gadget, load_descriptor(path), report_id)
+
     def press(self, key_code):
         """
         Mark a key as pressed.
 
         :param key_code: Key to press. Must be within the ranges specified in the constructor.
         """
-        (byte, bit) = self._key_to_index(key_code)
-        self._buf[byte] |= 1 << bit
+        byte = self._lookup(key_code)
+        if byte >= 0:
+            self._buf[byte] |= self._bit_mask[key_code]
 
     def release(self, key_code):
         """
@@ -46,43 +101,31 @@ class BitmapReport:
 
         :param key_code: Key to release. Must be within the ranges specified in the constructor.
         """
-        (byte, bit) = self._key_to_index(key_code)
-        self._buf[byte] &= ~(1 << bit)
+        byte = self._lookup(key_code)
+        if byte >= 0:
+            self._buf[byte] &= ~self._bit_mask[key_code]
 
-    def send(self):
+    def render(self, key_codes):
         """
-        Send the current state of the report.
+        Build a standalone report with exactly these keys pressed, without touching the live state.
+
+        :param key_codes: Keys to press.
+        :return: Report bytes, including the report ID if there is one.
         """
-        self.gadget.send_report(self._buf)
-
-    def _key_to_index(self, key_code):
-        (offset, start) = next(
-            (
-                (offset, start)
-                for (start, end, offset) in self.chunks
-                if start <= key_code < end
-            ),
-            (None, None),
-        )
-        if offset is None or start is None:
-            print("Unmapped keycode {}".format(key_code))
-        else:
-            pos = (key_code - start) & 0x00FF
-            (byte, bit) = divmod(pos, 8)
-            return byte + offset + self._id_offset, bit
-
-    def key_handler(self, key_code):
-        def _handle_key_code(button, key):
-            if button.is_held:
-                print("Keycode {} held".format(key_code))
-            elif button.is_pressed:
-                print("Keycode {} pressed".format(key_code))
-                self.press(key_code)
-                self.send()
-            else:
-                print("Keycode {} released".format(key_code))
-                self.release(key_code)
-                self.send()
-
-        return _handle_key_code
+        buf = bytearray(self.len)
+        if self.report_id is not None:
+            buf[0] = self.report_id
+        for key_code in key_codes:
+            byte = self._lookup(key_code)
+            if byte >= 0:
+                buf[byte] |= self._bit_mask[key_code]
+        return bytes(buf)
 
+    def _lookup(self, key_code):
+        try:
+            byte = self._byte_index[key_code] if key_code >= 0 else -1
+        except IndexError:
+            byte = -1
+        if byte < 0:
+            log.warning("Unmapped keycode %s", describe(self.usage_page, key_code))
+        return byte
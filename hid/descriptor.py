@@ -0,0 +1,333 @@
+"""
+HID report descriptor parsing.
+
+Turns a binary report descriptor (as written to the gadget's report_desc) into a ReportLayout describing where each
+field lives in each report, so reports can be built from the descriptor rather than hand-coded to match it.
+"""
+
+INPUT = "input"
+OUTPUT = "output"
+FEATURE = "feature"
+
+BITMAP = "bitmap"
+ARRAY = "array"
+VALUE = "value"
+PADDING = "padding"
+
+KEYBOARD_PAGE = 0x07
+MODIFIER_MIN = 0xE0
+MODIFIER_MAX = 0xE7
+
+# Item types
+_MAIN = 0
+_GLOBAL = 1
+_LOCAL = 2
+
+# Main item tags
+_MAIN_TAGS = {0x8: INPUT, 0x9: OUTPUT, 0xB: FEATURE}
+_COLLECTION = 0xA
+_END_COLLECTION = 0xC
+
+# Global item tags
+_USAGE_PAGE = 0x0
+_LOGICAL_MIN = 0x1
+_LOGICAL_MAX = 0x2
+_REPORT_SIZE = 0x7
+_REPORT_ID = 0x8
+_REPORT_COUNT = 0x9
+_PUSH = 0xA
+_POP = 0xB
+
+# Local item tags
+_USAGE = 0x0
+_USAGE_MIN = 0x1
+_USAGE_MAX = 0x2
+
+_LONG_ITEM = 0xFE
+
+
+class DescriptorError(ValueError):
+    """
+    The report descriptor is malformed or uses something we can't represent.
+    """
+
+
+class ReportField:
+    """
+    A single main item (Input, Output or Feature) of a report descriptor.
+    """
+
+    def __init__(self, kind, direction, report_id, usage_page, usages, bit_offset, bit_size, count,
+                 logical_min=0, logical_max=0):
+        """
+        :param kind: BITMAP, ARRAY, VALUE or PADDING.
+        :param direction: INPUT, OUTPUT or FEATURE.
+        :param report_id: Report ID this field belongs to, or None if the descriptor doesn't use report IDs.
+        :param usage_page: Usage page of the field's usages.
+        :param usages: Sequence of usage IDs covered by the field (a range for Usage Minimum/Maximum).
+        :param bit_offset: Offset of the first bit of the field in the report data, not counting the report ID byte.
+        :param bit_size: Report Size: bits per element.
+        :param count: Report Count: number of elements.
+        :param logical_min: Logical Minimum.
+        :param logical_max: Logical Maximum.
+        """
+        self.kind = kind
+        self.direction = direction
+        self.report_id = report_id
+        self.usage_page = usage_page
+        self.usages = usages
+        self.bit_offset = bit_offset
+        self.bit_size = bit_size
+        self.count = count
+        self.logical_min = logical_min
+        self.logical_max = logical_max
+
+    @property
+    def bit_length(self):
+        """
+        Total size of the field in bits.
+        """
+        return self.bit_size * self.count
+
+    @property
+    def byte_offset(self):
+        """
+        Offset of the field in the report data in whole bytes. Only meaningful for byte-aligned fields.
+        """
+        return self.bit_offset // 8
+
+    @property
+    def usage_min(self):
+        return self.usages[0] if len(self.usages) else None
+
+    @property
+    def usage_max(self):
+        return self.usages[-1] if len(self.usages) else None
+
+    @property
+    def is_modifier(self):
+        """
+        True if this is the keyboard modifier byte (Left Control .. Right GUI as a bitmap).
+        """
+        return (
+            self.kind == BITMAP
+            and self.usage_page == KEYBOARD_PAGE
+            and self.usage_min == MODIFIER_MIN
+            and self.usage_max == MODIFIER_MAX
+        )
+
+    def __repr__(self):
+        return "ReportField({}, {}, id={}, page=0x{:02X}, usages=0x{:X}..0x{:X}, offset={}, size={}x{})".format(
+            self.kind,
+            self.direction,
+            self.report_id,
+            self.usage_page,
+            self.usage_min or 0,
+            self.usage_max or 0,
+            self.bit_offset,
+            self.count,
+            self.bit_size,
+        )
+
+
+class ReportLayout:
+    """
+    The compiled form of a report descriptor: every field of every report, with precomputed offsets.
+    """
+
+    def __init__(self, fields):
+        """
+        :param fields: List of ReportFields, in descriptor order.
+        """
+        self.fields = fields
+        self._lengths = {}
+        for f in fields:
+            key = (f.report_id, f.direction)
+            self._lengths[key] = max(self._lengths.get(key, 0), f.bit_offset + f.bit_length)
+
+    @property
+    def report_ids(self):
+        """
+        Sorted list of report IDs used by the descriptor. [None] if it doesn't use report IDs.
+        """
+        return sorted({f.report_id for f in self.fields}, key=lambda i: -1 if i is None else i)
+
+    def fields_for(self, report_id=None, direction=INPUT, kind=None):
+        """
+        Get the fields of one report.
+
+        :param report_id: Report ID, or None for descriptors without report IDs.
+        :param direction: INPUT, OUTPUT or FEATURE.
+        :param kind: Optional kind (BITMAP, ARRAY, ...) to filter on.
+        :return: List of ReportFields.
+        """
+        return [
+            f for f in self.fields
+            if f.report_id == report_id and f.direction == direction and (kind is None or f.kind == kind)
+        ]
+
+    def report_length(self, report_id=None, direction=INPUT):
+        """
+        Length of a report's data in bytes, not counting the report ID byte.
+
+        :param report_id: Report ID, or None for descriptors without report IDs.
+        :param direction: INPUT, OUTPUT or FEATURE.
+        :return: Length in bytes. 0 if there is no such report.
+        """
+        return (self._lengths.get((report_id, direction), 0) + 7) // 8
+
+
+class _GlobalState:
+    def __init__(self):
+        self.usage_page = 0
+        self.logical_min = 0
+        self.logical_max = 0
+        self.logical_max_unsigned = 0
+        self.report_size = 0
+        self.report_count = 0
+        self.report_id = None
+
+    def copy(self):
+        state = _GlobalState()
+        state.__dict__.update(self.__dict__)
+        return state
+
+
+def _signed(value, size):
+    bits = size * 8
+    if bits and value & (1 << (bits - 1)):
+        return value - (1 << bits)
+    return value
+
+
+def _items(data):
+    i = 0
+    while i < len(data):
+        prefix = data[i]
+        if prefix == _LONG_ITEM:
+            if i + 2 >= len(data):
+                raise DescriptorError("Truncated long item at offset {}".format(i))
+            i += 3 + data[i + 1]
+            continue
+
+        size = (0, 1, 2, 4)[prefix & 0x03]
+        if i + 1 + size > len(data):
+            raise DescriptorError("Truncated item 0x{:02X} at offset {}".format(prefix, i))
+        value = int.from_bytes(data[i + 1:i + 1 + size], "little")
+        yield (prefix >> 2) & 0x03, prefix >> 4, value, size
+        i += 1 + size
+
+
+def parse_descriptor(data):
+    """
+    Parse a binary HID report descriptor.
+
+    :param data: Descriptor bytes.
+    :return: ReportLayout.
+    """
+    state = _GlobalState()
+    stack = []
+    usages = []
+    usage_min = None
+    usage_max = None
+    depth = 0
+    offsets = {}
+    fields = []
+
+    for (item_type, tag, value, size) in _items(data):
+        if item_type == _GLOBAL:
+            if tag == _USAGE_PAGE:
+                state.usage_page = value
+            elif tag == _LOGICAL_MIN:
+                state.logical_min = _signed(value, size)
+            elif tag == _LOGICAL_MAX:
+                state.logical_max = _signed(value, size)
+                state.logical_max_unsigned = value
+            elif tag == _REPORT_SIZE:
+                state.report_size = value
+            elif tag == _REPORT_ID:
+                if value == 0:
+                    raise DescriptorError("Report ID 0 is reserved")
+                state.report_id = value
+            elif tag == _REPORT_COUNT:
+                state.report_count = value
+            elif tag == _PUSH:
+                stack.append(state.copy())
+            elif tag == _POP:
+                if not stack:
+                    raise DescriptorError("Pop without matching Push")
+                state = stack.pop()
+
+        elif item_type == _LOCAL:
+            # Extended (4 byte) usages carry their own usage page in the high word; we only keep the ID.
+            if tag == _USAGE:
+                usages.append(value & 0xFFFF if size == 4 else value)
+            elif tag == _USAGE_MIN:
+                usage_min = value & 0xFFFF if size == 4 else value
+            elif tag == _USAGE_MAX:
+                usage_max = value & 0xFFFF if size == 4 else value
+
+        elif item_type == _MAIN:
+            if tag in _MAIN_TAGS:
+                direction = _MAIN_TAGS[tag]
+                key = (state.report_id, direction)
+                offset = offsets.get(key, 0)
+
+                if usage_min is not None and usage_max is not None:
+                    field_usages = range(usage_min, usage_max + 1)
+                else:
+                    field_usages = tuple(usages)
+
+                logical_max = state.logical_max
+                if logical_max < state.logical_min:
+                    # Logical Maximum written as an unsigned value, e.g. 0x25 0xFF for 255.
+                    logical_max = state.logical_max_unsigned
+
+                if value & 0x01:
+                    kind = PADDING
+                elif not value & 0x02:
+                    kind = ARRAY
+                elif state.report_size == 1:
+                    kind = BITMAP
+                else:
+                    kind = VALUE
+
+                fields.append(ReportField(
+                    kind,
+                    direction,
+                    state.report_id,
+                    state.usage_page,
+                    field_usages,
+                    offset,
+                    state.report_size,
+                    state.report_count,
+                    state.logical_min,
+                    logical_max,
+                ))
+                offsets[key] = offset + state.report_size * state.report_count
+            elif tag == _COLLECTION:
+                depth += 1
+            elif tag == _END_COLLECTION:
+                if depth == 0:
+                    raise DescriptorError("End Collection without matching Collection")
+                depth -= 1
+
+            # Local items only apply to the next main item.
+            usages = []
+            usage_min = None
+            usage_max = None
+
+    if depth != 0:
+        raise DescriptorError("Unterminated collection")
+    return ReportLayout(fields)
+
+
+def load_descriptor(path):
+    """
+    Read and parse a binary HID report descriptor file, e.g. descriptors/ext_hid.bin.
+
+    :param path: Path to the descriptor.
+    :return: ReportLayout.
+    """
+    with open(path, "rb") as f:
+        return parse_descriptor(f.read())
@@ -0,0 +1,95 @@
+"""
+Keyboard output over both the NKRO and the boot keyboard interfaces.
+"""
+
+import logging
+
+from hid.report import Report
+
+log = logging.getLogger(__name__)
+
+
+class DualReport(Report):
+    """
+    Drives an NKRO report and a boot (6KRO) report together, sending to whichever interface the host is reading.
+
+    BIOSes and bootloaders only talk boot protocol, to the boot keyboard interface, and never read the NKRO one. The
+    host's choice of protocol isn't visible from userspace (f_hid answers SET_PROTOCOL itself), so it is inferred:
+    while the NKRO interface's sender is stalled, reports go to the boot interface instead. Whatever was still waiting
+    for the NKRO interface is replaced with an all-keys-up report, so keys typed at the BIOS aren't replayed to the OS.
+    As soon as the host reads NKRO reports again, the boot interface is sent an all-keys-up report and NKRO takes over
+    with the current state.
+
+    Stalling takes a moment to detect, so while the NKRO interface is refusing reports but hasn't stalled yet, the state
+    goes to both interfaces. That way the keystroke that starts the stall (a single F2 tap to enter a BIOS, say) still
+    reaches the boot interface. If the NKRO interface picks up again, the boot interface is sent an all-keys-up report.
+
+    Both reports track every press and release, so switching interfaces never loses a held key.
+    """
+
+    def __init__(self, primary, fallback, primary_sender):
+        """
+        :param primary: Report for the NKRO interface, e.g. a BitmapReport.
+        :param fallback: Report for the boot interface, e.g. an ArrayReport.
+        :param primary_sender: ReportSender (or LoopSender) the primary report writes to. Its stall state picks the
+            interface.
+        """
+        super().__init__(None)
+        self.primary = primary
+        self.fallback = fallback
+        self.primary_sender = primary_sender
+
+        self.boot_mode = False
+        self.switches = 0
+        self.mirrored = 0
+
+        self._mirroring = False
+
+        primary_sender.on_refuse = self.send
+        primary_sender.on_stall = self.send
+        primary_sender.on_resume = self.send
+
+    def press(self, key_code):
+        """
+        Mark a key as pressed on both interfaces.
+
+        :param key_code: Key to press.
+        """
+        self.primary.press(key_code)
+        self.fallback.press(key_code)
+
+    def release(self, key_code):
+        """
+        Mark a key as released on both interfaces.
+
+        :param key_code: Key to release.
+        """
+        self.primary.release(key_code)
+        self.fallback.release(key_code)
+
+    def render(self, key_codes):
+        return self.primary.render(key_codes)
+
+    def _send(self):
+        if self.primary_sender.stalled:
+            if not self.boot_mode:
+                log.info("Host isn't reading the NKRO interface, sending boot keyboard reports")
+                self.boot_mode = True
+                self.switches += 1
+                self.primary_sender.reset(self.primary.render(()))
+            self._mirroring = False
+            self.fallback.send()
+        else:
+            if self.boot_mode:
+                log.info("Host is reading the NKRO interface again")
+                self.boot_mode = False
+                self.switches += 1
+                self.fallback.gadget.send_report(self.fallback.render(()))
+            self.primary.send()
+            if self.primary_sender.refusing:
+                self._mirroring = True
+                self.mirrored += 1
+                self.fallback.send()
+            elif self._mirroring:
+                self._mirroring = False
+                self.fallback.gadget.send_report(self.fallback.render(()))
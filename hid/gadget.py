@@ -1,17 +1,50 @@
+import errno
+import logging
+import os
+import select
+import time
+
+log = logging.getLogger(__name__)
+
+
 class HidGadget:
     """
     HID Gadget, for sending reports to the host.
 
-    TODO: support input reports.
+    The gadget device is opened once with O_NONBLOCK and kept open for the lifetime of the gadget, so a report costs a
+    single write() syscall. If the USB gadget is re-enumerated (the host is unplugged, the UDC is rebound, etc.) the
+    device is transparently reopened on the next write.
+
+    Output reports from the host (e.g. keyboard LEDs) are read from the same device with read_report(). fileno() can be
+    passed to select() to wait for them.
     """
 
-    def __init__(self, dev):
+    # Errors that mean the device node is stale and needs to be reopened.
+    _REOPEN_ERRORS = (errno.ENODEV, errno.EPIPE, errno.ESHUTDOWN, errno.EBADF, errno.ENXIO)
+
+    def __init__(self, dev, write_timeout=0.01, verbose=False):
         """
         Initialise the HID gadget.
 
         :param dev: the device path to use, e.g. /dev/hidg0
+        :param write_timeout: How long (in seconds) to wait for the host to pick up the previous report before giving
+            up on this one. 0 never waits.
+        :param verbose: If True, log every report (at debug level) as it is sent.
         """
         self.dev = dev
+        self.write_timeout = write_timeout
+        self.verbose = verbose
+
+        self.reports_sent = 0
+        # Reports refused because the host hadn't picked up the previous one. Senders retry these, so they aren't
+        # necessarily lost; ReportSender and LoopSender count the ones that really are.
+        self.reports_refused = 0
+        self.reopens = 0
+
+        # Optional metrics.Histogram to record write times in.
+        self.write_timer = None
+
+        self._fd = None
 
     def send_report(self, report_bytes):
         """
@@ -20,7 +53,80 @@ class HidGadget:
         This is intended to be used through a HidReport object, but can be used for arbitrary data.
 
         :param report_bytes: byte array to send.
+        :return: True if the report was written, False if the host wasn't polling and the report was refused.
+        """
+        if self.verbose and log.isEnabledFor(logging.DEBUG):
+            log.debug("Attempting to write a HID report: %s", bytes(report_bytes).hex())
+
+        timer = self.write_timer
+        start = time.perf_counter() if timer is not None else 0
+        for attempt in range(2):
+            try:
+                fd = self._open()
+                try:
+                    os.write(fd, report_bytes)
+                except BlockingIOError:
+                    # The host hasn't read the last report yet. Give it a moment, then try once more.
+                    if not self._wait_writable(fd):
+                        self.reports_refused += 1
+                        return False
+                    os.write(fd, report_bytes)
+                self.reports_sent += 1
+                if timer is not None:
+                    timer.time(start)
+                return True
+            except BlockingIOError:
+                self.reports_refused += 1
+                return False
+            except OSError as ex:
+                if ex.errno not in self._REOPEN_ERRORS or attempt > 0:
+                    raise
+                self.close()
+                self.reopens += 1
+
+    def fileno(self):
         """
-        with open(self.dev, "rb+") as gadget:
-            print("Attempting to write a HID report: {}".format(report_bytes))
-            gadget.write(report_bytes)
+        :return: File descriptor of the gadget device, opening it if needed. Changes if the device is reopened.
+        """
+        return self._open()
+
+    def read_report(self, size=64):
+        """
+        Read an output report from the host without blocking.
+
+        :param size: Largest report to read.
+        :return: Report bytes, or None if there isn't one waiting.
+        """
+        try:
+            data = os.read(self._open(), size)
+        except BlockingIOError:
+            return None
+        except OSError as ex:
+            if ex.errno not in self._REOPEN_ERRORS:
+                raise
+            self.close()
+            self.reopens += 1
+            return None
+        return data or None
+
+    def close(self):
+        """
+        Close the gadget device. It will be reopened on the next write.
+        """
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _open(self):
+        if self._fd is None:
+            self._fd = os.open(self.dev, os.O_RDWR | os.O_NONBLOCK)
+        return self._fd
+
+    def _wait_writable(self, fd):
+        if self.write_timeout <= 0:
+            return False
+        (_, writable, _) = select.select([], [fd], [], self.write_timeout)
+        return bool(writable)
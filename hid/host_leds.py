@@ -0,0 +1,221 @@
+"""
+Keyboard LED state (Num Lock, Caps Lock, ...) sent by the host as output reports.
+"""
+
+import logging
+import os
+import select
+import threading
+
+from hid.bitmap_part import BitmapPart
+from hid.descriptor import BITMAP, OUTPUT, DescriptorError
+
+log = logging.getLogger(__name__)
+
+LED_PAGE = 0x08
+
+NUM_LOCK = 0x01
+CAPS_LOCK = 0x02
+SCROLL_LOCK = 0x03
+COMPOSE = 0x04
+KANA = 0x05
+
+_NAMES = {NUM_LOCK: "num lock", CAPS_LOCK: "caps lock", SCROLL_LOCK: "scroll lock", COMPOSE: "compose", KANA: "kana"}
+
+
+class LedReportParser:
+    """
+    Decodes one interface's LED output report into the set of LEDs that are lit.
+    """
+
+    def __init__(self, layout, report_id=None):
+        """
+        :param layout: hid.descriptor.ReportLayout of the interface.
+        :param report_id: Report ID of the LED output report, or None for descriptors without report IDs.
+        """
+        fields = [f for f in layout.fields_for(report_id, OUTPUT, BITMAP) if f.usage_page == LED_PAGE]
+        if not fields:
+            raise DescriptorError("No LED fields in output report {}".format(report_id))
+
+        self.report_id = report_id
+        id_offset = 0 if report_id is None else 1
+        self.len = layout.report_length(report_id, OUTPUT) + id_offset
+
+        parts = [BitmapPart.from_field(f) for f in fields]
+        table_len = max(p.last_usage for p in parts) + 1
+        byte_index = [-1] * table_len
+        bit_mask = bytearray(table_len)
+        for p in reversed(parts):
+            p.fill_tables(byte_index, bit_mask, id_offset)
+        self._bits = [
+            (usage, byte_index[usage], bit_mask[usage]) for usage in range(table_len) if byte_index[usage] >= 0
+        ]
+
+    def parse(self, data):
+        """
+        :param data: Output report, as read from the gadget.
+        :return: frozenset of the LED usages that are lit, or None if this isn't an LED report.
+        """
+        if len(data) < self.len or (self.report_id is not None and data[0] != self.report_id):
+            return None
+        return frozenset(usage for (usage, byte, mask) in self._bits if data[byte] & mask)
+
+
+class HostLedReader:
+    """
+    Reads LED output reports from any number of gadget interfaces and tells listeners when the lit LEDs change.
+
+    Hosts usually send the same LED state to every keyboard interface. Whichever report arrived last wins.
+
+    Reads either on a thread of its own (start()) or on an asyncio event loop (attach()).
+    """
+
+    def __init__(self):
+        self.leds = frozenset()
+        self.reports = 0
+        self.changes = 0
+
+        self._sources = []
+        self._listeners = []
+        self._stop_r = None
+        self._stop_w = None
+        self._thread = None
+        self._loop = None
+        self._fds = {}
+        self._failed = set()
+        self._refresh = None
+
+    def add_source(self, gadget, layout, report_id=None):
+        """
+        Read LED reports from a gadget.
+
+        :param gadget: HidGadget (or anything with fileno() and read_report()).
+        :param layout: hid.descriptor.ReportLayout of the gadget's interface.
+        :param report_id: Report ID of the LED output report, or None for descriptors without report IDs.
+        """
+        self._sources.append((gadget, LedReportParser(layout, report_id)))
+
+    @property
+    def sources(self):
+        """
+        The gadgets being read.
+        """
+        return [gadget for (gadget, _) in self._sources]
+
+    def add_listener(self, listener):
+        """
+        Adds a function to be called whenever the lit LEDs change.
+
+        :param listener: function to call. Takes a single argument: the frozenset of lit LED usages.
+        """
+        self._listeners.append(listener)
+
+    def read(self, gadget):
+        """
+        Handle every report waiting on a gadget. Call this when its fileno() is readable.
+
+        :param gadget: A gadget passed to add_source.
+        """
+        for (source, parser) in self._sources:
+            if source is gadget:
+                break
+        else:
+            raise ValueError("{} isn't a source".format(gadget))
+
+        while True:
+            data = gadget.read_report(parser.len)
+            if data is None:
+                return
+            leds = parser.parse(data)
+            if leds is None:
+                continue
+            self.reports += 1
+            if leds != self.leds:
+                self.leds = leds
+                self.changes += 1
+                log.info("Host LEDs: %s", ", ".join(_NAMES.get(u, hex(u)) for u in sorted(leds)) or "none")
+                for listener in self._listeners:
+                    listener(leds)
+
+    def start(self):
+        """
+        Start reading on a background thread.
+        """
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="host-leds", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread.
+        """
+        if self._thread is not None:
+            os.write(self._stop_w, b"x")
+            self._thread.join()
+            self._thread = None
+            os.close(self._stop_r)
+            os.close(self._stop_w)
+
+    def attach(self, loop):
+        """
+        Read on an asyncio event loop instead of a thread, with loop.add_reader() on each gadget.
+
+        :param loop: Event loop. Listeners are called on its thread.
+        """
+        self._loop = loop
+        self._watch()
+
+    def detach(self):
+        """
+        Stop reading on the event loop.
+        """
+        if self._loop is not None:
+            self._refresh.cancel()
+            for fd in self._fds.values():
+                self._loop.remove_reader(fd)
+            self._fds = {}
+            self._loop = None
+
+    def _descriptors(self):
+        # Gadgets reopen their device after errors, so the descriptors have to be looked up afresh now and then.
+        fds = {}
+        for (gadget, _) in self._sources:
+            try:
+                fds[gadget] = gadget.fileno()
+                self._failed.discard(gadget)
+            except OSError as ex:
+                if gadget not in self._failed:
+                    log.warning("Can't read LED reports from %s: %s", getattr(gadget, "dev", gadget), ex)
+                    self._failed.add(gadget)
+        return fds
+
+    def _watch(self):
+        for fd in self._fds.values():
+            self._loop.remove_reader(fd)
+        self._fds = self._descriptors()
+        for (gadget, fd) in self._fds.items():
+            self._loop.add_reader(fd, self._ready, gadget)
+        self._refresh = self._loop.call_later(1.0, self._watch)
+
+    def _ready(self, gadget):
+        try:
+            self.read(gadget)
+        except OSError as ex:
+            log.error("LED report read failed: %s", ex)
+
+    def _run(self):
+        while True:
+            fds = {fd: gadget for (gadget, fd) in self._descriptors().items()}
+
+            try:
+                (ready, _, _) = select.select(list(fds) + [self._stop_r], [], [], 1.0)
+            except OSError:
+                # A gadget was closed under us by a writer reopening it.
+                continue
+            if self._stop_r in ready:
+                return
+            for fd in ready:
+                try:
+                    self.read(fds[fd])
+                except OSError as ex:
+                    log.error("LED report read failed: %s", ex)
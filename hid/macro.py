@@ -0,0 +1,215 @@
+"""
+Macros: typing strings and key sequences.
+
+A macro is compiled once, when the keymap is loaded, into a list of chords (the keys held down at each step), and then
+once more, when its handler is built, into finished report buffers. Playing it back is just writing those buffers
+out, so a long snippet goes to the host as fast as the gadget accepts reports rather than one report per key event.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Unshifted and shifted characters for each key on a US layout.
+_US_KEYS = [
+    ("KEY_1", "1!"), ("KEY_2", "2@"), ("KEY_3", "3#"), ("KEY_4", "4$"), ("KEY_5", "5%"),
+    ("KEY_6", "6^"), ("KEY_7", "7&"), ("KEY_8", "8*"), ("KEY_9", "9("), ("KEY_0", "0)"),
+    ("KEY_MINUS", "-_"), ("KEY_EQUAL", "=+"), ("KEY_LEFTBRACE", "[{"), ("KEY_RIGHTBRACE", "]}"),
+    ("KEY_BACKSLASH", "\\|"), ("KEY_SEMICOLON", ";:"), ("KEY_APOSTROPHE", "'\""), ("KEY_GRAVE", "`~"),
+    ("KEY_COMMA", ",<"), ("KEY_DOT", ".>"), ("KEY_SLASH", "/?"),
+    ("KEY_SPACE", " "), ("KEY_ENTER", "\n"), ("KEY_TAB", "\t"),
+]
+
+_char_table = None
+
+
+def _chars():
+    global _char_table
+    if _char_table is None:
+        from hid.usages import Keyboard
+
+        shift = Keyboard.KEY_LEFTSHIFT
+        table = {}
+        for c in "abcdefghijklmnopqrstuvwxyz":
+            code = Keyboard.code("KEY_" + c.upper())
+            table[c] = (code,)
+            table[c.upper()] = (shift, code)
+        for (name, chars) in _US_KEYS:
+            code = Keyboard.code(name)
+            table[chars[0]] = (code,)
+            if len(chars) > 1:
+                table[chars[1]] = (shift, code)
+        _char_table = table
+    return _char_table
+
+
+def text_chords(text):
+    """
+    Work out the key presses that type a string on a host using a US keyboard layout.
+
+    :param text: Text to type. Newlines press enter.
+    :return: List of chords, each a list of the usage codes held down for one character.
+    :raises ValueError: If the text has a character that can't be typed.
+    """
+    table = _chars()
+    chords = []
+    for c in text:
+        try:
+            chords.append(list(table[c]))
+        except KeyError:
+            raise ValueError("can't type {!r}".format(c))
+    return chords
+
+
+def sequence_chords(steps):
+    """
+    Parse a key sequence.
+
+    :param steps: List of steps. Each is a usage name ("KEY_TAB") or several joined with "+" to press them together
+        ("KEY_LEFTCTRL+KEY_C").
+    :return: List of chords, each a list of usage codes.
+    :raises ValueError: If a step names an unknown usage.
+    """
+    from hid.usages import Keyboard
+
+    chords = []
+    for step in steps:
+        if not isinstance(step, str):
+            raise ValueError("can't understand step {!r}".format(step))
+        chord = []
+        for name in step.split("+"):
+            name = name.strip()
+            if name not in Keyboard:
+                raise ValueError("unknown keyboard usage {!r}".format(name))
+            chord.append(Keyboard.code(name))
+        chords.append(chord)
+    return chords
+
+
+def compile_chords(report, chords):
+    """
+    Turn chords into the reports that play them.
+
+    Each chord gets a report with its keys down. A report with nothing down is put in between chords where the host
+    would otherwise miss a key going up, i.e. when a key repeats or the modifiers change, and at the end.
+
+    :param report: BitmapReport the macro is typed through. Only its layout is used.
+    :param chords: List of chords, each a list of usage codes.
+    :return: List of report buffers.
+    """
+    release = report.render(())
+    buffers = []
+    previous = set()
+    for chord in chords:
+        keys = set(chord)
+        if previous and (previous & keys or _modifiers(previous) != _modifiers(keys)):
+            buffers.append(release)
+        buffers.append(report.render(chord))
+        previous = keys
+    if previous:
+        buffers.append(release)
+    return buffers
+
+
+def _modifiers(keys):
+    return {k for k in keys if 0xE0 <= k <= 0xE7}
+
+
+class MacroPlayer:
+    """
+    Plays compiled macros through a ReportSender from a background thread (or through a LoopSender, without one).
+
+    Reports are queued with wait=True, so the sender's queue paces playback to what the host accepts and none of the
+    macro's reports are merged or dropped. They don't count towards the sender's max_depth either, so key reports sent
+    during playback queue up behind the macro in room of their own rather than being merged into it. Once a macro has
+    played, the report's live state is sent again, so keys that are physically held still read as held on the host.
+
+    With a fallback (the boot keyboard interface), each macro is compiled for both interfaces, and played on the
+    fallback while the main sender is stalled, i.e. while hid.dual_report.DualReport is in boot mode.
+    """
+
+    def __init__(self, sender, report, interval=0.0, threaded=True, fallback=None):
+        """
+        :param sender: ReportSender to write to. Should be the one the report writes to, so macro and key reports
+            reach the host in order.
+        :param report: BitmapReport the macros are typed through.
+        :param interval: Minimum time between reports in seconds, for hosts that drop keys when typed to at full speed.
+            0 leaves the pacing to the gadget.
+        :param threaded: If False, play() queues the whole macro on the sender straight away instead of playing it
+            from a thread. For a hid.sender.LoopSender, which never blocks and paces the writes itself. interval is
+            ignored.
+        :param fallback: Optional (sender, report) for the boot keyboard interface, e.g. a ReportSender and an
+            ArrayReport.
+        """
+        self.sender = sender
+        self.report = report
+        self.interval = interval
+        self.fallback = fallback
+
+        self.played = 0
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="macro-player", daemon=True)
+            self._thread.start()
+
+    def play(self, buffers, fallback_buffers=None):
+        """
+        Queue a compiled macro to be played after any that are already playing.
+
+        :param buffers: Report buffers, from compile_chords().
+        :param fallback_buffers: The same macro compiled for the fallback report, if there is a fallback.
+        """
+        if self._thread is None:
+            self._play(buffers, fallback_buffers)
+            return
+        with self._cond:
+            self._queue.append((buffers, fallback_buffers))
+            self._cond.notify()
+
+    def key_handler(self, chords):
+        """
+        Build a key handler that plays a macro when the key is pressed.
+
+        :param chords: List of chords, from text_chords() or sequence_chords().
+        """
+        buffers = compile_chords(self.report, chords)
+        fallback_buffers = None
+        if self.fallback is not None:
+            fallback_buffers = compile_chords(self.fallback[1], chords)
+
+        def _play_macro(event, key):
+            if event.is_pressed and not event.is_held:
+                self.play(buffers, fallback_buffers)
+
+        return _play_macro
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                (buffers, fallback_buffers) = self._queue.popleft()
+            self._play(buffers, fallback_buffers)
+
+    def _play(self, buffers, fallback_buffers):
+        (sender, report) = (self.sender, self.report)
+        if sender.stalled and fallback_buffers is not None:
+            (sender, report) = self.fallback
+            buffers = fallback_buffers
+        if sender.stalled:
+            log.warning("Not playing macro: the host isn't reading reports")
+            return
+        try:
+            for buf in buffers:
+                sender.send_report(buf, wait=True)
+                if self.interval and self._thread is not None:
+                    time.sleep(self.interval)
+            report.send()
+            self.played += 1
+        except Exception as ex:
+            log.error("Macro playback failed: %s", ex)
@@ -0,0 +1,94 @@
+"""
+Behaviour shared by every kind of key report.
+"""
+
+import contextlib
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class Report:
+    """
+    A report that holds key state and sends it to a gadget.
+
+    Subclasses keep the report's bytes in self._buf and implement press(key_code) and release(key_code), which update
+    self._buf without sending it. This provides sending with batching, and key handlers. Subclasses whose report isn't
+    a single buffer override _send() instead.
+    """
+
+    def __init__(self, gadget):
+        """
+        :param gadget: HidGadget (or ReportSender) this report belongs to.
+        """
+        self.gadget = gadget
+        self._batch_depth = 0
+        self._batch_dirty = False
+
+    def send(self):
+        """
+        Send the current state of the report.
+
+        Inside a batch, this is deferred until the outermost batch is committed.
+        """
+        if self._batch_depth:
+            self._batch_dirty = True
+        else:
+            self._send()
+
+    def _send(self):
+        self.gadget.send_report(self._buf)
+
+    def begin(self):
+        """
+        Start a batch: any number of press/release/send calls until the matching commit() go to the host as a single
+        report. Batches nest.
+        """
+        self._batch_depth += 1
+
+    def commit(self):
+        """
+        End a batch. When the outermost batch ends, the report is sent once if anything asked for it to be sent.
+        """
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._batch_dirty:
+            self._batch_dirty = False
+            self._send()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager for begin()/commit().
+        """
+        self.begin()
+        try:
+            yield self
+        finally:
+            self.commit()
+
+    def key_handler(self, key_code):
+        """
+        Build a key handler that presses key_code while the key is down.
+
+        :param key_code: Usage code to press.
+        """
+        held_msg = "Keycode {} held".format(key_code)
+        pressed_msg = "Keycode {} pressed".format(key_code)
+        released_msg = "Keycode {} released".format(key_code)
+
+        def _handle_key_code(event, key):
+            if event.is_held:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(held_msg)
+            elif event.is_pressed:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(pressed_msg)
+                self.press(key_code)
+                self.send()
+            else:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(released_msg)
+                self.release(key_code)
+                self.send()
+
+        return _handle_key_code
@@ -0,0 +1,513 @@
+"""
+Asynchronous report sending.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class _Paced(bytes):
+    """
+    A snapshot sent with wait=True, e.g. part of a macro. Paced snapshots are never merged or dropped, and don't count
+    towards max_depth, so a long macro doesn't push live key reports into the overflow path.
+    """
+
+    __slots__ = ()
+
+
+def _mergeable(prev, tail, snapshot, report_ids):
+    """
+    Check whether snapshot can replace tail in a queue without the host missing a transition.
+
+    :param prev: The snapshot before tail (queued or being written), or None.
+    :param tail: The last queued snapshot.
+    :param snapshot: The new snapshot.
+    :param report_ids: True if the first byte is a report ID.
+    """
+    if prev is None or not len(prev) == len(tail) == len(snapshot):
+        return False
+    if report_ids and not prev[0] == tail[0] == snapshot[0]:
+        return False
+
+    p = int.from_bytes(prev, "little")
+    t = int.from_bytes(tail, "little")
+    n = int.from_bytes(snapshot, "little")
+    # Not if some bit changed in the tail and changes back in the new snapshot.
+    return not (p ^ t) & (t ^ n)
+
+
+class ReportSender:
+    """
+    Queues report snapshots and writes them to a HidGadget from a dedicated thread.
+
+    A ReportSender has the same send_report() interface as HidGadget, so reports can be pointed at either. Input
+    handlers only pay for a copy and a queue append; a slow or stalled gadget no longer blocks them.
+
+    Snapshots are coalesced so the host never sees pointless duplicates. While there is room in the queue no transition
+    is lost, and when the queue is full the newest snapshot is only merged into the one before it if doing so doesn't
+    hide a bit that flips and flips back (e.g. a press followed by its release).
+
+    If the queue stays full for put_timeout (or the gadget has stalled), transitions are lost: the newest pending state
+    is overwritten so the host still ends up with the right keys held, and if the new snapshot undoes the pending one
+    (e.g. the release of a key whose press is still queued) the press and release are both dropped. Either way the
+    dropped counter goes up.
+    """
+
+    def __init__(self, gadget, max_depth=64, put_timeout=0.05, report_ids=False, stall_time=0.1):
+        """
+        Start a sender for a gadget.
+
+        :param gadget: HidGadget to write to.
+        :param max_depth: Maximum number of snapshots waiting to be written.
+        :param put_timeout: How long (in seconds) send_report may block when the queue is full and the snapshot can't
+            be merged. After this the newest pending state is overwritten and counted as dropped. Not waited for once
+            the gadget has stalled.
+        :param report_ids: True if the first byte of every report is a report ID. Snapshots with different IDs are
+            never merged.
+        :param stall_time: How long (in seconds) the gadget has to keep refusing a report before the sender counts as
+            stalled, i.e. the host has stopped reading this interface.
+        """
+        self.gadget = gadget
+        self.max_depth = max_depth
+        self.put_timeout = put_timeout
+        self.report_ids = report_ids
+        self.stall_time = stall_time
+
+        # Optional functions called (on the sender thread, with no arguments) when the gadget starts refusing reports,
+        # when it has refused them for stall_time, and when it accepts one again afterwards.
+        self.on_refuse = None
+        self.on_stall = None
+        self.on_resume = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self.merged = 0
+        # Snapshots that overwrote or cancelled a pending one on a full queue, each losing at least one transition.
+        self.dropped = 0
+        self.retries = 0
+        self.max_seen_depth = 0
+
+        self._queue = collections.deque()
+        self._live = 0
+        self._cond = threading.Condition()
+        self._tail = None
+        self._in_flight = None
+        self._stalled_since = None
+        self._resets = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="hid-sender", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        """
+        Number of snapshots waiting to be written.
+        """
+        return len(self._queue)
+
+    @property
+    def stalled(self):
+        """
+        True if the gadget has been refusing reports for at least stall_time.
+        """
+        since = self._stalled_since
+        return since is not None and time.monotonic() - since >= self.stall_time
+
+    @property
+    def refusing(self):
+        """
+        True if the gadget refused the last report it was given (after waiting its write_timeout), stalled or not.
+        """
+        return self._stalled_since is not None
+
+    def send_report(self, report_bytes, wait=False):
+        """
+        Queue a snapshot of a report to be sent.
+
+        :param report_bytes: Report data. It is copied, so the caller can keep modifying its buffer.
+        :param wait: If True, never merge or drop this snapshot, and wait for room however long it takes if there are
+            already max_depth such snapshots queued. For senders of long report sequences, like macros, that are happy
+            to be paced by the host. These are counted separately from other snapshots, so they don't fill the queue up
+            for live key reports.
+        :return: True. Write errors are handled on the sender thread.
+        """
+        snapshot = _Paced(report_bytes) if wait else bytes(report_bytes)
+        with self._cond:
+            if snapshot == self._tail:
+                self.coalesced += 1
+                return True
+
+            if wait:
+                self._cond.wait_for(lambda: len(self._queue) - self._live < self.max_depth or not self._running)
+            elif self._full():
+                if self._try_merge(snapshot):
+                    return True
+                if not self.stalled:
+                    self._cond.wait_for(lambda: not self._full(), self.put_timeout)
+                if self._full():
+                    # The gadget has stalled. Keep the newest state so the host ends up with the right keys held.
+                    self.dropped += 1
+                    prev = self._queue[-2] if len(self._queue) > 1 else self._in_flight
+                    if snapshot == prev:
+                        # The tail's change was undone before it went out, so both are lost. Writing the state before
+                        # it twice would only waste a report.
+                        self._queue.pop()
+                        self._live -= 1
+                        self._tail = snapshot
+                    else:
+                        self._queue[-1] = snapshot
+                        self._tail = snapshot
+                    return True
+
+            self._queue.append(snapshot)
+            if not wait:
+                self._live += 1
+            self._tail = snapshot
+            if len(self._queue) > self.max_seen_depth:
+                self.max_seen_depth = len(self._queue)
+            self._cond.notify_all()
+        return True
+
+    def reset(self, snapshot):
+        """
+        Replace everything waiting to be written, including a snapshot the gadget keeps refusing, with one snapshot.
+
+        For a stalled gadget whose host has moved on (e.g. to the boot keyboard interface): when it starts reading
+        again it gets this snapshot, typically all keys up, instead of stale key presses. Discarded snapshots are
+        counted as dropped.
+
+        :param snapshot: Report data.
+        """
+        snapshot = bytes(snapshot)
+        with self._cond:
+            self.dropped += len(self._queue) + (self._in_flight is not None)
+            self._queue.clear()
+            self._queue.append(snapshot)
+            self._live = 1
+            self._tail = snapshot
+            self._resets += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued snapshot has been written.
+
+        :param timeout: Optional timeout in seconds.
+        :return: True if the queue drained, False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and self._in_flight is None, timeout)
+
+    def stop(self, timeout=1.0):
+        """
+        Write out anything pending, then stop the sender thread.
+
+        :param timeout: How long to wait for the queue to drain.
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _full(self):
+        # Paced snapshots can't be merged into or overwritten, so a queue ending in one is never full.
+        return self._live >= self.max_depth and not isinstance(self._queue[-1], _Paced)
+
+    def _try_merge(self, snapshot):
+        prev = self._queue[-2] if len(self._queue) > 1 else self._in_flight
+        if not _mergeable(prev, self._queue[-1], snapshot, self.report_ids):
+            return False
+
+        self._queue[-1] = snapshot
+        self._tail = snapshot
+        self.merged += 1
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    return
+                snapshot = self._in_flight = self._queue.popleft()
+                if not isinstance(snapshot, _Paced):
+                    self._live -= 1
+                resets = self._resets
+                self._cond.notify_all()
+
+            resumed = False
+            try:
+                while not self.gadget.send_report(snapshot):
+                    self.retries += 1
+                    if self._stalled_since is None:
+                        self._stalled_since = time.monotonic()
+                        stall_reported = False
+                        self._callback(self.on_refuse)
+                    if not stall_reported and self.stalled:
+                        stall_reported = True
+                        self._callback(self.on_stall)
+                    if not self._running or self._resets != resets:
+                        # Stopping, or reset() threw this snapshot away.
+                        break
+                else:
+                    self.sent += 1
+                    if self._stalled_since is not None:
+                        resumed = True
+                        self._stalled_since = None
+            except OSError as ex:
+                log.error("HID write failed: %s", ex)
+
+            if resumed:
+                self._callback(self.on_resume)
+
+            with self._cond:
+                self._in_flight = None
+                self._cond.notify_all()
+
+    def _callback(self, fn):
+        if fn is not None:
+            try:
+                fn()
+            except Exception:
+                log.exception("Sender callback failed")
+
+
+class LoopSender:
+    """
+    ReportSender for an asyncio event loop: queues report snapshots and writes them to a non-blocking HidGadget
+    without a thread.
+
+    A snapshot is written straight away if nothing is queued. If the gadget refuses it (the host hasn't read the last
+    report yet), it is queued and the rest of the queue is written when the loop sees the gadget's device become
+    writable, so nothing ever waits on the loop. Queueing, coalescing and merging work as in ReportSender, and so does
+    losing transitions once the queue is full, except that there is no put_timeout to wait out first.
+
+    Must only be used from the loop's thread.
+    """
+
+    def __init__(self, gadget, loop, max_depth=64, report_ids=False, stall_time=0.1, refuse_time=0.01,
+                 retry_interval=0.001):
+        """
+        Set up a sender for a gadget.
+
+        :param gadget: HidGadget to write to, created with write_timeout=0 so writes never block.
+        :param loop: asyncio event loop to wait for the gadget on.
+        :param max_depth: Maximum number of snapshots waiting to be written. Past this, snapshots are merged or the
+            newest pending one is overwritten. Snapshots sent with wait=True don't count.
+        :param report_ids: True if the first byte of every report is a report ID.
+        :param stall_time: How long (in seconds) the gadget has to keep refusing a report before the sender counts as
+            stalled.
+        :param refuse_time: How long (in seconds) a report has to wait before the sender counts as refusing. A host
+            that is reading the interface picks reports up within its poll interval, so this is a wait of more than a
+            few polls. Like HidGadget's write_timeout, which ReportSender relies on instead.
+        :param retry_interval: How often to retry a refused write, for gadgets without a file descriptor to wait on.
+        """
+        self.gadget = gadget
+        self.loop = loop
+        self.max_depth = max_depth
+        self.report_ids = report_ids
+        self.stall_time = stall_time
+        self.refuse_time = refuse_time
+        self.retry_interval = retry_interval
+
+        self.sent = 0
+        self.coalesced = 0
+        self.merged = 0
+        # Snapshots that overwrote or cancelled a pending one on a full queue, each losing at least one transition.
+        self.dropped = 0
+        self.retries = 0
+        self.max_seen_depth = 0
+
+        # Optional functions called (on the loop, with no arguments) when the gadget starts refusing reports, i.e.
+        # once a report has waited refuse_time, when it has refused them for stall_time, and when it accepts one again
+        # afterwards.
+        self.on_refuse = None
+        self.on_stall = None
+        self.on_resume = None
+
+        self._queue = collections.deque()
+        self._live = 0
+        self._tail = None
+        self._last_sent = None
+        self._stalled_since = None
+        self._waiting_fd = None
+        self._retry = None
+        self._refuse_check = None
+        self._stall_check = None
+
+    @property
+    def depth(self):
+        """
+        Number of snapshots waiting to be written.
+        """
+        return len(self._queue)
+
+    @property
+    def stalled(self):
+        """
+        True if the gadget has been refusing reports for at least stall_time.
+        """
+        since = self._stalled_since
+        return since is not None and time.monotonic() - since >= self.stall_time
+
+    @property
+    def refusing(self):
+        """
+        True if the gadget has been refusing reports for at least refuse_time, stalled or not.
+        """
+        since = self._stalled_since
+        return since is not None and time.monotonic() - since >= self.refuse_time
+
+    def send_report(self, report_bytes, wait=False):
+        """
+        Write a snapshot of a report, or queue it if the gadget isn't ready.
+
+        :param report_bytes: Report data. It is copied, so the caller can keep modifying its buffer.
+        :param wait: If True, never merge or drop this snapshot, however long the queue gets. For finite sequences,
+            like macros. These don't count towards max_depth, so they don't fill the queue up for live key reports.
+        :return: True. Write errors are logged.
+        """
+        snapshot = _Paced(report_bytes) if wait else bytes(report_bytes)
+        if snapshot == self._tail:
+            self.coalesced += 1
+            return True
+
+        if not self._queue:
+            self._tail = snapshot
+            if self._write(snapshot):
+                return True
+            self._append(snapshot)
+            self._wait()
+        elif not wait and self._live >= self.max_depth and not isinstance(self._queue[-1], _Paced):
+            prev = self._queue[-2] if len(self._queue) > 1 else self._last_sent
+            if snapshot == prev:
+                # The tail's change was undone before it went out. Writing the state before it twice is pointless.
+                self.dropped += 1
+                self._queue.pop()
+                self._live -= 1
+                if not self._queue:
+                    self._unwait()
+            else:
+                if _mergeable(prev, self._queue[-1], snapshot, self.report_ids):
+                    self.merged += 1
+                else:
+                    self.dropped += 1
+                self._queue[-1] = snapshot
+            self._tail = snapshot
+        else:
+            self._append(snapshot)
+            self._tail = snapshot
+
+        if len(self._queue) > self.max_seen_depth:
+            self.max_seen_depth = len(self._queue)
+        return True
+
+    def reset(self, snapshot):
+        """
+        Replace everything waiting to be written with one snapshot. See ReportSender.reset().
+
+        :param snapshot: Report data.
+        """
+        snapshot = bytes(snapshot)
+        if not self._queue:
+            self.send_report(snapshot)
+            return
+        self.dropped += len(self._queue)
+        self._queue.clear()
+        self._queue.append(snapshot)
+        self._live = 1
+        self._tail = snapshot
+
+    def stop(self):
+        """
+        Stop waiting on the gadget. Anything still queued is dropped.
+        """
+        self._unwait()
+        self._queue.clear()
+        self._live = 0
+        self._cancel_checks()
+
+    def _write(self, snapshot):
+        try:
+            written = self.gadget.send_report(snapshot)
+        except OSError as ex:
+            log.error("HID write failed: %s", ex)
+            # Give up on this snapshot rather than retrying it forever.
+            return True
+
+        if not written:
+            self.retries += 1
+            if self._stalled_since is None:
+                self._stalled_since = time.monotonic()
+                self._refuse_check = self.loop.call_later(self.refuse_time, self._refused)
+                self._stall_check = self.loop.call_later(self.stall_time, self._stalled)
+            return False
+
+        self.sent += 1
+        self._last_sent = snapshot
+        if self._stalled_since is not None:
+            self._stalled_since = None
+            refused = self._refuse_check is None
+            # If it was picked up within refuse_time, the host is just polling: nothing to tell anyone.
+            self._cancel_checks()
+            if refused and self.on_resume is not None:
+                # Let the current write finish before the callback sends anything.
+                self.loop.call_soon(self.on_resume)
+        return True
+
+    def _refused(self):
+        self._refuse_check = None
+        if self.on_refuse is not None:
+            self.on_refuse()
+
+    def _stalled(self):
+        self._stall_check = None
+        if self.on_stall is not None:
+            self.on_stall()
+
+    def _cancel_checks(self):
+        for check in (self._refuse_check, self._stall_check):
+            if check is not None:
+                check.cancel()
+        self._refuse_check = None
+        self._stall_check = None
+
+    def _append(self, snapshot):
+        self._queue.append(snapshot)
+        if not isinstance(snapshot, _Paced):
+            self._live += 1
+
+    def _drain(self):
+        self._unwait()
+        while self._queue:
+            if not self._write(self._queue[0]):
+                self._wait()
+                return
+            if not isinstance(self._queue.popleft(), _Paced):
+                self._live -= 1
+
+    def _wait(self):
+        try:
+            fd = self.gadget.fileno()
+        except (AttributeError, OSError):
+            fd = None
+        if fd is None:
+            self._retry = self.loop.call_later(self.retry_interval, self._drain)
+        else:
+            self._waiting_fd = fd
+            self.loop.add_writer(fd, self._drain)
+            # Try again now and then anyway, in case the device is reopened (e.g. by a read) while we wait on it.
+            self._retry = self.loop.call_later(self.stall_time, self._drain)
+
+    def _unwait(self):
+        if self._waiting_fd is not None:
+            self.loop.remove_writer(self._waiting_fd)
+            self._waiting_fd = None
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
@@ -1,573 +1,736 @@
-class Keyboard:
-    usage_page = 0x07
+"""
+HID usage tables.
 
-    # UNDEF = 0x0001				# Page 0x07: Keyboard Error Roll Over
-    # UNDEF = 0x0002				# Page 0x07: Keyboard POST Fail
-    # UNDEF = 0x0003				# Page 0x07: Keyboard Error Undefined
-    KEY_A = 0x0004  # Page 0x07: Keyboard a and A
-    KEY_B = 0x0005  # Page 0x07: Keyboard b and B
-    KEY_C = 0x0006  # Page 0x07: Keyboard c and C
-    KEY_D = 0x0007  # Page 0x07: Keyboard d and D
-    KEY_E = 0x0008  # Page 0x07: Keyboard e and E
-    KEY_F = 0x0009  # Page 0x07: Keyboard f and F
-    KEY_G = 0x000A  # Page 0x07: Keyboard g and G
-    KEY_H = 0x000B  # Page 0x07: Keyboard h and H
-    KEY_I = 0x000C  # Page 0x07: Keyboard i and I
-    KEY_J = 0x000D  # Page 0x07: Keyboard j and J
-    KEY_K = 0x000E  # Page 0x07: Keyboard k and K
-    KEY_L = 0x000F  # Page 0x07: Keyboard l and L
-    KEY_M = 0x0010  # Page 0x07: Keyboard m and M
-    KEY_N = 0x0011  # Page 0x07: Keyboard n and N
-    KEY_O = 0x0012  # Page 0x07: Keyboard o and O
-    KEY_P = 0x0013  # Page 0x07: Keyboard p and P
-    KEY_Q = 0x0014  # Page 0x07: Keyboard q and Q
-    KEY_R = 0x0015  # Page 0x07: Keyboard r and R
-    KEY_S = 0x0016  # Page 0x07: Keyboard s and S
-    KEY_T = 0x0017  # Page 0x07: Keyboard t and T
-    KEY_U = 0x0018  # Page 0x07: Keyboard u and U
-    KEY_V = 0x0019  # Page 0x07: Keyboard v and V
-    KEY_W = 0x001A  # Page 0x07: Keyboard w and W
-    KEY_X = 0x001B  # Page 0x07: Keyboard x and X
-    KEY_Y = 0x001C  # Page 0x07: Keyboard y and Y
-    KEY_Z = 0x001D  # Page 0x07: Keyboard z and Z
-    KEY_1 = 0x001E  # Page 0x07: Keyboard 1 and !
-    KEY_2 = 0x001F  # Page 0x07: Keyboard 2 and @
-    KEY_3 = 0x0020  # Page 0x07: Keyboard 3 and #
-    KEY_4 = 0x0021  # Page 0x07: Keyboard 4 and $
-    KEY_5 = 0x0022  # Page 0x07: Keyboard 5 and %
-    KEY_6 = 0x0023  # Page 0x07: Keyboard 6 and ^
-    KEY_7 = 0x0024  # Page 0x07: Keyboard 7 and &
-    KEY_8 = 0x0025  # Page 0x07: Keyboard 8 and *
-    KEY_9 = 0x0026  # Page 0x07: Keyboard 9 and (
-    KEY_0 = 0x0027  # Page 0x07: Keyboard 0 and )
-    KEY_ENTER = 0x0028  # Page 0x07: Keyboard Return (ENTER)
-    KEY_ESC = 0x0029  # Page 0x07: Keyboard ESCAPE
-    KEY_BACKSPACE = 0x002A  # Page 0x07: Keyboard DELETE (Backspace)
-    KEY_TAB = 0x002B  # Page 0x07: Keyboard Tab
-    KEY_SPACE = 0x002C  # Page 0x07: Keyboard Spacebar
-    KEY_MINUS = 0x002D  # Page 0x07: Keyboard - and _
-    KEY_EQUAL = 0x002E  # Page 0x07: Keyboard = and +
-    KEY_LEFTBRACE = 0x002F  # Page 0x07: Keyboard [ and {
-    KEY_RIGHTBRACE = 0x0030  # Page 0x07: Keyboard ] and }
-    KEY_BACKSLASH = 0x0031  # Page 0x07: Keyboard \ and |
-    KEY_BACKSLASH = 0x0032  # Page 0x07: Keyboard Non-US # and ~
-    KEY_SEMICOLON = 0x0033  # Page 0x07: Keyboard ; and :
-    KEY_APOSTROPHE = 0x0034  # Page 0x07: "Keyboard ' and """
-    KEY_GRAVE = 0x0035  # Page 0x07: Keyboard ` and ~
-    KEY_COMMA = 0x0036  # Page 0x07: "Keyboard , and <"
-    KEY_DOT = 0x0037  # Page 0x07: Keyboard . and >
-    KEY_SLASH = 0x0038  # Page 0x07: Keyboard / and ?
-    KEY_CAPSLOCK = 0x0039  # Page 0x07: Keyboard Caps Lock
-    KEY_F1 = 0x003A  # Page 0x07: Keyboard F1
-    KEY_F2 = 0x003B  # Page 0x07: Keyboard F2
-    KEY_F3 = 0x003C  # Page 0x07: Keyboard F3
-    KEY_F4 = 0x003D  # Page 0x07: Keyboard F4
-    KEY_F5 = 0x003E  # Page 0x07: Keyboard F5
-    KEY_F6 = 0x003F  # Page 0x07: Keyboard F6
-    KEY_F7 = 0x0040  # Page 0x07: Keyboard F7
-    KEY_F8 = 0x0041  # Page 0x07: Keyboard F8
-    KEY_F9 = 0x0042  # Page 0x07: Keyboard F9
-    KEY_F10 = 0x0043  # Page 0x07: Keyboard F10
-    KEY_F11 = 0x0044  # Page 0x07: Keyboard F11
-    KEY_F12 = 0x0045  # Page 0x07: Keyboard F12
-    KEY_SYSRQ = 0x0046  # Page 0x07: Keyboard Print Screen
-    KEY_SCROLLLOCK = 0x0047  # Page 0x07: Keyboard Scroll Lock
-    KEY_PAUSE = 0x0048  # Page 0x07: Keyboard Pause
-    KEY_INSERT = 0x0049  # Page 0x07: Keyboard Insert
-    KEY_HOME = 0x004A  # Page 0x07: Keyboard Home
-    KEY_PAGEUP = 0x004B  # Page 0x07: Keyboard Page Up
-    KEY_DELETE = 0x004C  # Page 0x07: Keyboard Delete Forward
-    KEY_END = 0x004D  # Page 0x07: Keyboard End
-    KEY_PAGEDOWN = 0x004E  # Page 0x07: Keyboard Page Down
-    KEY_RIGHT = 0x004F  # Page 0x07: Keyboard Right Arrow
-    KEY_LEFT = 0x0050  # Page 0x07: Keyboard Left Arrow
-    KEY_DOWN = 0x0051  # Page 0x07: Keyboard Down Arrow
-    KEY_UP = 0x0052  # Page 0x07: Keyboard Up Arrow
-    KEY_NUMLOCK = 0x0053  # Page 0x07: Keyboard Num Lock and Clear
-    KEY_KPSLASH = 0x0054  # Page 0x07: Keypad /
-    KEY_KPASTERISK = 0x0055  # Page 0x07: Keypad *
-    KEY_KPMINUS = 0x0056  # Page 0x07: Keypad -
-    KEY_KPPLUS = 0x0057  # Page 0x07: Keypad +
-    KEY_KPENTER = 0x0058  # Page 0x07: Keypad ENTER
-    KEY_KP1 = 0x0059  # Page 0x07: Keypad 1 and End
-    KEY_KP2 = 0x005A  # Page 0x07: Keypad 2 and Down Arrow
-    KEY_KP3 = 0x005B  # Page 0x07: Keypad 3 and PageDn
-    KEY_KP4 = 0x005C  # Page 0x07: Keypad 4 and Left Arrow
-    KEY_KP5 = 0x005D  # Page 0x07: Keypad 5
-    KEY_KP6 = 0x005E  # Page 0x07: Keypad 6 and Right Arrow
-    KEY_KP7 = 0x005F  # Page 0x07: Keypad 7 and Home
-    KEY_KP8 = 0x0060  # Page 0x07: Keypad 8 and Up Arrow
-    KEY_KP9 = 0x0061  # Page 0x07: Keypad 9 and Page Up
-    KEY_KP0 = 0x0062  # Page 0x07: Keypad 0 and Insert
-    KEY_KPDOT = 0x0063  # Page 0x07: Keypad . and Delete
-    KEY_102ND = 0x0064  # Page 0x07: Keyboard Non-US \ and |
-    KEY_COMPOSE = 0x0065  # Page 0x07: Keyboard Application
-    KEY_POWER = 0x0066  # Page 0x07: Keyboard Power
-    KEY_KPEQUAL = 0x0067  # Page 0x07: Keypad =
-    KEY_F13 = 0x0068  # Page 0x07: Keyboard F13
-    KEY_F14 = 0x0069  # Page 0x07: Keyboard F14
-    KEY_F15 = 0x006A  # Page 0x07: Keyboard F15
-    KEY_F16 = 0x006B  # Page 0x07: Keyboard F16
-    KEY_F17 = 0x006C  # Page 0x07: Keyboard F17
-    KEY_F18 = 0x006D  # Page 0x07: Keyboard F18
-    KEY_F19 = 0x006E  # Page 0x07: Keyboard F19
-    KEY_F20 = 0x006F  # Page 0x07: Keyboard F20
-    KEY_F21 = 0x0070  # Page 0x07: Keyboard F21
-    KEY_F22 = 0x0071  # Page 0x07: Keyboard F22
-    KEY_F23 = 0x0072  # Page 0x07: Keyboard F23
-    KEY_F24 = 0x0073  # Page 0x07: Keyboard F24
-    KEY_OPEN = 0x0074  # Page 0x07: Keyboard Execute
-    KEY_HELP = 0x0075  # Page 0x07: Keyboard Help
-    KEY_PROPS = 0x0076  # Page 0x07: Keyboard Menu
-    KEY_FRONT = 0x0077  # Page 0x07: Keyboard Select
-    KEY_STOP = 0x0078  # Page 0x07: Keyboard Stop
-    KEY_AGAIN = 0x0079  # Page 0x07: Keyboard Again
-    KEY_UNDO = 0x007A  # Page 0x07: Keyboard Undo
-    KEY_CUT = 0x007B  # Page 0x07: Keyboard Cut
-    KEY_COPY = 0x007C  # Page 0x07: Keyboard Copy
-    KEY_PASTE = 0x007D  # Page 0x07: Keyboard Paste
-    KEY_FIND = 0x007E  # Page 0x07: Keyboard Find
-    KEY_MUTE = 0x007F  # Page 0x07: Keyboard Mute
-    KEY_VOLUMEUP = 0x0080  # Page 0x07: Keyboard Volume Up
-    KEY_VOLUMEDOWN = 0x0081  # Page 0x07: Keyboard Volume Down
-    # UNDEF = 0x0082				# Page 0x07: Keyboard Locking Caps Lock
-    # UNDEF = 0x0083				# Page 0x07: Keyboard Locking Num Lock
-    # UNDEF = 0x0084				# Page 0x07: Keyboard Locking Scroll Lock
-    KEY_KPCOMMA = 0x0085  # Page 0x07: Keypad Comma
-    # UNDEF = 0x0086				# Page 0x07: Keypad Equal Sign
-    KEY_RO = 0x0087  # Page 0x07: Keyboard International1
-    KEY_KATAKANAHIRAGANA = 0x0088  # Page 0x07: Keyboard International2
-    KEY_YEN = 0x0089  # Page 0x07: Keyboard International3
-    KEY_HENKAN = 0x008A  # Page 0x07: Keyboard International4
-    KEY_MUHENKAN = 0x008B  # Page 0x07: Keyboard International5
-    KEY_KPJPCOMMA = 0x008C  # Page 0x07: Keyboard International6
-    # UNDEF = 0x008d				# Page 0x07: Keyboard International7
-    # UNDEF = 0x008e				# Page 0x07: Keyboard International8
-    # UNDEF = 0x008f				# Page 0x07: Keyboard International9
-    KEY_HANGEUL = 0x0090  # Page 0x07: Keyboard LANG1
-    KEY_HANJA = 0x0091  # Page 0x07: Keyboard LANG2
-    KEY_KATAKANA = 0x0092  # Page 0x07: Keyboard LANG3
-    KEY_HIRAGANA = 0x0093  # Page 0x07: Keyboard LANG4
-    KEY_ZENKAKUHANKAKU = 0x0094  # Page 0x07: Keyboard LANG5
-    # UNDEF = 0x0095				# Page 0x07: Keyboard LANG6
-    # UNDEF = 0x0096				# Page 0x07: Keyboard LANG7
-    # UNDEF = 0x0097				# Page 0x07: Keyboard LANG8
-    # UNDEF = 0x0098				# Page 0x07: Keyboard LANG9
-    # UNDEF = 0x0099				# Page 0x07: Keyboard Alternate Erase
-    # UNDEF = 0x009a				# Page 0x07: Keyboard SysReq/Attention
-    # UNDEF = 0x009b				# Page 0x07: Keyboard Cancel
-    # UNDEF = 0x009c				# Page 0x07: Keyboard Clear
-    # UNDEF = 0x009d				# Page 0x07: Keyboard Prior
-    # UNDEF = 0x009e				# Page 0x07: Keyboard Return
-    # UNDEF = 0x009f				# Page 0x07: Keyboard Separator
-    # UNDEF = 0x00a0				# Page 0x07: Keyboard Out
-    # UNDEF = 0x00a1				# Page 0x07: Keyboard Oper
-    # UNDEF = 0x00a2				# Page 0x07: Keyboard Clear/Again
-    # UNDEF = 0x00a3				# Page 0x07: Keyboard CrSel/Props
-    # UNDEF = 0x00a4				# Page 0x07: Keyboard ExSel
-    # UNDEF = 0x00b0				# Page 0x07: Keypad 00
-    # UNDEF = 0x00b1				# Page 0x07: Keypad 000
-    # UNDEF = 0x00b2				# Page 0x07: Thousands Separator
-    # UNDEF = 0x00b3				# Page 0x07: Decimal Separator
-    # UNDEF = 0x00b4				# Page 0x07: Currency Unit
-    # UNDEF = 0x00b5				# Page 0x07: Currency Sub-unit
-    KEY_KPLEFTPAREN = 0x00B6  # Page 0x07: Keypad (
-    KEY_KPRIGHTPAREN = 0x00B7  # Page 0x07: Keypad )
-    # UNDEF = 0x00b8				# Page 0x07: Keypad {
-    # UNDEF = 0x00b9				# Page 0x07: Keypad }
-    # UNDEF = 0x00ba				# Page 0x07: Keypad Tab
-    # UNDEF = 0x00bb				# Page 0x07: Keypad Backspace
-    # UNDEF = 0x00bc				# Page 0x07: Keypad A
-    # UNDEF = 0x00bd				# Page 0x07: Keypad B
-    # UNDEF = 0x00be				# Page 0x07: Keypad C
-    # UNDEF = 0x00bf				# Page 0x07: Keypad D
-    # UNDEF = 0x00c0				# Page 0x07: Keypad E
-    # UNDEF = 0x00c1				# Page 0x07: Keypad F
-    # UNDEF = 0x00c2				# Page 0x07: Keypad XOR
-    # UNDEF = 0x00c3				# Page 0x07: Keypad ^
-    # UNDEF = 0x00c4				# Page 0x07: Keypad %
-    # UNDEF = 0x00c5				# Page 0x07: Keypad <
-    # UNDEF = 0x00c6				# Page 0x07: Keypad >
-    # UNDEF = 0x00c7				# Page 0x07: Keypad &
-    # UNDEF = 0x00c8				# Page 0x07: Keypad &&
-    # UNDEF = 0x00c9				# Page 0x07: Keypad |
-    # UNDEF = 0x00ca				# Page 0x07: Keypad ||
-    # UNDEF = 0x00cb				# Page 0x07: Keypad :
-    # UNDEF = 0x00cc				# Page 0x07: Keypad #
-    # UNDEF = 0x00cd				# Page 0x07: Keypad Space
-    # UNDEF = 0x00ce				# Page 0x07: Keypad @
-    # UNDEF = 0x00cf				# Page 0x07: Keypad !
-    # UNDEF = 0x00d0				# Page 0x07: Keypad Memory Store
-    # UNDEF = 0x00d1				# Page 0x07: Keypad Memory Recall
-    # UNDEF = 0x00d2				# Page 0x07: Keypad Memory Clear
-    # UNDEF = 0x00d3				# Page 0x07: Keypad Memory Add
-    # UNDEF = 0x00d4				# Page 0x07: Keypad Memory Subtract
-    # UNDEF = 0x00d5				# Page 0x07: Keypad Memory Multiply
-    # UNDEF = 0x00d6				# Page 0x07: Keypad Memory Divide
-    # UNDEF = 0x00d7				# Page 0x07: Keypad +/-
-    # UNDEF = 0x00d8				# Page 0x07: Keypad Clear
-    # UNDEF = 0x00d9				# Page 0x07: Keypad Clear Entry
-    # UNDEF = 0x00da				# Page 0x07: Keypad Binary
-    # UNDEF = 0x00db				# Page 0x07: Keypad Octal
-    # UNDEF = 0x00dc				# Page 0x07: Keypad Decimal
-    # UNDEF = 0x00dd				# Page 0x07: Keypad Hexadecimal
-    KEY_LEFTCTRL = 0x00E0  # Page 0x07: Keyboard Left Control
-    KEY_LEFTSHIFT = 0x00E1  # Page 0x07: Keyboard Left Shift
-    KEY_LEFTALT = 0x00E2  # Page 0x07: Keyboard Left Alt
-    KEY_LEFTMETA = 0x00E3  # Page 0x07: Keyboard Left GUI
-    KEY_RIGHTCTRL = 0x00E4  # Page 0x07: Keyboard Right Control
-    KEY_RIGHTSHIFT = 0x00E5  # Page 0x07: Keyboard Right Shift
-    KEY_RIGHTALT = 0x00E6  # Page 0x07: Keyboard Right Alt
-    KEY_RIGHTMETA = 0x00E7  # Page 0x07: Keyboard Right GUI
-    KEY_PLAYPAUSE = 0x00E8  # Page 0x07:
-    KEY_STOPCD = 0x00E9  # Page 0x07:
-    KEY_PREVIOUSSONG = 0x00EA  # Page 0x07:
-    KEY_NEXTSONG = 0x00EB  # Page 0x07:
-    KEY_EJECTCD = 0x00EC  # Page 0x07:
-    KEY_VOLUMEUP = 0x00ED  # Page 0x07:
-    KEY_VOLUMEDOWN = 0x00EE  # Page 0x07:
-    KEY_MUTE = 0x00EF  # Page 0x07:
-    KEY_WWW = 0x00F0  # Page 0x07:
-    KEY_BACK = 0x00F1  # Page 0x07:
-    KEY_FORWARD = 0x00F2  # Page 0x07:
-    KEY_STOP = 0x00F3  # Page 0x07:
-    KEY_FIND = 0x00F4  # Page 0x07:
-    KEY_SCROLLUP = 0x00F5  # Page 0x07:
-    KEY_SCROLLDOWN = 0x00F6  # Page 0x07:
-    KEY_EDIT = 0x00F7  # Page 0x07:
-    KEY_SLEEP = 0x00F8  # Page 0x07:
-    KEY_COFFEE = 0x00F9  # Page 0x07:
-    KEY_REFRESH = 0x00FA  # Page 0x07:
-    KEY_CALC = 0x00FB  # Page 0x07:
+Each usage page is a UsagePage. Usages are attributes of their page, as they always were, and can also be looked up
+by name or by code, e.g. for logging:
 
+    Keyboard.KEY_A              # 0x04
+    Keyboard.code("KEY_A")      # 0x04
+    Keyboard.name(0x04)         # "KEY_A"
+    Keyboard.description(0x04)  # "Keyboard a and A"
 
-class GenericDesktop:
-    usage_page = 0x01
+The tables below are one usage per line: code (hex), name ("-" for usages without one) and description. A page's
+table is only parsed the first time one of its usages is looked up, into a sorted array of codes plus an index of
+names, so importing this module costs almost nothing.
+"""
 
-    KEY_POWER = 0x0081  # Page 0x01: System Power Down
-    KEY_SLEEP = 0x0082  # Page 0x01: System Sleep
-    KEY_WAKEUP = 0x0083  # Page 0x01: System Wake Up
-    # UNDEF = 0x0084				# Page 0x01: System Context Menu
-    # UNDEF = 0x0085				# Page 0x01: System Main Menu
-    # UNDEF = 0x0086				# Page 0x01: System App Menu
-    # UNDEF = 0x0087				# Page 0x01: System Menu Help
-    # UNDEF = 0x0088				# Page 0x01: System Menu Exit
-    # UNDEF = 0x0089				# Page 0x01: System Menu Select
-    # UNDEF = 0x008a				# Page 0x01: System Menu Right
-    # UNDEF = 0x008b				# Page 0x01: System Menu Left
-    # UNDEF = 0x008c				# Page 0x01: System Menu Up
-    # UNDEF = 0x008d				# Page 0x01: System Menu Down
-    # UNDEF = 0x008e				# Page 0x01: System Cold Restart
-    # UNDEF = 0x008f				# Page 0x01: System Warm Restart
-    # UNDEF = 0x00a0				# Page 0x01: System Dock
-    # UNDEF = 0x00a1				# Page 0x01: System Undock
-    # UNDEF = 0x00a2				# Page 0x01: System Setup
-    # UNDEF = 0x00a3				# Page 0x01: System Break
-    # UNDEF = 0x00a4				# Page 0x01: System Debugger Break
-    # UNDEF = 0x00a5				# Page 0x01: Application Break
-    # UNDEF = 0x00a6				# Page 0x01: Application Debugger Break
-    # UNDEF = 0x00a7				# Page 0x01: System Speaker Mute
-    # UNDEF = 0x00a8				# Page 0x01: System Hibernate
-    # UNDEF = 0x00b0				# Page 0x01: System Display Invert
-    # UNDEF = 0x00b1				# Page 0x01: System Display Internal
-    # UNDEF = 0x00b2				# Page 0x01: System Display External
-    # UNDEF = 0x00b3				# Page 0x01: System Display Both
-    # UNDEF = 0x00b4				# Page 0x01: System Display Dual
-    # UNDEF = 0x00b5				# Page 0x01: System Display Toggle Int/Ext
-    # UNDEF = 0x00b6				# Page 0x01: System Display Swap Prim./Sec.
-    # UNDEF = 0x00b7				# Page 0x01: System Display LCD Autoscale
+import array
+import bisect
 
 
-class Consumer:
-    usage_page = 0x0C
+class UsagePage:
+    """
+    The usages on one HID usage page.
+    """
 
-    # UNDEF = 0x0030				# Page 0x0c: Power
-    # UNDEF = 0x0031				# Page 0x0c: Reset
-    # UNDEF = 0x0032				# Page 0x0c: Sleep
-    # UNDEF = 0x0033				# Page 0x0c: Sleep After
-    KEY_SLEEP = 0x0034  # Page 0x0c: Sleep Mode
-    KEY_MENU = 0x0040  # Page 0x0c: Menu
-    # UNDEF = 0x0041				# Page 0x0c: Menu Pick
-    # UNDEF = 0x0042				# Page 0x0c: Menu Up
-    # UNDEF = 0x0043				# Page 0x0c: Menu Down
-    # UNDEF = 0x0044				# Page 0x0c: Menu Left
-    KEY_RIGHT = 0x0045  # Page 0x0c: Menu Right
-    # UNDEF = 0x0046				# Page 0x0c: Menu Escape
-    # UNDEF = 0x0047				# Page 0x0c: Menu Value Increase
-    # UNDEF = 0x0048				# Page 0x0c: Menu Value Decrease
-    # UNDEF = 0x0081				# Page 0x0c: Assign Selection
-    # UNDEF = 0x0082				# Page 0x0c: Mode Step
-    KEY_LAST = 0x0083  # Page 0x0c: Recall Last
-    # UNDEF = 0x0084				# Page 0x0c: Enter Channel
-    # UNDEF = 0x0085				# Page 0x0c: Order Movie
-    KEY_PC = 0x0088  # Page 0x0c: Media Select Computer
-    KEY_TV = 0x0089  # Page 0x0c: Media Select TV
-    # KEY_WWW = 0x008a				# Page 0x0c: Media Select WWW
-    KEY_DVD = 0x008B  # Page 0x0c: Media Select DVD
-    KEY_PHONE = 0x008C  # Page 0x0c: Media Select Telephone
-    KEY_PROGRAM = 0x008D  # Page 0x0c: Media Select Program Guide
-    KEY_VIDEOPHONE = 0x008E  # Page 0x0c: Media Select Video Phone
-    KEY_GAMES = 0x008F  # Page 0x0c: Media Select Games
-    KEY_MEMO = 0x0090  # Page 0x0c: Media Select Messages
-    KEY_CD = 0x0091  # Page 0x0c: Media Select CD
-    KEY_VCR = 0x0092  # Page 0x0c: Media Select VCR
-    KEY_TUNER = 0x0093  # Page 0x0c: Media Select Tuner
-    KEY_QUIT = 0x0094  # Page 0x0c: Quit
-    KEY_HELP = 0x0095  # Page 0x0c: Help
-    KEY_TAPE = 0x0096  # Page 0x0c: Media Select Tape
-    KEY_TV2 = 0x0097  # Page 0x0c: Media Select Cable
-    KEY_SAT = 0x0098  # Page 0x0c: Media Select Satellite
-    # UNDEF = 0x0099				# Page 0x0c: Media Select Security
-    KEY_PVR = 0x009A  # Page 0x0c: Media Select Home
-    KEY_CHANNELUP = 0x009C  # Page 0x0c: Channel Increment
-    KEY_CHANNELDOWN = 0x009D  # Page 0x0c: Channel Decrement
-    # UNDEF = 0x009e				# Page 0x0c: Media Select SAP
-    KEY_VCR2 = 0x00A0  # Page 0x0c: VCR Plus
-    # UNDEF = 0x00a1				# Page 0x0c: Once
-    # UNDEF = 0x00a2				# Page 0x0c: Daily
-    # UNDEF = 0x00a3				# Page 0x0c: Weekly
-    # UNDEF = 0x00a4				# Page 0x0c: Monthly
-    KEY_PLAY = 0x00B0  # Page 0x0c: Play
-    KEY_PAUSE = 0x00B1  # Page 0x0c: Pause
-    KEY_RECORD = 0x00B2  # Page 0x0c: Record
-    KEY_FASTFORWARD = 0x00B3  # Page 0x0c: Fast Forward
-    KEY_REWIND = 0x00B4  # Page 0x0c: Rewind
-    KEY_NEXTSONG = 0x00B5  # Page 0x0c: Scan Next Track
-    KEY_PREVIOUSSONG = 0x00B6  # Page 0x0c: Scan Previous Track
-    KEY_STOPCD = 0x00B7  # Page 0x0c: Stop
-    KEY_EJECTCD = 0x00B8  # Page 0x0c: Eject
-    # UNDEF = 0x00b9				# Page 0x0c: Random Play
-    # UNDEF = 0x00ba				# Page 0x0c: Select Disc
-    # UNDEF = 0x00bb				# Page 0x0c: Enter Disc
-    KEY_MEDIA_REPEAT = 0x00BC  # Page 0x0c: Repeat
-    # UNDEF = 0x00be				# Page 0x0c: Track Normal
-    # UNDEF = 0x00c0				# Page 0x0c: Frame Forward
-    # UNDEF = 0x00c1				# Page 0x0c: Frame Back
-    # UNDEF = 0x00c2				# Page 0x0c: Mark
-    # UNDEF = 0x00c3				# Page 0x0c: Clear Mark
-    # UNDEF = 0x00c4				# Page 0x0c: Repeat From Mark
-    # UNDEF = 0x00c5				# Page 0x0c: Return To Mark
-    # UNDEF = 0x00c6				# Page 0x0c: Search Mark Forward
-    # UNDEF = 0x00c7				# Page 0x0c: Search Mark Backwards
-    # UNDEF = 0x00c8				# Page 0x0c: Counter Reset
-    # UNDEF = 0x00c9				# Page 0x0c: Show Counter
-    # UNDEF = 0x00ca				# Page 0x0c: Tracking Increment
-    # UNDEF = 0x00cb				# Page 0x0c: Tracking Decrement
-    # UNDEF = 0x00cc				# Page 0x0c: Stop / Eject
-    KEY_PLAYPAUSE = 0x00CD  # Page 0x0c: Play / Pause
-    # UNDEF = 0x00ce				# Page 0x0c: Play / Skip
-    KEY_MUTE = 0x00E2  # Page 0x0c: Mute
-    KEY_BASSBOOST = 0x00E5  # Page 0x0c: Bass Boost
-    # UNDEF = 0x00e6				# Page 0x0c: Surround Mode
-    # UNDEF = 0x00e7				# Page 0x0c: Loudness
-    # UNDEF = 0x00e8				# Page 0x0c: MPX
-    KEY_VOLUMEUP = 0x00E9  # Page 0x0c: Volume Increment
-    KEY_VOLUMEDOWN = 0x00EA  # Page 0x0c: Volume Decrement
-    # UNDEF = 0x0181				# Page 0x0c: AL Launch Button Config. Tool
-    # KEY_BOOKMARKS = 0x0182			# Page 0x0c: AL Programmable Button Config.
-    KEY_CONFIG = 0x0183  # Page 0x0c: AL Consumer Control Config.
-    KEY_WORDPROCESSOR = 0x0184  # Page 0x0c: AL Word Processor
-    KEY_EDITOR = 0x0185  # Page 0x0c: AL Text Editor
-    KEY_SPREADSHEET = 0x0186  # Page 0x0c: AL Spreadsheet
-    KEY_GRAPHICSEDITOR = 0x0187  # Page 0x0c: AL Graphics Editor
-    KEY_PRESENTATION = 0x0188  # Page 0x0c: AL Presentation App
-    KEY_DATABASE = 0x0189  # Page 0x0c: AL Database App
-    KEY_MAIL = 0x018A  # Page 0x0c: AL Email Reader
-    KEY_NEWS = 0x018B  # Page 0x0c: AL Newsreader
-    KEY_VOICEMAIL = 0x018C  # Page 0x0c: AL Voicemail
-    KEY_ADDRESSBOOK = 0x018D  # Page 0x0c: AL Contacts / Address Book
-    KEY_CALENDAR = 0x018E  # Page 0x0c: AL Calendar / Schedule
-    # UNDEF = 0x018f				# Page 0x0c: AL Task / Project Manager
-    # UNDEF = 0x0190				# Page 0x0c: AL Log / Journal / Timecard
-    KEY_FINANCE = 0x0191  # Page 0x0c: AL Checkbook / Finance
-    KEY_CALC = 0x0192  # Page 0x0c: AL Calculator
-    # UNDEF = 0x0193				# Page 0x0c: AL A/V Capture / Playback
-    KEY_FILE = 0x0194  # Page 0x0c: AL Local Machine Browser
-    # UNDEF = 0x0195				# Page 0x0c: AL LAN/WAN Browser
-    KEY_WWW = 0x0196  # Page 0x0c: AL Internet Browser
-    # UNDEF = 0x0197				# Page 0x0c: AL Remote Networking/ISP Connect
-    # UNDEF = 0x0198				# Page 0x0c: AL Network Conference
-    KEY_CHAT = 0x0199  # Page 0x0c: AL Network Chat
-    # UNDEF = 0x019a				# Page 0x0c: AL Telephony / Dialer
-    # UNDEF = 0x019b				# Page 0x0c: AL Logon
-    KEY_LOGOFF = 0x019C  # Page 0x0c: AL Logoff
-    # UNDEF = 0x019d				# Page 0x0c: AL Logon / Logoff
-    KEY_COFFEE = 0x019E  # Page 0x0c: AL Terminal Lock / Screensaver
-    # UNDEF = 0x019f				# Page 0x0c: AL Control Panel
-    # UNDEF = 0x01a0				# Page 0x0c: AL Command Line Processor / Run
-    # UNDEF = 0x01a1				# Page 0x0c: AL Process / Task Manager
-    # UNDEF = 0x01a2				# Page 0x0c: AL Select Task / Application
-    # UNDEF = 0x01a3				# Page 0x0c: AL Next Task / Application
-    # UNDEF = 0x01a4				# Page 0x0c: AL Previous Task / Application
-    # UNDEF = 0x01a5				# Page 0x0c: AL Preemptive Halt Task / App.
-    KEY_HELP = 0x01A6  # Page 0x0c: AL Integrated Help Center
-    KEY_DOCUMENTS = 0x01A7  # Page 0x0c: AL Documents
-    # UNDEF = 0x01a8				# Page 0x0c: AL Thesaurus
-    # UNDEF = 0x01a9				# Page 0x0c: AL Dictionary
-    # UNDEF = 0x01aa				# Page 0x0c: AL Desktop
-    KEY_SPELLCHECK = 0x01AB  # Page 0x0c: AL Spell Check
-    # UNDEF = 0x01ac				# Page 0x0c: AL Grammar Check
-    # UNDEF = 0x01ad				# Page 0x0c: AL Wireless Status
-    # UNDEF = 0x01ae				# Page 0x0c: AL Keyboard Layout
-    # UNDEF = 0x01af				# Page 0x0c: AL Virus Protection
-    # UNDEF = 0x01b0				# Page 0x0c: AL Encryption
-    # UNDEF = 0x01b1				# Page 0x0c: AL Screen Saver
-    # UNDEF = 0x01b2				# Page 0x0c: AL Alarms
-    # UNDEF = 0x01b3				# Page 0x0c: AL Clock
-    # UNDEF = 0x01b4				# Page 0x0c: AL File Browser
-    # UNDEF = 0x01b5				# Page 0x0c: AL Power Status
-    KEY_MEDIA = 0x01B6  # Page 0x0c: AL Image Browser
-    KEY_SOUND = 0x01B7  # Page 0x0c: AL Audio Browser
-    # UNDEF = 0x01b8				# Page 0x0c: AL Movie Browser
-    # UNDEF = 0x01b9				# Page 0x0c: AL Digital Rights Manager
-    # UNDEF = 0x01ba				# Page 0x0c: AL Digital Wallet
-    KEY_MESSENGER = 0x01BC  # Page 0x0c: AL Instant Messaging
-    KEY_INFO = 0x01BD  # Page 0x0c: AL OEM Features / Tips Browser
-    # UNDEF = 0x01be				# Page 0x0c: AL OEM Help
-    # UNDEF = 0x01bf				# Page 0x0c: AL Online Community
-    # UNDEF = 0x01c0				# Page 0x0c: AL Entertainment Content Browser
-    # UNDEF = 0x01c1				# Page 0x0c: AL Online Shopping Browser
-    # UNDEF = 0x01c2				# Page 0x0c: AL SmartCard Information / Help
-    # UNDEF = 0x01c3				# Page 0x0c: AL Market / Finance Browser
-    # UNDEF = 0x01c4				# Page 0x0c: AL Customized Corp. News Browser
-    # UNDEF = 0x01c5				# Page 0x0c: AL Online Activity Browser
-    # UNDEF = 0x01c6				# Page 0x0c: AL Research / Search Browser
-    # UNDEF = 0x01c7				# Page 0x0c: AL Audio Player
-    KEY_NEW = 0x0201  # Page 0x0c: AC New
-    KEY_OPEN = 0x0202  # Page 0x0c: AC Open
-    KEY_CLOSE = 0x0203  # Page 0x0c: AC Close
-    KEY_EXIT = 0x0204  # Page 0x0c: AC Exit
-    # UNDEF = 0x0205				# Page 0x0c: AC Maximize
-    # UNDEF = 0x0206				# Page 0x0c: AC Minimize
-    KEY_SAVE = 0x0207  # Page 0x0c: AC Save
-    KEY_PRINT = 0x0208  # Page 0x0c: AC Print
-    KEY_PROPS = 0x0209  # Page 0x0c: AC Properties
-    KEY_UNDO = 0x021A  # Page 0x0c: AC Undo
-    KEY_COPY = 0x021B  # Page 0x0c: AC Copy
-    KEY_CUT = 0x021C  # Page 0x0c: AC Cut
-    KEY_PASTE = 0x021D  # Page 0x0c: AC Paste
-    # UNDEF = 0x021e				# Page 0x0c: AC Select All
-    KEY_FIND = 0x021F  # Page 0x0c: AC Find
-    # UNDEF = 0x0220				# Page 0x0c: AC Find and Replace
-    KEY_SEARCH = 0x0221  # Page 0x0c: AC Search
-    KEY_GOTO = 0x0222  # Page 0x0c: AC Go To
-    KEY_HOMEPAGE = 0x0223  # Page 0x0c: AC Home
-    KEY_BACK = 0x0224  # Page 0x0c: AC Back
-    KEY_FORWARD = 0x0225  # Page 0x0c: AC Forward
-    KEY_STOP = 0x0226  # Page 0x0c: AC Stop
-    KEY_REFRESH = 0x0227  # Page 0x0c: AC Refresh
-    # UNDEF = 0x0228				# Page 0x0c: AC Previous Link
-    # UNDEF = 0x0229				# Page 0x0c: AC Next Link
-    KEY_BOOKMARKS = 0x022A  # Page 0x0c: AC Bookmarks
-    # UNDEF = 0x022b				# Page 0x0c: AC History
-    # UNDEF = 0x022c				# Page 0x0c: AC Subscriptions
-    KEY_ZOOMIN = 0x022D  # Page 0x0c: AC Zoom In
-    KEY_ZOOMOUT = 0x022E  # Page 0x0c: AC Zoom Out
-    KEY_ZOOMRESET = 0x022F  # Page 0x0c: AC Zoom
-    # UNDEF = 0x0230				# Page 0x0c: AC Full Screen View
-    # UNDEF = 0x0231				# Page 0x0c: AC Normal View
-    # UNDEF = 0x0232				# Page 0x0c: AC View Toggle
-    KEY_SCROLLUP = 0x0233  # Page 0x0c: AC Scroll Up
-    KEY_SCROLLDOWN = 0x0234  # Page 0x0c: AC Scroll Down
-    # UNDEF = 0x0236				# Page 0x0c: AC Pan Left
-    # UNDEF = 0x0237				# Page 0x0c: AC Pan Right
-    # UNDEF = 0x0239				# Page 0x0c: AC New Window
-    # UNDEF = 0x023a				# Page 0x0c: AC Tile Horizontally
-    # UNDEF = 0x023b				# Page 0x0c: AC Tile Vertically
-    # UNDEF = 0x023c				# Page 0x0c: AC Format
-    # UNDEF = 0x023d				# Page 0x0c: AC Edit
-    # UNDEF = 0x023e				# Page 0x0c: AC Bold
-    # UNDEF = 0x023f				# Page 0x0c: AC Italics
-    # UNDEF = 0x0240				# Page 0x0c: AC Underline
-    # UNDEF = 0x0241				# Page 0x0c: AC Strikethrough
-    # UNDEF = 0x0242				# Page 0x0c: AC Subscript
-    # UNDEF = 0x0243				# Page 0x0c: AC Superscript
-    # UNDEF = 0x0244				# Page 0x0c: AC All Caps
-    # UNDEF = 0x0245				# Page 0x0c: AC Rotate
-    # UNDEF = 0x0246				# Page 0x0c: AC Resize
-    # UNDEF = 0x0247				# Page 0x0c: AC Flip horizontal
-    # UNDEF = 0x0248				# Page 0x0c: AC Flip Vertical
-    # UNDEF = 0x0249				# Page 0x0c: AC Mirror Horizontal
-    # UNDEF = 0x024a				# Page 0x0c: AC Mirror Vertical
-    # UNDEF = 0x024b				# Page 0x0c: AC Font Select
-    # UNDEF = 0x024c				# Page 0x0c: AC Font Color
-    # UNDEF = 0x024d				# Page 0x0c: AC Font Size
-    # UNDEF = 0x024e				# Page 0x0c: AC Justify Left
-    # UNDEF = 0x024f				# Page 0x0c: AC Justify Center H
-    # UNDEF = 0x0250				# Page 0x0c: AC Justify Right
-    # UNDEF = 0x0251				# Page 0x0c: AC Justify Block H
-    # UNDEF = 0x0252				# Page 0x0c: AC Justify Top
-    # UNDEF = 0x0253				# Page 0x0c: AC Justify Center V
-    # UNDEF = 0x0254				# Page 0x0c: AC Justify Bottom
-    # UNDEF = 0x0255				# Page 0x0c: AC Justify Block V
-    # UNDEF = 0x0256				# Page 0x0c: AC Indent Decrease
-    # UNDEF = 0x0257				# Page 0x0c: AC Indent Increase
-    # UNDEF = 0x0258				# Page 0x0c: AC Numbered List
-    # UNDEF = 0x0259				# Page 0x0c: AC Restart Numbering
-    # UNDEF = 0x025a				# Page 0x0c: AC Bulleted List
-    # UNDEF = 0x025b				# Page 0x0c: AC Promote
-    # UNDEF = 0x025c				# Page 0x0c: AC Demote
-    # UNDEF = 0x025d				# Page 0x0c: AC Yes
-    # UNDEF = 0x025e				# Page 0x0c: AC No
-    KEY_CANCEL = 0x025F  # Page 0x0c: AC Cancel
-    # UNDEF = 0x0260				# Page 0x0c: AC Catalog
-    # UNDEF = 0x0261				# Page 0x0c: AC Buy / Checkout
-    # UNDEF = 0x0262				# Page 0x0c: AC Add to Cart
-    # UNDEF = 0x0263				# Page 0x0c: AC Expand
-    # UNDEF = 0x0264				# Page 0x0c: AC Expand All
-    # UNDEF = 0x0265				# Page 0x0c: AC Collapse
-    # UNDEF = 0x0266				# Page 0x0c: AC Collapse All
-    # UNDEF = 0x0267				# Page 0x0c: AC Print Preview
-    # UNDEF = 0x0268				# Page 0x0c: AC Paste Special
-    # UNDEF = 0x0269				# Page 0x0c: AC Insert Mode
-    # UNDEF = 0x026a				# Page 0x0c: AC Delete
-    # UNDEF = 0x026b				# Page 0x0c: AC Lock
-    # UNDEF = 0x026c				# Page 0x0c: AC Unlock
-    # UNDEF = 0x026d				# Page 0x0c: AC Protect
-    # UNDEF = 0x026e				# Page 0x0c: AC Unprotect
-    # UNDEF = 0x026f				# Page 0x0c: AC Attach Comment
-    # UNDEF = 0x0270				# Page 0x0c: AC Delete Comment
-    # UNDEF = 0x0271				# Page 0x0c: AC View Comment
-    # UNDEF = 0x0272				# Page 0x0c: AC Select Word
-    # UNDEF = 0x0273				# Page 0x0c: AC Select Sentence
-    # UNDEF = 0x0274				# Page 0x0c: AC Select Paragraph
-    # UNDEF = 0x0275				# Page 0x0c: AC Select Column
-    # UNDEF = 0x0276				# Page 0x0c: AC Select Row
-    # UNDEF = 0x0277				# Page 0x0c: AC Select Table
-    # UNDEF = 0x0278				# Page 0x0c: AC Select Object
-    KEY_REDO = 0x0279  # Page 0x0c: AC Redo / Repeat
-    # UNDEF = 0x027a				# Page 0x0c: AC Sort
-    # UNDEF = 0x027b				# Page 0x0c: AC Sort Ascending
-    # UNDEF = 0x027c				# Page 0x0c: AC Sort Descending
-    # UNDEF = 0x027d				# Page 0x0c: AC Filter
-    # UNDEF = 0x027e				# Page 0x0c: AC Set Clock
-    # UNDEF = 0x027f				# Page 0x0c: AC View Clock
-    # UNDEF = 0x0280				# Page 0x0c: AC Select Time Zone
-    # UNDEF = 0x0281				# Page 0x0c: AC Edit Time Zones
-    # UNDEF = 0x0282				# Page 0x0c: AC Set Alarm
-    # UNDEF = 0x0283				# Page 0x0c: AC Clear Alarm
-    # UNDEF = 0x0284				# Page 0x0c: AC Snooze Alarm
-    # UNDEF = 0x0285				# Page 0x0c: AC Reset Alarm
-    # UNDEF = 0x0286				# Page 0x0c: AC Synchronize
-    # UNDEF = 0x0287				# Page 0x0c: AC Send/Receive
-    # UNDEF = 0x0288				# Page 0x0c: AC Send To
-    KEY_REPLY = 0x0289  # Page 0x0c: AC Reply
-    # UNDEF = 0x028a				# Page 0x0c: AC Reply All
-    KEY_FORWARDMAIL = 0x028B  # Page 0x0c: AC Forward Msg
-    KEY_SEND = 0x028C  # Page 0x0c: AC Send
-    # UNDEF = 0x028d				# Page 0x0c: AC Attach File
-    # UNDEF = 0x028e				# Page 0x0c: AC Upload
-    # UNDEF = 0x028f				# Page 0x0c: AC Download (Save Target As)
-    # UNDEF = 0x0290				# Page 0x0c: AC Set Borders
-    # UNDEF = 0x0291				# Page 0x0c: AC Insert Row
-    # UNDEF = 0x0292				# Page 0x0c: AC Insert Column
-    # UNDEF = 0x0293				# Page 0x0c: AC Insert File
-    # UNDEF = 0x0294				# Page 0x0c: AC Insert Picture
-    # UNDEF = 0x0295				# Page 0x0c: AC Insert Object
-    # UNDEF = 0x0296				# Page 0x0c: AC Insert Symbol
-    # UNDEF = 0x0297				# Page 0x0c: AC Save and Close
-    # UNDEF = 0x0298				# Page 0x0c: AC Rename
-    # UNDEF = 0x0299				# Page 0x0c: AC Merge
-    # UNDEF = 0x029a				# Page 0x0c: AC Split
-    # UNDEF = 0x029b				# Page 0x0c: AC Distribute Horizontally
-    # UNDEF = 0x029c				# Page 0x0c: AC Distribute Vertically
+    def __init__(self, name, usage_page, table):
+        """
+        :param name: Name of the page, e.g. "Keyboard".
+        :param usage_page: Usage page number.
+        :param table: Usage table, one "code name description" line per usage, sorted by code.
+        """
+        self.page_name = name
+        self.usage_page = usage_page
+        self._table = table
+        self._codes = None
+        self._names = None
+        self._descriptions = None
+        self._index = None
+
+    def _build(self):
+        codes = array.array("H")
+        names = []
+        descriptions = []
+        index = {}
+        for line in self._table.splitlines():
+            if not line:
+                continue
+            parts = line.split(None, 2)
+            code = int(parts[0], 16)
+            if codes and code <= codes[-1]:
+                raise ValueError("{} usage table isn't sorted at 0x{:04X}".format(self.page_name, code))
+            name = parts[1] if parts[1] != "-" else None
+            if name is not None:
+                if name in index:
+                    raise ValueError("{} usage {} is defined twice".format(self.page_name, name))
+                index[name] = code
+            codes.append(code)
+            names.append(name)
+            descriptions.append(parts[2] if len(parts) > 2 else "")
+
+        # Publish the index last: another thread may be looking things up while this one builds.
+        self._codes = codes
+        self._names = tuple(names)
+        self._descriptions = tuple(descriptions)
+        self._index = index
+
+    def _find(self, code):
+        if self._index is None:
+            self._build()
+        i = bisect.bisect_left(self._codes, code)
+        if i < len(self._codes) and self._codes[i] == code:
+            return i
+        return -1
+
+    def code(self, name):
+        """
+        :param name: Usage name, e.g. "KEY_A".
+        :return: The usage's code.
+        :raises KeyError: If there is no usage with that name on this page.
+        """
+        if self._index is None:
+            self._build()
+        return self._index[name]
+
+    def name(self, code):
+        """
+        :param code: Usage code.
+        :return: The usage's name, or None if it doesn't have one.
+        """
+        i = self._find(code)
+        return self._names[i] if i >= 0 else None
+
+    def description(self, code):
+        """
+        :param code: Usage code.
+        :return: The usage's description from the HID usage tables, or None if the code isn't listed.
+        """
+        i = self._find(code)
+        return self._descriptions[i] if i >= 0 else None
+
+    def describe(self, code):
+        """
+        :param code: Usage code.
+        :return: A short string for logs, e.g. "KEY_A (0x04)".
+        """
+        name = self.name(code)
+        if name is None:
+            return "{} 0x{:02X}".format(self.page_name, code)
+        return "{} (0x{:02X})".format(name, code)
+
+    def names(self):
+        """
+        :return: Every usage name on this page, in code order.
+        """
+        if self._index is None:
+            self._build()
+        return [n for n in self._names if n is not None]
+
+    def __contains__(self, name):
+        if self._index is None:
+            self._build()
+        return name in self._index
+
+    def __len__(self):
+        if self._index is None:
+            self._build()
+        return len(self._index)
+
+    def __getattr__(self, name):
+        # Only called for names that aren't real attributes, i.e. usages.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._index is None:
+            self._build()
+        try:
+            code = self._index[name]
+        except KeyError:
+            raise AttributeError("{} has no usage {}".format(self.page_name, name))
+        # Cache it as a real attribute so later lookups of the same usage are plain attribute reads.
+        setattr(self, name, code)
+        return code
+
+    def __dir__(self):
+        return list(super().__dir__()) + self.names()
+
+    def __repr__(self):
+        return "UsagePage({}, 0x{:02X})".format(self.page_name, self.usage_page)
+
+
+_KEYBOARD = r"""
+0001 - Keyboard Error Roll Over
+0002 - Keyboard POST Fail
+0003 - Keyboard Error Undefined
+0004 KEY_A Keyboard a and A
+0005 KEY_B Keyboard b and B
+0006 KEY_C Keyboard c and C
+0007 KEY_D Keyboard d and D
+0008 KEY_E Keyboard e and E
+0009 KEY_F Keyboard f and F
+000A KEY_G Keyboard g and G
+000B KEY_H Keyboard h and H
+000C KEY_I Keyboard i and I
+000D KEY_J Keyboard j and J
+000E KEY_K Keyboard k and K
+000F KEY_L Keyboard l and L
+0010 KEY_M Keyboard m and M
+0011 KEY_N Keyboard n and N
+0012 KEY_O Keyboard o and O
+0013 KEY_P Keyboard p and P
+0014 KEY_Q Keyboard q and Q
+0015 KEY_R Keyboard r and R
+0016 KEY_S Keyboard s and S
+0017 KEY_T Keyboard t and T
+0018 KEY_U Keyboard u and U
+0019 KEY_V Keyboard v and V
+001A KEY_W Keyboard w and W
+001B KEY_X Keyboard x and X
+001C KEY_Y Keyboard y and Y
+001D KEY_Z Keyboard z and Z
+001E KEY_1 Keyboard 1 and !
+001F KEY_2 Keyboard 2 and @
+0020 KEY_3 Keyboard 3 and #
+0021 KEY_4 Keyboard 4 and $
+0022 KEY_5 Keyboard 5 and %
+0023 KEY_6 Keyboard 6 and ^
+0024 KEY_7 Keyboard 7 and &
+0025 KEY_8 Keyboard 8 and *
+0026 KEY_9 Keyboard 9 and (
+0027 KEY_0 Keyboard 0 and )
+0028 KEY_ENTER Keyboard Return (ENTER)
+0029 KEY_ESC Keyboard ESCAPE
+002A KEY_BACKSPACE Keyboard DELETE (Backspace)
+002B KEY_TAB Keyboard Tab
+002C KEY_SPACE Keyboard Spacebar
+002D KEY_MINUS Keyboard - and _
+002E KEY_EQUAL Keyboard = and +
+002F KEY_LEFTBRACE Keyboard [ and {
+0030 KEY_RIGHTBRACE Keyboard ] and }
+0031 KEY_BACKSLASH Keyboard \ and |
+0032 KEY_NONUSHASH Keyboard Non-US # and ~
+0033 KEY_SEMICOLON Keyboard ; and :
+0034 KEY_APOSTROPHE Keyboard ' and "
+0035 KEY_GRAVE Keyboard ` and ~
+0036 KEY_COMMA Keyboard , and <
+0037 KEY_DOT Keyboard . and >
+0038 KEY_SLASH Keyboard / and ?
+0039 KEY_CAPSLOCK Keyboard Caps Lock
+003A KEY_F1 Keyboard F1
+003B KEY_F2 Keyboard F2
+003C KEY_F3 Keyboard F3
+003D KEY_F4 Keyboard F4
+003E KEY_F5 Keyboard F5
+003F KEY_F6 Keyboard F6
+0040 KEY_F7 Keyboard F7
+0041 KEY_F8 Keyboard F8
+0042 KEY_F9 Keyboard F9
+0043 KEY_F10 Keyboard F10
+0044 KEY_F11 Keyboard F11
+0045 KEY_F12 Keyboard F12
+0046 KEY_SYSRQ Keyboard Print Screen
+0047 KEY_SCROLLLOCK Keyboard Scroll Lock
+0048 KEY_PAUSE Keyboard Pause
+0049 KEY_INSERT Keyboard Insert
+004A KEY_HOME Keyboard Home
+004B KEY_PAGEUP Keyboard Page Up
+004C KEY_DELETE Keyboard Delete Forward
+004D KEY_END Keyboard End
+004E KEY_PAGEDOWN Keyboard Page Down
+004F KEY_RIGHT Keyboard Right Arrow
+0050 KEY_LEFT Keyboard Left Arrow
+0051 KEY_DOWN Keyboard Down Arrow
+0052 KEY_UP Keyboard Up Arrow
+0053 KEY_NUMLOCK Keyboard Num Lock and Clear
+0054 KEY_KPSLASH Keypad /
+0055 KEY_KPASTERISK Keypad *
+0056 KEY_KPMINUS Keypad -
+0057 KEY_KPPLUS Keypad +
+0058 KEY_KPENTER Keypad ENTER
+0059 KEY_KP1 Keypad 1 and End
+005A KEY_KP2 Keypad 2 and Down Arrow
+005B KEY_KP3 Keypad 3 and PageDn
+005C KEY_KP4 Keypad 4 and Left Arrow
+005D KEY_KP5 Keypad 5
+005E KEY_KP6 Keypad 6 and Right Arrow
+005F KEY_KP7 Keypad 7 and Home
+0060 KEY_KP8 Keypad 8 and Up Arrow
+0061 KEY_KP9 Keypad 9 and Page Up
+0062 KEY_KP0 Keypad 0 and Insert
+0063 KEY_KPDOT Keypad . and Delete
+0064 KEY_102ND Keyboard Non-US \ and |
+0065 KEY_COMPOSE Keyboard Application
+0066 KEY_POWER Keyboard Power
+0067 KEY_KPEQUAL Keypad =
+0068 KEY_F13 Keyboard F13
+0069 KEY_F14 Keyboard F14
+006A KEY_F15 Keyboard F15
+006B KEY_F16 Keyboard F16
+006C KEY_F17 Keyboard F17
+006D KEY_F18 Keyboard F18
+006E KEY_F19 Keyboard F19
+006F KEY_F20 Keyboard F20
+0070 KEY_F21 Keyboard F21
+0071 KEY_F22 Keyboard F22
+0072 KEY_F23 Keyboard F23
+0073 KEY_F24 Keyboard F24
+0074 KEY_OPEN Keyboard Execute
+0075 KEY_HELP Keyboard Help
+0076 KEY_PROPS Keyboard Menu
+0077 KEY_FRONT Keyboard Select
+0078 KEY_STOP Keyboard Stop
+0079 KEY_AGAIN Keyboard Again
+007A KEY_UNDO Keyboard Undo
+007B KEY_CUT Keyboard Cut
+007C KEY_COPY Keyboard Copy
+007D KEY_PASTE Keyboard Paste
+007E KEY_FIND Keyboard Find
+007F KEY_MUTE Keyboard Mute
+0080 KEY_VOLUMEUP Keyboard Volume Up
+0081 KEY_VOLUMEDOWN Keyboard Volume Down
+0082 - Keyboard Locking Caps Lock
+0083 - Keyboard Locking Num Lock
+0084 - Keyboard Locking Scroll Lock
+0085 KEY_KPCOMMA Keypad Comma
+0086 - Keypad Equal Sign
+0087 KEY_RO Keyboard International1
+0088 KEY_KATAKANAHIRAGANA Keyboard International2
+0089 KEY_YEN Keyboard International3
+008A KEY_HENKAN Keyboard International4
+008B KEY_MUHENKAN Keyboard International5
+008C KEY_KPJPCOMMA Keyboard International6
+008D - Keyboard International7
+008E - Keyboard International8
+008F - Keyboard International9
+0090 KEY_HANGEUL Keyboard LANG1
+0091 KEY_HANJA Keyboard LANG2
+0092 KEY_KATAKANA Keyboard LANG3
+0093 KEY_HIRAGANA Keyboard LANG4
+0094 KEY_ZENKAKUHANKAKU Keyboard LANG5
+0095 - Keyboard LANG6
+0096 - Keyboard LANG7
+0097 - Keyboard LANG8
+0098 - Keyboard LANG9
+0099 - Keyboard Alternate Erase
+009A - Keyboard SysReq/Attention
+009B - Keyboard Cancel
+009C - Keyboard Clear
+009D - Keyboard Prior
+009E - Keyboard Return
+009F - Keyboard Separator
+00A0 - Keyboard Out
+00A1 - Keyboard Oper
+00A2 - Keyboard Clear/Again
+00A3 - Keyboard CrSel/Props
+00A4 - Keyboard ExSel
+00B0 - Keypad 00
+00B1 - Keypad 000
+00B2 - Thousands Separator
+00B3 - Decimal Separator
+00B4 - Currency Unit
+00B5 - Currency Sub-unit
+00B6 KEY_KPLEFTPAREN Keypad (
+00B7 KEY_KPRIGHTPAREN Keypad )
+00B8 - Keypad {
+00B9 - Keypad }
+00BA - Keypad Tab
+00BB - Keypad Backspace
+00BC - Keypad A
+00BD - Keypad B
+00BE - Keypad C
+00BF - Keypad D
+00C0 - Keypad E
+00C1 - Keypad F
+00C2 - Keypad XOR
+00C3 - Keypad ^
+00C4 - Keypad %
+00C5 - Keypad <
+00C6 - Keypad >
+00C7 - Keypad &
+00C8 - Keypad &&
+00C9 - Keypad |
+00CA - Keypad ||
+00CB - Keypad :
+00CC - Keypad #
+00CD - Keypad Space
+00CE - Keypad @
+00CF - Keypad !
+00D0 - Keypad Memory Store
+00D1 - Keypad Memory Recall
+00D2 - Keypad Memory Clear
+00D3 - Keypad Memory Add
+00D4 - Keypad Memory Subtract
+00D5 - Keypad Memory Multiply
+00D6 - Keypad Memory Divide
+00D7 - Keypad +/-
+00D8 - Keypad Clear
+00D9 - Keypad Clear Entry
+00DA - Keypad Binary
+00DB - Keypad Octal
+00DC - Keypad Decimal
+00DD - Keypad Hexadecimal
+00E0 KEY_LEFTCTRL Keyboard Left Control
+00E1 KEY_LEFTSHIFT Keyboard Left Shift
+00E2 KEY_LEFTALT Keyboard Left Alt
+00E3 KEY_LEFTMETA Keyboard Left GUI
+00E4 KEY_RIGHTCTRL Keyboard Right Control
+00E5 KEY_RIGHTSHIFT Keyboard Right Shift
+00E6 KEY_RIGHTALT Keyboard Right Alt
+00E7 KEY_RIGHTMETA Keyboard Right GUI
+00E8 KEY_PLAYPAUSE
+00E9 KEY_STOPCD
+00EA KEY_PREVIOUSSONG
+00EB KEY_NEXTSONG
+00EC KEY_EJECTCD
+00ED KEY_MEDIA_VOLUMEUP
+00EE KEY_MEDIA_VOLUMEDOWN
+00EF KEY_MEDIA_MUTE
+00F0 KEY_WWW
+00F1 KEY_BACK
+00F2 KEY_FORWARD
+00F3 KEY_MEDIA_STOP
+00F4 KEY_MEDIA_FIND
+00F5 KEY_SCROLLUP
+00F6 KEY_SCROLLDOWN
+00F7 KEY_EDIT
+00F8 KEY_SLEEP
+00F9 KEY_COFFEE
+00FA KEY_REFRESH
+00FB KEY_CALC
+"""
+
+_GENERIC_DESKTOP = r"""
+0081 KEY_POWER System Power Down
+0082 KEY_SLEEP System Sleep
+0083 KEY_WAKEUP System Wake Up
+0084 - System Context Menu
+0085 - System Main Menu
+0086 - System App Menu
+0087 - System Menu Help
+0088 - System Menu Exit
+0089 - System Menu Select
+008A - System Menu Right
+008B - System Menu Left
+008C - System Menu Up
+008D - System Menu Down
+008E - System Cold Restart
+008F - System Warm Restart
+00A0 - System Dock
+00A1 - System Undock
+00A2 - System Setup
+00A3 - System Break
+00A4 - System Debugger Break
+00A5 - Application Break
+00A6 - Application Debugger Break
+00A7 - System Speaker Mute
+00A8 - System Hibernate
+00B0 - System Display Invert
+00B1 - System Display Internal
+00B2 - System Display External
+00B3 - System Display Both
+00B4 - System Display Dual
+00B5 - System Display Toggle Int/Ext
+00B6 - System Display Swap Prim./Sec.
+00B7 - System Display LCD Autoscale
+"""
+
+_CONSUMER = r"""
+0030 - Power
+0031 - Reset
+0032 - Sleep
+0033 - Sleep After
+0034 KEY_SLEEP Sleep Mode
+0040 KEY_MENU Menu
+0041 - Menu Pick
+0042 - Menu Up
+0043 - Menu Down
+0044 - Menu Left
+0045 KEY_RIGHT Menu Right
+0046 - Menu Escape
+0047 - Menu Value Increase
+0048 - Menu Value Decrease
+0081 - Assign Selection
+0082 - Mode Step
+0083 KEY_LAST Recall Last
+0084 - Enter Channel
+0085 - Order Movie
+0088 KEY_PC Media Select Computer
+0089 KEY_TV Media Select TV
+008A - Media Select WWW
+008B KEY_DVD Media Select DVD
+008C KEY_PHONE Media Select Telephone
+008D KEY_PROGRAM Media Select Program Guide
+008E KEY_VIDEOPHONE Media Select Video Phone
+008F KEY_GAMES Media Select Games
+0090 KEY_MEMO Media Select Messages
+0091 KEY_CD Media Select CD
+0092 KEY_VCR Media Select VCR
+0093 KEY_TUNER Media Select Tuner
+0094 KEY_QUIT Quit
+0095 KEY_HELP Help
+0096 KEY_TAPE Media Select Tape
+0097 KEY_TV2 Media Select Cable
+0098 KEY_SAT Media Select Satellite
+0099 - Media Select Security
+009A KEY_PVR Media Select Home
+009C KEY_CHANNELUP Channel Increment
+009D KEY_CHANNELDOWN Channel Decrement
+009E - Media Select SAP
+00A0 KEY_VCR2 VCR Plus
+00A1 - Once
+00A2 - Daily
+00A3 - Weekly
+00A4 - Monthly
+00B0 KEY_PLAY Play
+00B1 KEY_PAUSE Pause
+00B2 KEY_RECORD Record
+00B3 KEY_FASTFORWARD Fast Forward
+00B4 KEY_REWIND Rewind
+00B5 KEY_NEXTSONG Scan Next Track
+00B6 KEY_PREVIOUSSONG Scan Previous Track
+00B7 KEY_STOPCD Stop
+00B8 KEY_EJECTCD Eject
+00B9 - Random Play
+00BA - Select Disc
+00BB - Enter Disc
+00BC KEY_MEDIA_REPEAT Repeat
+00BE - Track Normal
+00C0 - Frame Forward
+00C1 - Frame Back
+00C2 - Mark
+00C3 - Clear Mark
+00C4 - Repeat From Mark
+00C5 - Return To Mark
+00C6 - Search Mark Forward
+00C7 - Search Mark Backwards
+00C8 - Counter Reset
+00C9 - Show Counter
+00CA - Tracking Increment
+00CB - Tracking Decrement
+00CC - Stop / Eject
+00CD KEY_PLAYPAUSE Play / Pause
+00CE - Play / Skip
+00E2 KEY_MUTE Mute
+00E5 KEY_BASSBOOST Bass Boost
+00E6 - Surround Mode
+00E7 - Loudness
+00E8 - MPX
+00E9 KEY_VOLUMEUP Volume Increment
+00EA KEY_VOLUMEDOWN Volume Decrement
+0181 - AL Launch Button Config. Tool
+0182 - AL Programmable Button Config.
+0183 KEY_CONFIG AL Consumer Control Config.
+0184 KEY_WORDPROCESSOR AL Word Processor
+0185 KEY_EDITOR AL Text Editor
+0186 KEY_SPREADSHEET AL Spreadsheet
+0187 KEY_GRAPHICSEDITOR AL Graphics Editor
+0188 KEY_PRESENTATION AL Presentation App
+0189 KEY_DATABASE AL Database App
+018A KEY_MAIL AL Email Reader
+018B KEY_NEWS AL Newsreader
+018C KEY_VOICEMAIL AL Voicemail
+018D KEY_ADDRESSBOOK AL Contacts / Address Book
+018E KEY_CALENDAR AL Calendar / Schedule
+018F - AL Task / Project Manager
+0190 - AL Log / Journal / Timecard
+0191 KEY_FINANCE AL Checkbook / Finance
+0192 KEY_CALC AL Calculator
+0193 - AL A/V Capture / Playback
+0194 KEY_FILE AL Local Machine Browser
+0195 - AL LAN/WAN Browser
+0196 KEY_WWW AL Internet Browser
+0197 - AL Remote Networking/ISP Connect
+0198 - AL Network Conference
+0199 KEY_CHAT AL Network Chat
+019A - AL Telephony / Dialer
+019B - AL Logon
+019C KEY_LOGOFF AL Logoff
+019D - AL Logon / Logoff
+019E KEY_COFFEE AL Terminal Lock / Screensaver
+019F - AL Control Panel
+01A0 - AL Command Line Processor / Run
+01A1 - AL Process / Task Manager
+01A2 - AL Select Task / Application
+01A3 - AL Next Task / Application
+01A4 - AL Previous Task / Application
+01A5 - AL Preemptive Halt Task / App.
+01A6 KEY_HELPCENTER AL Integrated Help Center
+01A7 KEY_DOCUMENTS AL Documents
+01A8 - AL Thesaurus
+01A9 - AL Dictionary
+01AA - AL Desktop
+01AB KEY_SPELLCHECK AL Spell Check
+01AC - AL Grammar Check
+01AD - AL Wireless Status
+01AE - AL Keyboard Layout
+01AF - AL Virus Protection
+01B0 - AL Encryption
+01B1 - AL Screen Saver
+01B2 - AL Alarms
+01B3 - AL Clock
+01B4 - AL File Browser
+01B5 - AL Power Status
+01B6 KEY_MEDIA AL Image Browser
+01B7 KEY_SOUND AL Audio Browser
+01B8 - AL Movie Browser
+01B9 - AL Digital Rights Manager
+01BA - AL Digital Wallet
+01BC KEY_MESSENGER AL Instant Messaging
+01BD KEY_INFO AL OEM Features / Tips Browser
+01BE - AL OEM Help
+01BF - AL Online Community
+01C0 - AL Entertainment Content Browser
+01C1 - AL Online Shopping Browser
+01C2 - AL SmartCard Information / Help
+01C3 - AL Market / Finance Browser
+01C4 - AL Customized Corp. News Browser
+01C5 - AL Online Activity Browser
+01C6 - AL Research / Search Browser
+01C7 - AL Audio Player
+0201 KEY_NEW AC New
+0202 KEY_OPEN AC Open
+0203 KEY_CLOSE AC Close
+0204 KEY_EXIT AC Exit
+0205 - AC Maximize
+0206 - AC Minimize
+0207 KEY_SAVE AC Save
+0208 KEY_PRINT AC Print
+0209 KEY_PROPS AC Properties
+021A KEY_UNDO AC Undo
+021B KEY_COPY AC Copy
+021C KEY_CUT AC Cut
+021D KEY_PASTE AC Paste
+021E - AC Select All
+021F KEY_FIND AC Find
+0220 - AC Find and Replace
+0221 KEY_SEARCH AC Search
+0222 KEY_GOTO AC Go To
+0223 KEY_HOMEPAGE AC Home
+0224 KEY_BACK AC Back
+0225 KEY_FORWARD AC Forward
+0226 KEY_STOP AC Stop
+0227 KEY_REFRESH AC Refresh
+0228 - AC Previous Link
+0229 - AC Next Link
+022A KEY_BOOKMARKS AC Bookmarks
+022B - AC History
+022C - AC Subscriptions
+022D KEY_ZOOMIN AC Zoom In
+022E KEY_ZOOMOUT AC Zoom Out
+022F KEY_ZOOMRESET AC Zoom
+0230 - AC Full Screen View
+0231 - AC Normal View
+0232 - AC View Toggle
+0233 KEY_SCROLLUP AC Scroll Up
+0234 KEY_SCROLLDOWN AC Scroll Down
+0236 - AC Pan Left
+0237 - AC Pan Right
+0239 - AC New Window
+023A - AC Tile Horizontally
+023B - AC Tile Vertically
+023C - AC Format
+023D - AC Edit
+023E - AC Bold
+023F - AC Italics
+0240 - AC Underline
+0241 - AC Strikethrough
+0242 - AC Subscript
+0243 - AC Superscript
+0244 - AC All Caps
+0245 - AC Rotate
+0246 - AC Resize
+0247 - AC Flip horizontal
+0248 - AC Flip Vertical
+0249 - AC Mirror Horizontal
+024A - AC Mirror Vertical
+024B - AC Font Select
+024C - AC Font Color
+024D - AC Font Size
+024E - AC Justify Left
+024F - AC Justify Center H
+0250 - AC Justify Right
+0251 - AC Justify Block H
+0252 - AC Justify Top
+0253 - AC Justify Center V
+0254 - AC Justify Bottom
+0255 - AC Justify Block V
+0256 - AC Indent Decrease
+0257 - AC Indent Increase
+0258 - AC Numbered List
+0259 - AC Restart Numbering
+025A - AC Bulleted List
+025B - AC Promote
+025C - AC Demote
+025D - AC Yes
+025E - AC No
+025F KEY_CANCEL AC Cancel
+0260 - AC Catalog
+0261 - AC Buy / Checkout
+0262 - AC Add to Cart
+0263 - AC Expand
+0264 - AC Expand All
+0265 - AC Collapse
+0266 - AC Collapse All
+0267 - AC Print Preview
+0268 - AC Paste Special
+0269 - AC Insert Mode
+026A - AC Delete
+026B - AC Lock
+026C - AC Unlock
+026D - AC Protect
+026E - AC Unprotect
+026F - AC Attach Comment
+0270 - AC Delete Comment
+0271 - AC View Comment
+0272 - AC Select Word
+0273 - AC Select Sentence
+0274 - AC Select Paragraph
+0275 - AC Select Column
+0276 - AC Select Row
+0277 - AC Select Table
+0278 - AC Select Object
+0279 KEY_REDO AC Redo / Repeat
+027A - AC Sort
+027B - AC Sort Ascending
+027C - AC Sort Descending
+027D - AC Filter
+027E - AC Set Clock
+027F - AC View Clock
+0280 - AC Select Time Zone
+0281 - AC Edit Time Zones
+0282 - AC Set Alarm
+0283 - AC Clear Alarm
+0284 - AC Snooze Alarm
+0285 - AC Reset Alarm
+0286 - AC Synchronize
+0287 - AC Send/Receive
+0288 - AC Send To
+0289 KEY_REPLY AC Reply
+028A - AC Reply All
+028B KEY_FORWARDMAIL AC Forward Msg
+028C KEY_SEND AC Send
+028D - AC Attach File
+028E - AC Upload
+028F - AC Download (Save Target As)
+0290 - AC Set Borders
+0291 - AC Insert Row
+0292 - AC Insert Column
+0293 - AC Insert File
+0294 - AC Insert Picture
+0295 - AC Insert Object
+0296 - AC Insert Symbol
+0297 - AC Save and Close
+0298 - AC Rename
+0299 - AC Merge
+029A - AC Split
+029B - AC Distribute Horizontally
+029C - AC Distribute Vertically
+"""
+
+Keyboard = UsagePage("Keyboard", 0x07, _KEYBOARD)
+GenericDesktop = UsagePage("GenericDesktop", 0x01, _GENERIC_DESKTOP)
+Consumer = UsagePage("Consumer", 0x0C, _CONSUMER)
+
+# Usage page number -> UsagePage.
+pages = {p.usage_page: p for p in (Keyboard, GenericDesktop, Consumer)}
+
+
+def describe(usage_page, code):
+    """
+    :param usage_page: Usage page number.
+    :param code: Usage code.
+    :return: A short string for logs, e.g. "KEY_A (0x04)".
+    """
+    page = pages.get(usage_page)
+    if page is None:
+        return "0x{:02X}:0x{:02X}".format(usage_page, code)
+    return page.describe(code)
@@ -13,6 +13,7 @@ descriptor_dir=$(readlink -f ${scriptdir}/descriptors || true)
 
 boot_kbd=$(readlink -f ${descriptor_dir}/bootkbd.bin || true)
 nkro_kbd=$(readlink -f ${descriptor_dir}/ext_hid.bin || true)
+consumer=$(readlink -f ${descriptor_dir}/consumer.bin || true)
 
 rndis_dev_mac=$(cat ${descriptor_dir}/mac-dev)
 rndis_host_mac=$(cat ${descriptor_dir}/mac-host)
@@ -84,6 +85,14 @@ echo 32         > ${f}/hid.1/report_length
 cat ${nkro_kbd} > ${f}/hid.1/report_desc
 ln -s ${f}/hid.1 ${c}
 
+echo "${log} Registering HID using ${consumer} for Consumer and System Control Descriptor"
+mkdir -p ${f}/hid.2
+echo 0          > ${f}/hid.2/protocol
+echo 0          > ${f}/hid.2/subclass
+echo 9          > ${f}/hid.2/report_length
+cat ${consumer} > ${f}/hid.2/report_desc
+ln -s ${f}/hid.2 ${c}
+
 echo "${log} Registering MIDI"
 mkdir -p ${f}/midi.0
 ln -s ${f}/midi.0 ${c}
@@ -0,0 +1,287 @@
+"""
+Declarative keymaps.
+
+A keymap is a JSON file describing the physical layout, the layers and what each key does, and how the LEDs behave:
+
+    {
+        "layout": [[3, 17], [7, 27], ...],
+        "leds": {"animate": true, "static_colour": [0, 64, 255], "brightness": 0.1},
+        "layers": {
+            "1": ["KEY_KP0", "KEY_KPENTER", ...],
+            "2": ["KEY_F13", ...]
+        }
+    }
+
+- layout: optional (led index, gpio) for each key, as in config.py. Key 0 is the layer key.
+- leds: optional LED settings. brightness is a fraction of the maximum.
+- layers: layer number -> actions for keys 1 onwards. An action is a hid.usages.Keyboard name ("KEY_A"), a dict
+  naming the kind of action, a list of actions to perform together, or null for nothing. Usages can also be given as
+  numeric codes, as long as the page lists them. The kinds are:
+  - {"keyboard": "KEY_A"}: press and release a key along with this one.
+  - {"consumer": "KEY_VOLUMEUP"}: the same for a hid.usages.Consumer (media) key.
+  - {"system": "KEY_SLEEP"}: the same for a hid.usages.GenericDesktop system control (power, sleep, wake up).
+  - {"text": "Hello\n"}: type a string (US layout) when the key is pressed.
+  - {"sequence": ["KEY_LEFTCTRL+KEY_C", "KEY_TAB", "KEY_LEFTCTRL+KEY_V"]}: press a series of keys and chords.
+
+Loading a keymap validates it against hid.usages and compiles it down to plain usage codes. The compiled form is
+cached on disk keyed by the file's path, a hash of its contents and a hash of the compiler's own source (this module,
+hid.usages and hid.macro), so later loads of the same file skip parsing, validation and importing the usage tables,
+and upgrading njak never serves a stale result. Writing a new cache entry removes the old ones for the same file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# Bump when the compiled format changes, so stale caches are ignored.
+_CACHE_VERSION = 2
+
+# Source files, relative to this one, that decide what a keymap compiles to.
+_COMPILER_SOURCES = ("keymap.py", os.path.join("hid", "usages.py"), os.path.join("hid", "macro.py"))
+
+_fingerprint = None
+
+
+class KeymapError(ValueError):
+    """
+    The keymap is invalid.
+    """
+
+
+def _usage(page_name, kind):
+    def _compile(name, where):
+        from hid import usages
+
+        page = getattr(usages, page_name)
+        if isinstance(name, bool):
+            raise KeymapError("{}: {!r} isn't a {} usage".format(where, name, kind))
+        if isinstance(name, int):
+            if page.description(name) is None:
+                raise KeymapError("{}: unknown {} usage code {!r}".format(where, kind, name))
+            return name
+        if not isinstance(name, str) or name not in page:
+            raise KeymapError("{}: unknown {} usage {!r}".format(where, kind, name))
+        return page.code(name)
+
+    return _compile
+
+
+_keyboard_usage = _usage("Keyboard", "keyboard")
+
+
+def _macro(compile_chords):
+    def _compile(arg, where):
+        try:
+            return compile_chords(arg)
+        except (TypeError, ValueError) as ex:
+            raise KeymapError("{}: {}".format(where, ex))
+
+    return _compile
+
+
+def _text_chords(text):
+    from hid.macro import text_chords
+
+    if not isinstance(text, str):
+        raise ValueError("text must be a string")
+    return text_chords(text)
+
+
+def _sequence_chords(steps):
+    from hid.macro import sequence_chords
+
+    if not isinstance(steps, list):
+        raise ValueError("sequence must be a list of steps")
+    return sequence_chords(steps)
+
+
+# Action kind -> function compiling the action's argument into something JSON-serialisable.
+ACTION_COMPILERS = {
+    "keyboard": _keyboard_usage,
+    "consumer": _usage("Consumer", "consumer"),
+    "system": _usage("GenericDesktop", "system"),
+    "text": _macro(_text_chords),
+    "sequence": _macro(_sequence_chords),
+}
+
+
+def _compile_action(action, where):
+    if action is None:
+        return []
+    if isinstance(action, (str, int)):
+        return [["keyboard", _keyboard_usage(action, where)]]
+    if isinstance(action, list):
+        return [a for item in action for a in _compile_action(item, where)]
+    if isinstance(action, dict):
+        compiled = []
+        for (kind, arg) in action.items():
+            if kind not in ACTION_COMPILERS:
+                raise KeymapError("{}: unknown action {!r}".format(where, kind))
+            compiled.append([kind, ACTION_COMPILERS[kind](arg, where)])
+        return compiled
+    raise KeymapError("{}: can't understand action {!r}".format(where, action))
+
+
+def compile_keymap(keymap, key_count=12):
+    """
+    Validate a parsed keymap and compile it.
+
+    :param keymap: Keymap, as loaded from JSON.
+    :param key_count: Number of keys, including the layer key, if the keymap doesn't have a layout.
+    :return: Compiled keymap: a dict with "layout", "leds" and "layers", where layers is a list of
+        [layer number, [actions for each key from key 1]], and each key's actions are a list of [kind, argument].
+    """
+    if not isinstance(keymap, dict):
+        raise KeymapError("keymap must be a JSON object")
+
+    layout = keymap.get("layout")
+    if layout is not None:
+        if not isinstance(layout, list) or not all(
+            isinstance(k, list) and len(k) == 2 and all(isinstance(n, int) for n in k) for k in layout
+        ):
+            raise KeymapError("layout must be a list of [led index, gpio] pairs")
+        key_count = len(layout)
+
+    leds = keymap.get("leds", {})
+    if not isinstance(leds, dict):
+        raise KeymapError("leds must be a JSON object")
+
+    layers = keymap.get("layers")
+    if not isinstance(layers, dict) or not layers:
+        raise KeymapError("layers must be a non-empty JSON object")
+
+    compiled_layers = []
+    for (name, actions) in layers.items():
+        try:
+            layer = int(name)
+        except ValueError:
+            raise KeymapError("layer {!r}: layer names must be numbers".format(name))
+        if not 1 <= layer < key_count:
+            raise KeymapError("layer {}: must be between 1 and {}".format(layer, key_count - 1))
+        if not isinstance(actions, list) or len(actions) > key_count - 1:
+            raise KeymapError("layer {}: must be a list of at most {} actions".format(layer, key_count - 1))
+
+        compiled_layers.append([
+            layer,
+            [_compile_action(a, "layer {}, key {}".format(layer, i + 1)) for (i, a) in enumerate(actions)],
+        ])
+
+    return {
+        "layout": layout,
+        "leds": leds,
+        "layers": sorted(compiled_layers),
+    }
+
+
+def _compiler_fingerprint():
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for name in _COMPILER_SOURCES:
+            with open(os.path.join(base, name), "rb") as f:
+                h.update(f.read())
+        _fingerprint = h.hexdigest()[:16]
+    return _fingerprint
+
+
+def _prune_cache(cache_dir, prefix, keep):
+    for name in os.listdir(cache_dir):
+        # keymap-v* entries predate the path hash in the name, and could belong to any keymap.
+        if name.startswith((prefix, "keymap-v")) and name.endswith(".json") and name != keep:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError as ex:
+                log.warning("Couldn't remove stale keymap cache %s: %s", name, ex)
+
+
+def load(path, cache_dir=None):
+    """
+    Load and compile a keymap file, using the on-disk cache if possible.
+
+    :param path: Path to the keymap JSON.
+    :param cache_dir: Directory to cache compiled keymaps in, or None to not cache.
+    :return: Compiled keymap (see compile_keymap).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    cache_path = None
+    if cache_dir is not None:
+        prefix = "keymap-{}-".format(hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16])
+        digest = hashlib.sha256(data).hexdigest()
+        cache_name = "{}v{}-{}-{}.json".format(prefix, _CACHE_VERSION, _compiler_fingerprint(), digest)
+        cache_path = os.path.join(cache_dir, cache_name)
+        try:
+            with open(cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    try:
+        keymap = json.loads(data)
+    except ValueError as ex:
+        raise KeymapError("{}: {}".format(path, ex))
+    compiled = compile_keymap(keymap)
+
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = "{}.{}.tmp".format(cache_path, os.getpid())
+            with open(tmp, "w") as f:
+                json.dump(compiled, f)
+            os.replace(tmp, cache_path)
+            _prune_cache(cache_dir, prefix, cache_name)
+        except OSError as ex:
+            log.warning("Couldn't cache compiled keymap: %s", ex)
+
+    return compiled
+
+
+def _combine(handlers, reports):
+    def _handle(event, key):
+        for r in reports:
+            r.begin()
+        try:
+            for h in handlers:
+                h(event, key)
+        finally:
+            for r in reports:
+                r.commit()
+
+    return _handle
+
+
+def build_layers(compiled, reports):
+    """
+    Turn a compiled keymap into Keypad layers.
+
+    :param compiled: Compiled keymap.
+    :param reports: dict of action kind -> report (or MacroPlayer) handling it, e.g. {"keyboard": BitmapReport}.
+    :return: dict of layer number -> list of handlers for keys 1 onwards (None for unmapped keys), ready for
+        Keypad.add_layer.
+    """
+    layers = {}
+    for (layer, keys) in compiled["layers"]:
+        row = []
+        for actions in keys:
+            handlers = []
+            used = []
+            for (kind, arg) in actions:
+                report = reports.get(kind)
+                if report is None:
+                    raise KeymapError("layer {}: {} actions aren't enabled".format(layer, kind))
+                handlers.append(report.key_handler(arg))
+                if hasattr(report, "begin") and report not in used:
+                    used.append(report)
+            if not handlers:
+                row.append(None)
+            elif len(handlers) == 1:
+                row.append(handlers[0])
+            else:
+                row.append(_combine(handlers, used))
+        layers[layer] = row
+    return layers
@@ -2,28 +2,99 @@
 Library for using GPIO pins as buttons.
 """
 
+import logging
+import threading
+import time
+
 from gpiozero import Button
 
+log = logging.getLogger(__name__)
+
+PRESSED = "pressed"
+RELEASED = "released"
+HELD = "held"
+
+
+class KeyEvent:
+    """
+    Something that happened to a key: PRESSED, RELEASED or HELD, and when.
+
+    Has is_pressed and is_held like a gpiozero Button, so handlers written against buttons keep working, but unlike the
+    button these describe the edge that caused the event rather than whatever the pin reads now.
+    """
+
+    __slots__ = ("type", "timestamp")
+
+    def __init__(self, type, timestamp):
+        """
+        :param type: PRESSED, RELEASED or HELD.
+        :param timestamp: time.monotonic() time of the edge.
+        """
+        self.type = type
+        self.timestamp = timestamp
+
+    @property
+    def is_pressed(self):
+        return self.type != RELEASED
+
+    @property
+    def is_held(self):
+        return self.type == HELD
+
+    def __repr__(self):
+        return "KeyEvent({}, {:.6f})".format(self.type, self.timestamp)
+
 
 class Key:
     """
     GPIO pin handler, with HID keycode sending and arbitrary handler methods.
+
+    Edges are debounced: the first edge after the key has been stable for `debounce` seconds is reported straight
+    away, further edges inside the window are ignored, and the pin is read once more when the window closes in case
+    it settled somewhere other than where it started.
     """
 
-    def __init__(self, num, gpio, handler=None):
+    def __init__(self, num, gpio, handler=None, pin_factory=None, debounce=0.005, clock=time.monotonic, bind=True):
         """
         Set up the key.
 
         :param gpio: GPIO pin to bind to.
         :param handler: Optional handler method.
+        :param pin_factory: Optional gpiozero pin factory, e.g. a MockFactory for running off-device.
+        :param debounce: Debounce window in seconds. 0 disables debouncing.
+        :param clock: Clock used to timestamp edges.
+        :param bind: If True, watch the pin with a gpiozero Button. If False, something else (e.g. a
+            keyscan.KeyScanner) is responsible for reading the pin and calling edge() and hold().
         """
         self.gpio = gpio
         self.handler = handler
         self.num = num
-        self.button = Button(self.gpio)
-        self.button.when_pressed = self._handler
-        self.button.when_released = self._handler
-        self.button.when_held = self._handler
+        self.debounce = debounce
+        self.clock = clock
+
+        self.pressed = False
+        self.level = False
+        self.chatter = 0
+        self._last_edge = None
+        self._settle_timer = None
+        self._lock = threading.Lock()
+
+        self.button = None
+        if bind:
+            self.button = Button(self.gpio, pin_factory=pin_factory)
+            self.button.when_pressed = self._on_pressed
+            self.button.when_released = self._on_released
+            self.button.when_held = self._on_held
+
+        # Optional metrics.Histograms to record handler times in, and the time from each edge (as timestamped by clock)
+        # to its handler returning, which includes debouncing and any hand-off queueing.
+        self.timer = None
+        self.latency_timer = None
+
+        # Optional function(callback, *args) that edges seen on gpiozero and debounce timer threads are passed to, so
+        # they can be handled somewhere else, e.g. an event loop's call_soon_threadsafe. If None, they are handled on
+        # the thread that saw them.
+        self.handoff = None
 
     def add_handler(self, handler):
         """
@@ -31,60 +102,244 @@ class Key:
 
         If a handler already exists, this handler will *replace* the existing one.
 
-        :param handler: handler function to call. Should take a single argument which is passed the GPIO button.
+        :param handler: handler function to call. Takes two arguments: the KeyEvent and this Key.
         """
         if handler is not None:
             self.handler = handler
 
-    def _handler(self, button):
+    def edge(self, pressed, timestamp=None):
+        """
+        Feed an edge into the debouncer.
+
+        :param pressed: True if the key went down, False if it came up.
+        :param timestamp: Time of the edge. If None, now.
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+
+        with self._lock:
+            self.level = pressed
+            if pressed == self.pressed:
+                return
+            if self._last_edge is not None and timestamp - self._last_edge < self.debounce:
+                self.chatter += 1
+                if self._settle_timer is None:
+                    self._settle_timer = threading.Timer(self._last_edge + self.debounce - timestamp, self._settle)
+                    self._settle_timer.daemon = True
+                    self._settle_timer.start()
+                return
+            self._last_edge = timestamp
+            self.pressed = pressed
+
+        self._dispatch(KeyEvent(PRESSED if pressed else RELEASED, timestamp))
+
+    def hold(self, timestamp=None):
+        """
+        Report that the key has been held down.
+
+        :param timestamp: Time the key became held. If None, now.
+        """
+        if self.pressed:
+            self._dispatch(KeyEvent(HELD, self.clock() if timestamp is None else timestamp))
+
+    def _settle(self):
+        with self._lock:
+            self._settle_timer = None
+            level = self.button.is_pressed if self.button is not None else self.level
+        self._from_thread(self.edge, level, self.clock())
+
+    def _on_pressed(self):
+        self._from_thread(self.edge, True, self.clock())
+
+    def _on_released(self):
+        self._from_thread(self.edge, False, self.clock())
+
+    def _on_held(self):
+        self._from_thread(self.hold, self.clock())
+
+    def _from_thread(self, fn, *args):
+        handoff = self.handoff
+        if handoff is None:
+            fn(*args)
+        else:
+            handoff(fn, *args)
+
+    def _dispatch(self, event):
         if self.handler is not None:
-            self.handler(button, self)
+            timer = self.timer
+            if timer is None:
+                self.handler(event, self)
+            else:
+                start = time.perf_counter()
+                self.handler(event, self)
+                timer.time(start)
+            if self.latency_timer is not None:
+                self.latency_timer.observe(self.clock() - event.timestamp)
 
 
 class Keypad:
     """
     A collection of keys.
 
-    TODO: Make this more useful.
+    Key 0 is the layer key. Every other key is dispatched through a table compiled from the layers: one preallocated
+    row per layer, indexed by key number, so handling an event is a single list index and switching layers just
+    swaps the active row.
+
+    Layer selection is a small state machine:
+
+        IDLE --layer key pressed--> SELECTING --layer key released--> IDLE
+        SELECTING --key n pressed (n is a layer)--> SELECTING, with layer n active
+
+    A key's release always goes to the handler that saw its press, even if the layer changed in between, so keys
+    can't get stuck down on the host.
     """
 
-    def __init__(self, keys):
+    IDLE = "idle"
+    SELECTING = "selecting"
+
+    def __init__(self, keys, reports=()):
         """
         Create this.
 
         :param keys: A list of Keys.
+        :param reports: Reports the key handlers write to. Changes handled together by handle_changes() are batched
+            into one send per report.
         """
-        self._in_layer_select = False
+        self.state = Keypad.IDLE
         self.current_layer = 1
         self.keys = keys
+        self.reports = list(reports)
         self.layers = {}
+        self._listeners = []
+        self._key_listeners = []
+
+        self._rows = {}
+        self._empty_row = [None for _ in keys]
+        self._active = self._empty_row
+        self._held = [None for _ in keys]
 
         self.keys[0].add_handler(self._layer_button_handler)
-        for i in range(1,12):
-            self.keys[i].add_handler(self._key_handler)
+        for k in self.keys[1:]:
+            k.add_handler(self._key_handler)
+
+    def add_listener(self, listener, key_events=True):
+        """
+        Adds a function to be called whenever a key event is handled or the layer changes.
+
+        :param listener: function to call. Takes a single argument which is passed this Keypad.
+        :param key_events: False to only be called when the layer or the layer selection state changes, which keeps
+            the call off the path of every key press.
+        """
+        self._listeners.append(listener)
+        if key_events:
+            self._key_listeners.append(listener)
 
     def add_layer(self, layer, handlers):
+        """
+        Adds (or replaces) a layer.
+
+        :param layer: Layer number. Selected by holding the layer key and pressing key `layer`.
+        :param handlers: Handlers for keys 1 onwards: handlers[n] handles key n + 1. None leaves a key unmapped.
+        """
+        row = self._compile_row(layer, handlers)
         self.layers[layer] = handlers
+        self._rows[layer] = row
+        if layer == self.current_layer:
+            self._active = row
+
+    def set_layers(self, layers):
+        """
+        Replace every layer at once, e.g. after the keymap has been reloaded.
+
+        The new dispatch table is built aside and swapped in with a single assignment, so a key event handled at the
+        same time sees either the old layers or the new ones. Keys that are down keep the handler that saw their
+        press, so they are released through the old layer and nothing is left stuck down on the host.
+
+        :param layers: dict of layer number -> handlers, as for add_layer.
+        """
+        rows = {}
+        for (layer, handlers) in layers.items():
+            rows[layer] = self._compile_row(layer, handlers)
+
+        layer = self.current_layer
+        if layer not in rows:
+            layer = min(rows) if rows else self.current_layer
+        self.layers = dict(layers)
+        self._rows = rows
+        self._active = rows.get(layer, self._empty_row)
+        self.current_layer = layer
+        self._notify()
 
     def select_layer(self, layer_index):
-        self.current_layer = self.layers[layer_index]
-
-    def _layer_button_handler(self, button, key):
-        if button.is_held:
-            pass
-        elif button.is_pressed:
-            self._in_layer_select = True
-            print("entering layer select mode")
-        else:
-            self._in_layer_select = False
-            print("exiting layer select mode, layer is now {}".format(self.current_layer))
-
-    def _key_handler(self, button, key):
-        if self._in_layer_select:
-            if button.is_held:
-                pass
-            elif button.is_pressed:
-                if key.num in self.layers:
-                    self.current_layer = key.num
-        else:
-            self.layers[self.current_layer][key.num - 1](button, key)
+        """
+        Make a layer the active one.
+
+        :param layer_index: Layer number, as passed to add_layer.
+        """
+        self._active = self._rows[layer_index]
+        self.current_layer = layer_index
+
+    def _compile_row(self, layer, handlers):
+        if len(handlers) > len(self.keys) - 1:
+            raise ValueError("Layer {} has {} handlers but there are only {} keys".format(
+                layer, len(handlers), len(self.keys) - 1))
+
+        row = [None] + list(handlers)
+        row += [None] * (len(self.keys) - len(row))
+        return row
+
+    def _layer_button_handler(self, event, key):
+        if event.type == PRESSED:
+            self.state = Keypad.SELECTING
+            log.info("entering layer select mode")
+        elif event.type == RELEASED:
+            self.state = Keypad.IDLE
+            log.info("exiting layer select mode, layer is now %s", self.current_layer)
+        self._notify()
+
+    def _key_handler(self, event, key):
+        num = key.num
+        type = event.type
+        if type == PRESSED:
+            if self.state == Keypad.SELECTING:
+                row = self._rows.get(num)
+                if row is not None:
+                    self._active = row
+                    self.current_layer = num
+                    self._notify()
+                return
+            handler = self._active[num]
+            if handler is not None:
+                self._held[num] = handler
+                handler(event, key)
+        elif type == RELEASED:
+            handler = self._held[num]
+            if handler is not None:
+                self._held[num] = None
+                handler(event, key)
+        elif self.state != Keypad.SELECTING:
+            handler = self._held[num]
+            if handler is not None:
+                handler(event, key)
+        for listener in self._key_listeners:
+            listener(self)
+
+    def handle_changes(self, changes, timestamp=None):
+        """
+        Handle a batch of key changes that were seen at the same time, e.g. by one scan of every pin.
+
+        :param changes: Iterable of (key index, pressed).
+        :param timestamp: Time the changes were seen. If None, now.
+        """
+        for r in self.reports:
+            r.begin()
+        try:
+            for (index, pressed) in changes:
+                self.keys[index].edge(pressed, timestamp)
+        finally:
+            for r in self.reports:
+                r.commit()
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener(self)
@@ -0,0 +1,238 @@
+"""
+Batched key scanning: read every key pin in one operation and report what changed as a single change set.
+
+This is an alternative to giving every Key its own gpiozero Button (and edge callback). A scanner thread samples all
+the pins together, diffs against the previous sample, and hands the changes to Keypad.handle_changes() in one go.
+
+Level readers return a bitmask with bit n set if key n is pressed:
+
+- GpiodLevels: one libgpiod line request for every pin (needs the gpiod module, libgpiod 2.x bindings).
+- GpioMemLevels: one read of the GPLEV0 register through /dev/gpiomem (BCM2835..BCM2711 Pis only, pins 0..31).
+- PinFactoryLevels: reads each pin through gpiozero in turn. Not batched, but works with any pin factory, including
+  gpiozero's MockFactory.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Offset of GPLEV0 (pin levels for GPIO 0..31) in the BCM283x GPIO register block.
+_GPLEV0 = 0x34
+
+
+class GpiodLevels:
+    """
+    Reads every key pin with one libgpiod request.
+    """
+
+    def __init__(self, pins, chip="/dev/gpiochip0"):
+        """
+        :param pins: GPIO line for each key, in key order.
+        :param chip: GPIO chip device.
+        """
+        import gpiod
+        from gpiod.line import Bias, Direction
+
+        self.pins = list(pins)
+        settings = gpiod.LineSettings(direction=Direction.INPUT, bias=Bias.PULL_UP, active_low=True)
+        self._request = gpiod.request_lines(chip, consumer="njak", config={tuple(self.pins): settings})
+        self._active = gpiod.line.Value.ACTIVE
+
+    def read(self):
+        mask = 0
+        for (n, value) in enumerate(self._request.get_values(self.pins)):
+            if value == self._active:
+                mask |= 1 << n
+        return mask
+
+    def close(self):
+        self._request.release()
+
+
+class GpioMemLevels:
+    """
+    Reads every key pin with a single 32-bit register read.
+
+    /dev/gpiomem can't configure pull-ups, so each pin is also claimed as a gpiozero InputDevice with its pull-up on.
+    """
+
+    def __init__(self, pins, pin_factory=None, dev="/dev/gpiomem"):
+        """
+        :param pins: GPIO pin for each key, in key order. Must all be below 32.
+        :param pin_factory: Optional gpiozero pin factory used to set up the pull-ups.
+        :param dev: GPIO memory device.
+        """
+        from gpiozero import InputDevice
+
+        self.pins = list(pins)
+        if any(p >= 32 for p in self.pins):
+            raise ValueError("GpioMemLevels only supports GPIO 0..31")
+        self._inputs = [InputDevice(p, pull_up=True, pin_factory=pin_factory) for p in self.pins]
+
+        fd = os.open(dev, os.O_RDONLY | os.O_SYNC)
+        try:
+            self._mem = mmap.mmap(fd, 4096, mmap.MAP_SHARED, mmap.PROT_READ)
+        finally:
+            os.close(fd)
+
+        # Precompute (pin bit, key bit) pairs so read() is just the register load and some bit shuffling.
+        self._bits = [(1 << p, 1 << n) for (n, p) in enumerate(self.pins)]
+
+    def read(self):
+        (levels,) = struct.unpack_from("<I", self._mem, _GPLEV0)
+        mask = 0
+        for (pin_bit, key_bit) in self._bits:
+            # Keys are active low.
+            if not levels & pin_bit:
+                mask |= key_bit
+        return mask
+
+    def close(self):
+        self._mem.close()
+        for i in self._inputs:
+            i.close()
+
+
+class PinFactoryLevels:
+    """
+    Reads each key pin through gpiozero.
+    """
+
+    def __init__(self, pins, pin_factory=None):
+        """
+        :param pins: GPIO pin for each key, in key order.
+        :param pin_factory: Optional gpiozero pin factory.
+        """
+        from gpiozero import InputDevice
+
+        self._inputs = [InputDevice(p, pull_up=True, pin_factory=pin_factory) for p in pins]
+
+    def read(self):
+        mask = 0
+        for (n, i) in enumerate(self._inputs):
+            if i.is_active:
+                mask |= 1 << n
+        return mask
+
+    def close(self):
+        for i in self._inputs:
+            i.close()
+
+
+class KeyScanner:
+    """
+    Polls a level reader and feeds changes to a Keypad.
+    """
+
+    def __init__(self, keypad, levels, interval=0.001, hold_time=1.0, clock=time.monotonic):
+        """
+        :param keypad: Keypad to report changes to. Its keys should be created with bind=False.
+        :param levels: Level reader (GpiodLevels, GpioMemLevels or PinFactoryLevels).
+        :param interval: Time between scans in seconds.
+        :param hold_time: Time in seconds a key has to be down before it is reported as held.
+        :param clock: Clock used to timestamp changes.
+        """
+        self.keypad = keypad
+        self.levels = levels
+        self.interval = interval
+        self.hold_time = hold_time
+        self.clock = clock
+
+        self.scans = 0
+        self.change_sets = 0
+
+        self._state = 0
+        self._pressed_at = {}
+        self._running = False
+        self._thread = None
+
+    def scan(self):
+        """
+        Sample every key once and report any changes.
+
+        :return: List of (key index, pressed) that changed.
+        """
+        state = self.levels.read()
+        now = self.clock()
+        self.scans += 1
+
+        changed = state ^ self._state
+        changes = []
+        if changed:
+            self._state = state
+            n = 0
+            while changed:
+                if changed & 1:
+                    pressed = bool(state >> n & 1)
+                    changes.append((n, pressed))
+                    if pressed:
+                        self._pressed_at[n] = now
+                    else:
+                        self._pressed_at.pop(n, None)
+                changed >>= 1
+                n += 1
+            self.change_sets += 1
+            self.keypad.handle_changes(changes, now)
+
+        if self._pressed_at:
+            for (n, since) in list(self._pressed_at.items()):
+                if now - since >= self.hold_time:
+                    del self._pressed_at[n]
+                    self.keypad.keys[n].hold(now)
+
+        return changes
+
+    def start(self):
+        """
+        Start scanning on a background thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="key-scanner", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread, or run_async().
+        """
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        deadline = self.clock()
+        while self._running:
+            try:
+                self.scan()
+            except Exception as ex:
+                log.error("Key scan failed: %s", ex)
+            deadline += self.interval
+            delay = deadline - self.clock()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = self.clock()
+
+    async def run_async(self):
+        """
+        Scan until stop() is called, as a task on an asyncio event loop instead of a thread.
+        """
+        self._running = True
+        deadline = self.clock()
+        while self._running:
+            try:
+                self.scan()
+            except Exception as ex:
+                log.error("Key scan failed: %s", ex)
+            deadline += self.interval
+            delay = deadline - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                deadline = self.clock()
+                await asyncio.sleep(0)
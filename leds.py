@@ -3,27 +3,50 @@ Classes for working with lights.
 """
 
 import atexit
-from spidev import SpiDev
+import time
+
+try:
+    from spidev import SpiDev
+except ImportError:
+    SpiDev = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 START_OF_FRAME = 0xE0
 MAX_BRIGHTNESS = 0x1F
 
+# Bytes of 0x00 before the first LED, and the minimum number of 0xFF bytes after the last one.
+START_FRAME_LEN = 8
+END_FRAME_LEN = 8
+
 
 class Pixel:
     """
     An individual LED from a chain of APA102 LEDs
     """
 
-    def __init__(self, n, brightness=0x00):
+    def __init__(self, n, brightness=0x00, buf=None):
         """
         Constructor
 
         :param n: LED number. Entirely informational, is not used anywhere.
         :param brightness: initial global brightness, defaults to 0 (off). See set_brightness for additional info.
+        :param buf: Optional 4 byte writable buffer (e.g. a memoryview into a Lights frame) to hold the LED data. If
+            None, the pixel gets its own.
         """
-        self.brightness = brightness & ~START_OF_FRAME
         self.n = n
-        self.buf = bytearray([START_OF_FRAME, 0, 0, 0])
+        self.buf = bytearray(4) if buf is None else buf
+        self.buf[0] = START_OF_FRAME | (brightness & ~START_OF_FRAME)
+
+    @property
+    def brightness(self):
+        """
+        The current global brightness.
+        """
+        return self.buf[0] & ~START_OF_FRAME
 
     def set(self, r, g, b, brightness=None):
         """
@@ -35,8 +58,7 @@ class Pixel:
         :param brightness: Optional global brightness. If None (default) uses the existing global brightness.
         """
         if brightness is not None:
-            self.brightness = brightness & ~START_OF_FRAME
-            self.buf[0] = START_OF_FRAME | self.brightness
+            self.buf[0] = START_OF_FRAME | (brightness & ~START_OF_FRAME)
         self.buf[1] = b
         self.buf[2] = g
         self.buf[3] = r
@@ -47,8 +69,7 @@ class Pixel:
 
         :param brightness:  New global brightness. Valid range is [0x00..0x1F], anything else will be truncated.
         """
-        self.brightness = brightness & ~START_OF_FRAME
-        self.buf[0] = START_OF_FRAME | self.brightness
+        self.buf[0] = START_OF_FRAME | (brightness & ~START_OF_FRAME)
 
     def get(self):
         """
@@ -72,21 +93,71 @@ class Lights:
     A collection of APA102 LEDs.
     """
 
-    def __init__(self, led_indexes):
+    def __init__(self, led_indexes, spi=None, min_interval=0.0, max_interval=1.0):
         """
         Create the LED controller.
 
+        The whole SPI transfer (start frame, 4 bytes per LED, end frame) lives in one preallocated buffer. Pixels are
+        views into it, so show() sends it as-is without building anything per frame.
+
+        show() only sends a frame when something changed since the last one, subject to the refresh interval limits.
+
         :param led_indexes: physical -> logical LED mapping: led_indexes[n] = LED number
+        :param spi: Optional SPI device to send frames to. If None, opens SPI bus 0, device 0.
+        :param min_interval: Minimum time in seconds between frames. Changes made sooner are sent on a later show().
+        :param max_interval: Maximum time in seconds between frames. An unchanged frame is resent after this long as
+            a keep-alive. None never resends.
         """
-        self.spi = SpiDev()
-        self.spi.open(0, 0)
-        self.spi.max_speed_hz = 1000000
+        if spi is None:
+            if SpiDev is None:
+                raise RuntimeError("spidev is not installed")
+            spi = SpiDev()
+            spi.open(0, 0)
+            spi.max_speed_hz = 1000000
+        self.spi = spi
+
+        count = len(led_indexes)
+        # The end frame needs at least one clock edge per two LEDs to push the data down the whole chain.
+        end_len = max(END_FRAME_LEN, (count + 15) // 16)
+        self._frame = bytearray(START_FRAME_LEN + 4 * count + end_len)
+        self._frame[START_FRAME_LEN + 4 * count:] = b"\xFF" * end_len
+        self.frame = memoryview(self._frame)
 
-        self.pixels = [Pixel(n) for n in range(len(led_indexes))]
+        self.pixels = [
+            Pixel(n, buf=self.frame[START_FRAME_LEN + 4 * n:START_FRAME_LEN + 4 * (n + 1)])
+            for n in range(count)
+        ]
         self.mapping = led_indexes
 
+        # spidev >= 3.4 can send straight from a buffer; older versions need a list.
+        self._write = getattr(self.spi, "writebytes2", None)
+
+        # Copy of the last frame sent, to tell whether anything changed.
+        self._sent = bytearray(len(self._frame))
+        self._last_show = None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+        # Optional metrics.Histogram to record SPI transfer times in.
+        self.frame_timer = None
+
+        # numpy view of the pixel data and the logical -> physical permutation, created on first bulk update.
+        self._pixel_array = None
+        self._order = None
+
         atexit.register(self._on_exit)
 
+    def pixel_offset(self, index):
+        """
+        Gets the offset of a pixel's data in the frame buffer.
+
+        :param index: logical index of the LED
+        :return: Offset of the pixel's brightness byte. It is followed by blue, green and red.
+        """
+        return START_FRAME_LEN + 4 * self.mapping[index]
+
     def set_pixel(self, index, r, g, b, brightness=None):
         """
         Set pixel colour.
@@ -100,6 +171,47 @@ class Lights:
         pixel = self.get_pixel(index)
         pixel.set(r, g, b, brightness)
 
+    def set_pixels(self, colours, brightness=None):
+        """
+        Set every pixel at once from a numpy array. Requires numpy.
+
+        :param colours: Array of shape (N, 3) holding R, G, B or (N, 4) holding brightness, R, G, B for each LED, in
+            logical order.
+        :param brightness: Optional global brightness for every LED, if colours doesn't include it. If None (default)
+            uses the existing global brightness.
+        """
+        pixels = self._pixels_view()
+        colours = numpy.asarray(colours, dtype=numpy.uint8)
+        if colours.ndim != 2 or colours.shape[0] != len(self._order) or colours.shape[1] not in (3, 4):
+            raise ValueError("Expected an array of shape ({0}, 3) or ({0}, 4), got {1}".format(
+                len(self._order), colours.shape))
+
+        # Frame order is brightness, B, G, R.
+        pixels[self._order, 1:4] = colours[:, :-4:-1]
+        if colours.shape[1] == 4:
+            pixels[self._order, 0] = START_OF_FRAME | (colours[:, 0] & MAX_BRIGHTNESS)
+        elif brightness is not None:
+            pixels[:, 0] = START_OF_FRAME | (round(brightness) & MAX_BRIGHTNESS)
+
+    def get_pixels(self):
+        """
+        Get every pixel's colour as a numpy array. Requires numpy.
+
+        :return: Array of shape (N, 3) holding R, G, B for each LED, in logical order.
+        """
+        return self._pixels_view()[self._order, :-4:-1].copy()
+
+    def _pixels_view(self):
+        if self._pixel_array is None:
+            if numpy is None:
+                raise RuntimeError("numpy is not installed")
+            count = len(self.pixels)
+            self._pixel_array = numpy.frombuffer(
+                self._frame, dtype=numpy.uint8, count=4 * count, offset=START_FRAME_LEN
+            ).reshape(count, 4)
+            self._order = numpy.asarray(self.mapping, dtype=numpy.intp)
+        return self._pixel_array
+
     def set_brightness(self, brightness, index=None):
         """
         Set global brightness.
@@ -130,17 +242,42 @@ class Lights:
         for p in self.pixels:
             p.set(0, 0, 0)
 
-    def show(self):
+    @property
+    def dirty(self):
         """
-        Send the current pixel data to the LEDs
+        True if the frame has changed since it was last sent.
         """
-        buf = [0x00 for _ in range(8)]
-        for p in self.pixels:
-            buf += p.raw()
+        return self._frame != self._sent
+
+    def show(self, force=False):
+        """
+        Send the current pixel data to the LEDs, if it has changed or a keep-alive is due.
+
+        :param force: Send the frame regardless of whether it changed or when the last one was sent.
+        :return: True if a frame was sent, False if it was skipped.
+        """
+        now = time.monotonic()
+        if not force and self._last_show is not None:
+            elapsed = now - self._last_show
+            if elapsed < self.min_interval or (
+                self._frame == self._sent and (self.max_interval is None or elapsed < self.max_interval)
+            ):
+                self.frames_skipped += 1
+                return False
 
-        buf += [0xFF for _ in range(8)]
-        self.spi.xfer2(buf)
+        timer = self.frame_timer
+        start = time.perf_counter() if timer is not None else 0
+        if self._write is not None:
+            self._write(self._frame)
+        else:
+            self.spi.xfer2(list(self._frame))
+        if timer is not None:
+            timer.time(start)
+        self._sent[:] = self._frame
+        self._last_show = now
+        self.frames_sent += 1
+        return True
 
     def _on_exit(self):
         self.clear()
-        self.show()
+        self.show(force=True)
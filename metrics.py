@@ -0,0 +1,209 @@
+"""
+Lightweight metrics for the njak daemon.
+
+Counters and histograms are cheap enough to update from hot paths: an integer add, or a bit_length() and a list
+increment. Anything that is already counted elsewhere (e.g. HidGadget.reports_sent) is exposed as a gauge that reads
+it when metrics are collected, so it costs nothing in between.
+
+Metrics are served as plain text, one "name value" per line, over a Unix socket and optionally TCP (e.g. bound to the
+RNDIS address set up by init-usb-gadgets.sh):
+
+    socat - UNIX-CONNECT:/tmp/njak-metrics.sock
+    nc 10.0.0.2 9100
+"""
+
+import logging
+import os
+import socketserver
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Histogram buckets are powers of two microseconds: bucket k holds values in [2^(k-1), 2^k) us.
+_BUCKETS = 26
+
+
+class Counter:
+    """
+    A value that only goes up.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def collect(self, name):
+        return [(name, self.value)]
+
+
+class Gauge:
+    """
+    A value read from a function whenever metrics are collected.
+    """
+
+    def __init__(self, fn):
+        """
+        :param fn: Function taking no arguments and returning a number.
+        """
+        self.fn = fn
+
+    def collect(self, name):
+        return [(name, self.fn())]
+
+
+class Histogram:
+    """
+    Distribution of durations, in power-of-two microsecond buckets.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """
+        Record a duration.
+
+        :param seconds: Duration in seconds.
+        """
+        k = int(seconds * 1e6).bit_length()
+        self.buckets[k if k < _BUCKETS else _BUCKETS - 1] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def time(self, start):
+        """
+        Record the time since `start`.
+
+        :param start: Start time from time.perf_counter().
+        """
+        self.observe(time.perf_counter() - start)
+
+    def percentile(self, p):
+        """
+        Estimate a percentile.
+
+        :param p: Percentile as a fraction, e.g. 0.99.
+        :return: Upper bound of the bucket holding the percentile, in seconds.
+        """
+        if not self.count:
+            return 0.0
+        target = p * self.count
+        seen = 0
+        for (k, n) in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min((1 << k) * 1e-6, self.max)
+        return self.max
+
+    def collect(self, name):
+        return [
+            (name + "_count", self.count),
+            (name + "_sum", self.sum),
+            (name + "_p50", self.percentile(0.50)),
+            (name + "_p99", self.percentile(0.99)),
+            (name + "_p999", self.percentile(0.999)),
+            (name + "_max", self.max),
+        ]
+
+
+class Registry:
+    """
+    A named collection of metrics.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name):
+        """
+        Get or create a counter.
+        """
+        return self._metrics.setdefault(name, Counter())
+
+    def histogram(self, name):
+        """
+        Get or create a histogram.
+        """
+        return self._metrics.setdefault(name, Histogram())
+
+    def gauge(self, name, fn):
+        """
+        Create (or replace) a gauge.
+
+        :param name: Metric name.
+        :param fn: Function taking no arguments and returning the current value.
+        """
+        self._metrics[name] = Gauge(fn)
+        return self._metrics[name]
+
+    def collect(self):
+        """
+        :return: List of (name, value) for every metric.
+        """
+        values = []
+        for (name, metric) in sorted(self._metrics.items()):
+            try:
+                values += metric.collect(name)
+            except Exception as ex:
+                log.warning("Couldn't collect %s: %s", name, ex)
+        return values
+
+    def render(self):
+        """
+        :return: Every metric as text, one "name value" per line.
+        """
+        return "".join("{} {}\n".format(name, value) for (name, value) in self.collect())
+
+
+registry = Registry()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.sendall(self.server.registry.render().encode())
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TcpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MetricsServer:
+    """
+    Serves a registry's metrics to anyone who connects, then hangs up.
+    """
+
+    def __init__(self, registry=registry, unix_path=None, tcp_address=None):
+        """
+        :param registry: Registry to serve.
+        :param unix_path: Optional path of a Unix socket to listen on.
+        :param tcp_address: Optional (host, port) to listen on, e.g. the RNDIS interface address.
+        """
+        self.servers = []
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self.servers.append(_UnixServer(unix_path, _Handler))
+        if tcp_address is not None:
+            self.servers.append(_TcpServer(tcp_address, _Handler))
+
+        for server in self.servers:
+            server.registry = registry
+            threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
@@ -1,75 +1,208 @@
 #!/usr/bin/python3
 
+import logging
+import sys
 import time
 import colours
+import keymap
 import leds
+import metrics
 from config import Configuration
-from hid.usages import Keyboard
 from keys import Keypad
+from keyscan import KeyScanner
+from runtime import Runtime
+from scheduler import FrameScheduler
+from watcher import FileWatcher
+
+log = logging.getLogger(__name__)
+
+
+class LayerIndicator:
+    """
+    Turns off the LED of the key for the current layer.
+    """
+
+    animated = False
+
+    def __init__(self, lights, keypad):
+        self.lights = lights
+        self.keypad = keypad
+
+    def __call__(self, now):
+        self.lights.set_pixel(self.keypad.current_layer, 0, 0, 0)
+
+
+class LockIndicator:
+    """
+    Lights keys while the host has the matching lock LED on.
+    """
+
+    animated = False
+
+    def __init__(self, lights, lock_leds, colour):
+        """
+        :param lights: Lights to draw on.
+        :param lock_leds: {host LED usage: key index}.
+        :param colour: (r, g, b) for lit keys.
+        """
+        self.lights = lights
+        self.lock_leds = lock_leds
+        self.colour = colour
+        self.leds = frozenset()
+
+    def update(self, leds):
+        self.leds = leds
+
+    def __call__(self, now):
+        for (usage, index) in self.lock_leds.items():
+            if usage in self.leds:
+                self.lights.set_pixel(index, *self.colour)
 
 
 class Njak:
     def __init__(self, config):
         self.config = config
 
-        self.keypad = Keypad(config.keymap)
-        self.lights = leds.Lights(config.ledmap)
+        self.keypad = Keypad(config.keymap, config.reports)
+        self.lights = leds.Lights(config.ledmap, spi=config.spi)
 
         self.lights.clear()
-        self.lights.set_brightness(leds.MAX_BRIGHTNESS / 10)
+        self.lights.set_brightness(leds.MAX_BRIGHTNESS * config.brightness)
         self.lights.show()
 
-        self.cycle = colours.ColourCycler(1000, 12, 12)
-
-        l1 = [
-            Keyboard.KEY_KP0,
-            Keyboard.KEY_KPENTER,
-            Keyboard.KEY_KP1,
-            Keyboard.KEY_KP2,
-            Keyboard.KEY_KP3,
-            Keyboard.KEY_KP4,
-            Keyboard.KEY_KP5,
-            Keyboard.KEY_KP6,
-            Keyboard.KEY_KP7,
-            Keyboard.KEY_KP8,
-            Keyboard.KEY_KP9
-        ]
-
-        r = self.config.reports[0]
-        self.layers = [
-            [r.key_handler(key) for key in l1],
-            [r.key_handler(Keyboard.KEY_F13) for _ in range(11)]
-        ]
-        self.keypad.add_layer(1, self.layers[0])
-        self.keypad.add_layer(2, self.layers[1])
-
-    def loop(self):
-        time.sleep(0.01)
-        for (i, (r, g, b)) in enumerate(self.cycle.get_step()):
-            if i == self.keypad.current_layer:
-                self.lights.set_pixel(i, 0, 0, 0)
-            else:
-                self.lights.set_pixel(i, r, g, b)
-        self.lights.show()
-        self.cycle.next_step()
+        if config.animate_leds:
+            self.cycle = colours.ColourWheel(self.lights, period=10.0)
+        else:
+            self.cycle = colours.SolidColour(self.lights, *config.static_colour)
+
+        self.scheduler = FrameScheduler(self.lights, fps=100)
+        self.scheduler.add(self.cycle)
+        self.scheduler.add(LayerIndicator(self.lights, self.keypad))
+        self.keypad.add_listener(lambda keypad: self.scheduler.wake(), key_events=False)
+
+        self.lock_indicator = LockIndicator(self.lights, config.lock_leds, config.lock_colour)
+        self.scheduler.add(self.lock_indicator)
+        config.host_leds.add_listener(self.lock_indicator.update)
+        config.host_leds.add_listener(lambda leds: self.scheduler.wake())
+
+        self.layers = keymap.build_layers(config.compiled_keymap, config.reports_by_kind)
+        for (layer, handlers) in self.layers.items():
+            self.keypad.add_layer(layer, handlers)
+
+        self.scanner = None
+        if config.levels is not None:
+            self.scanner = KeyScanner(self.keypad, config.levels, interval=config.scan_interval)
+
+        self.watcher = None
+        if config.watch_keymap:
+            self.watcher = FileWatcher(config.keymap_file, self.reload_keymap)
+
+        self.metrics_server = None
+        if config.metrics:
+            self._setup_metrics(metrics.registry)
+
+        self.runtime = Runtime(self, config.loop) if config.loop is not None else None
+
+    def reload_keymap(self):
+        """
+        Reload the keymap file and swap its layers in, without touching the hardware.
+
+        Keys held during the reload are released through the layer they were pressed in. If the new keymap is invalid,
+        the old layers are kept. Layout and LED settings are only read at startup.
+
+        :return: True if the new layers are in use.
+        """
+        start = time.perf_counter()
+        try:
+            compiled = keymap.load(self.config.keymap_file, self.config.keymap_cache_dir)
+            layers = keymap.build_layers(compiled, self.config.reports_by_kind)
+            self.keypad.set_layers(layers)
+        except (OSError, ValueError) as ex:
+            log.error("Not reloading keymap: %s", ex)
+            return False
+
+        if compiled["layout"] is not None and [tuple(k) for k in compiled["layout"]] != self.config.layout:
+            log.warning("Keymap layout changed, restart njak to use it")
+        if compiled["leds"] != self.config.compiled_keymap["leds"]:
+            log.warning("Keymap LED settings changed, restart njak to use them")
+        self.config.compiled_keymap = compiled
+        self.layers = layers
+        log.info("Reloaded keymap in %.1f ms", (time.perf_counter() - start) * 1e3)
+        return True
+
+    def _setup_metrics(self, registry):
+        key_timer = registry.histogram("key_event_seconds")
+        latency_timer = registry.histogram("key_edge_latency_seconds")
+        for key in self.keypad.keys:
+            key.timer = key_timer
+            key.latency_timer = latency_timer
+        self.config.gadget.write_timer = registry.histogram("hid_write_seconds")
+        self.lights.frame_timer = registry.histogram("spi_frame_seconds")
+
+        gadget = self.config.gadget
+        registry.gauge("hid_reports_sent", lambda: gadget.reports_sent)
+        registry.gauge("hid_reports_refused", lambda: gadget.reports_refused)
+        registry.gauge("hid_reopens", lambda: gadget.reopens)
+
+        sender = self.config.sender
+        registry.gauge("sender_queue_depth", lambda: sender.depth)
+        registry.gauge("sender_queue_max_depth", lambda: sender.max_seen_depth)
+        registry.gauge("sender_coalesced", lambda: sender.coalesced)
+        registry.gauge("sender_merged", lambda: sender.merged)
+        registry.gauge("sender_dropped", lambda: sender.dropped)
+
+        if self.config.boot_report is not None:
+            keyboard = self.config.reports[0]
+            boot_report = self.config.boot_report
+            registry.gauge("hid_boot_mode", lambda: int(keyboard.boot_mode))
+            registry.gauge("hid_boot_mirrored", lambda: keyboard.mirrored)
+            registry.gauge("hid_boot_rollovers", lambda: boot_report.rollovers)
+
+        host_leds = self.config.host_leds
+        registry.gauge("host_led_reports", lambda: host_leds.reports)
+
+        lights = self.lights
+        registry.gauge("led_frames_sent", lambda: lights.frames_sent)
+        registry.gauge("led_frames_skipped", lambda: lights.frames_skipped)
+
+        scheduler = self.scheduler
+        for name in ("fps", "frame_p50", "frame_p99", "dropped", "overruns", "errors"):
+            registry.gauge("scheduler_" + name, lambda name=name: scheduler.stats()[name])
+
+        self.metrics_server = metrics.MetricsServer(
+            registry, unix_path=self.config.metrics_socket, tcp_address=self.config.metrics_tcp)
+
+    def run(self):
+        """
+        Start reading keys, host LEDs and keymap changes, and render LED frames until the scheduler is stopped.
+
+        With the asyncio runtime everything runs on the configuration's event loop. Otherwise, each input has a thread
+        of its own and frames are rendered on this one.
+        """
+        if self.runtime is not None:
+            self.runtime.run()
+            return
+
+        if self.scanner is not None:
+            self.scanner.start()
+        self.config.host_leds.start()
+        if self.watcher is not None:
+            self.watcher.start()
+        self.scheduler.run()
 
 
 if __name__ == '__main__':
-    c = Configuration()
+    logging.basicConfig(
+        level=logging.DEBUG if "--debug" in sys.argv else logging.INFO,
+        format="%(asctime)s %(name)s %(levelname)s: %(message)s",
+    )
+
+    c = Configuration(simulate="--simulate" in sys.argv)
     n = Njak(c)
 
     try:
-        msg = ""
-        while True:
-            try:
-                n.loop()
-            except KeyboardInterrupt:
-                raise
-            except Exception as ex:
-                new_msg = "Loop exception: {}".format(ex)
-                if not new_msg == msg:
-                    msg = new_msg
-                    print(msg)
-
+        n.run()
     except KeyboardInterrupt:
         pass
+    finally:
+        logging.info("Frame stats: %s", n.scheduler.stats())
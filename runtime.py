@@ -0,0 +1,81 @@
+"""
+Run njak on a single asyncio event loop.
+
+Key events, HID writes, host LED reports, keymap reloads and the LED frame clock are all handled on the loop's thread,
+so report and layer state is only ever touched from one place. Threads are only left at the hardware boundaries:
+
+- gpiozero edge and hold callbacks, and debounce timers, run on their own threads and pass the event (with the time
+  it was seen) to the loop with call_soon_threadsafe().
+- The keymap watcher blocks on inotify on its own thread and asks the loop to do the reload.
+- The metrics server answers on its own thread, but only reads counters.
+
+HID reports are written by hid.sender.LoopSender, which waits for the gadget with loop.add_writer() rather than a
+thread, and host LED reports are read with loop.add_reader().
+"""
+
+import asyncio
+import logging
+import signal
+
+log = logging.getLogger(__name__)
+
+
+class Runtime:
+    """
+    Runs an Njak's input, HID, LED and host report handling as tasks on an event loop.
+    """
+
+    def __init__(self, njak, loop):
+        """
+        Route key events to the loop. Anything seen before run() is queued on the loop until it starts.
+
+        :param njak: Njak to run. Its Configuration's reports should write through LoopSenders on the same loop.
+        :param loop: asyncio event loop to run on.
+        """
+        self.njak = njak
+        self.loop = loop
+
+        for key in njak.keypad.keys:
+            key.handoff = loop.call_soon_threadsafe
+        if njak.watcher is not None:
+            reload_keymap = njak.reload_keymap
+            njak.watcher.callback = lambda: loop.call_soon_threadsafe(reload_keymap)
+
+    def run(self):
+        """
+        Run until SIGINT or SIGTERM, or until the scheduler is stopped.
+        """
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.main())
+        finally:
+            self.loop.close()
+
+    async def main(self):
+        njak = self.njak
+        config = njak.config
+        scheduler = njak.scheduler
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(sig, scheduler.stop)
+
+        scan = None
+        if njak.scanner is not None:
+            scan = self.loop.create_task(njak.scanner.run_async())
+        config.host_leds.attach(self.loop)
+        if njak.watcher is not None:
+            njak.watcher.start()
+
+        try:
+            await scheduler.run_async()
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                self.loop.remove_signal_handler(sig)
+            if scan is not None:
+                njak.scanner.stop()
+                await scan
+            config.host_leds.detach()
+            if njak.watcher is not None:
+                njak.watcher.stop()
+            for sender in config.senders:
+                sender.stop()
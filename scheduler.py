@@ -0,0 +1,215 @@
+"""
+Fixed-rate frame scheduling for LED effects.
+"""
+
+import asyncio
+import collections
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class FrameScheduler:
+    """
+    Renders registered effects and shows the result at a fixed frame rate.
+
+    Frame deadlines are kept on a monotonic clock, so render and SPI time don't make the frame rate drift. If a frame
+    runs so late that it misses whole frame slots, those slots are dropped instead of being rendered back to back.
+
+    When none of the effects are animated (an effect is assumed to be animated unless it has an `animated` attribute
+    that is False), the scheduler goes idle: it renders one frame, then blocks until wake() is called.
+    """
+
+    def __init__(self, lights, fps=100, history=1000, clock=time.monotonic, sleep=time.sleep, idle_timeout=None):
+        """
+        Set up the scheduler.
+
+        :param lights: Lights to show after each frame is rendered.
+        :param fps: Target frame rate.
+        :param history: Number of recent frames to keep timing statistics for.
+        :param clock: Monotonic clock returning seconds.
+        :param sleep: Function to sleep for a number of seconds.
+        :param idle_timeout: Longest time in seconds to stay idle without rendering a frame. If None, uses the lights'
+            keep-alive interval.
+        """
+        self.lights = lights
+        self.period = 1.0 / fps
+        self.clock = clock
+        self.sleep = sleep
+        self.effects = []
+        self.idle_timeout = idle_timeout if idle_timeout is not None else getattr(lights, "max_interval", None)
+
+        self.frames = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.errors = 0
+        self.wakeups = 0
+
+        self._starts = collections.deque(maxlen=history)
+        self._durations = collections.deque(maxlen=history)
+
+        self._running = False
+        self._last_error = None
+        self._wake = threading.Event()
+        self._loop = None
+        self._async_wake = None
+
+    def add(self, effect):
+        """
+        Register an effect. Effects are rendered in the order they were added, so later ones draw over earlier ones.
+
+        :param effect: Callable taking the frame time (in clock seconds), which updates the lights.
+        """
+        self.effects.append(effect)
+
+    @property
+    def animating(self):
+        """
+        True if any registered effect changes over time.
+        """
+        return any(getattr(e, "animated", True) for e in self.effects)
+
+    def wake(self):
+        """
+        Render a frame as soon as possible. Call this when something a static effect depends on has changed.
+
+        Safe to call from any thread.
+        """
+        self._wake.set()
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._async_wake.set)
+
+    def remove(self, effect):
+        """
+        Unregister an effect.
+
+        :param effect: The effect to remove.
+        """
+        self.effects.remove(effect)
+
+    def tick(self):
+        """
+        Render and show a single frame.
+        """
+        start = self.clock()
+        try:
+            for effect in self.effects:
+                effect(start)
+            self.lights.show()
+        except Exception as ex:
+            self.errors += 1
+            msg = "Frame exception: {}".format(ex)
+            if msg != self._last_error:
+                self._last_error = msg
+                log.error(msg)
+
+        duration = self.clock() - start
+        self._starts.append(start)
+        self._durations.append(duration)
+        self.frames += 1
+        if duration > self.period:
+            self.overruns += 1
+
+    def run(self):
+        """
+        Render frames until stop() is called.
+        """
+        self._running = True
+        deadline = self.clock()
+        while self._running:
+            if not self.animating:
+                self.tick()
+                if self._wake.wait(self.idle_timeout):
+                    self.wakeups += 1
+                self._wake.clear()
+                deadline = self.clock()
+                continue
+
+            now = self.clock()
+            if now < deadline:
+                self.sleep(deadline - now)
+            else:
+                missed = int((now - deadline) // self.period)
+                if missed:
+                    self.dropped += missed
+                    deadline += missed * self.period
+
+            self.tick()
+            deadline += self.period
+
+    async def run_async(self):
+        """
+        Render frames until stop() is called, as a task on an asyncio event loop. Works like run(), but waits on the
+        loop instead of blocking it.
+        """
+        self._async_wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+        deadline = self.clock()
+        try:
+            while self._running:
+                if not self.animating:
+                    self.tick()
+                    try:
+                        await asyncio.wait_for(self._async_wake.wait(), self.idle_timeout)
+                        self.wakeups += 1
+                    except asyncio.TimeoutError:
+                        pass
+                    self._async_wake.clear()
+                    deadline = self.clock()
+                    continue
+
+                now = self.clock()
+                if now < deadline:
+                    await asyncio.sleep(deadline - now)
+                else:
+                    missed = int((now - deadline) // self.period)
+                    if missed:
+                        self.dropped += missed
+                        deadline += missed * self.period
+                    # Running late: still let input and HID callbacks in before the next frame.
+                    await asyncio.sleep(0)
+
+                self.tick()
+                deadline += self.period
+        finally:
+            self._loop = None
+
+    def stop(self):
+        """
+        Stop run() or run_async() after the current frame.
+        """
+        self._running = False
+        self.wake()
+
+    def stats(self):
+        """
+        Timing statistics over the recent frame history.
+
+        :return: dict with the achieved fps, frame time percentiles (in seconds), and frame/drop/overrun/error counts.
+        """
+        durations = sorted(self._durations)
+        fps = 0.0
+        if len(self._starts) > 1 and self._starts[-1] > self._starts[0]:
+            fps = (len(self._starts) - 1) / (self._starts[-1] - self._starts[0])
+
+        def percentile(p):
+            if not durations:
+                return 0.0
+            return durations[min(len(durations) - 1, int(p * len(durations)))]
+
+        return {
+            "fps": fps,
+            "frame_p50": percentile(0.50),
+            "frame_p95": percentile(0.95),
+            "frame_p99": percentile(0.99),
+            "frame_max": durations[-1] if durations else 0.0,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "overruns": self.overruns,
+            "errors": self.errors,
+            "wakeups": self.wakeups,
+        }
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backends import MemoryHid
+from config import descriptor_dir
+from hid.array_report import ArrayReport
+from hid.bitmap_report import BitmapReport
+from hid.dual_report import DualReport
+from hid.sender import LoopSender, ReportSender
+from hid.usages import Keyboard
+
+
+def sent(hid):
+    return [r for (_, r) in hid.reports]
+
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def make_report(sender, boot_gadget):
+    nkro = BitmapReport.from_descriptor(sender, os.path.join(descriptor_dir, "ext_hid.bin"))
+    boot = ArrayReport.from_descriptor(boot_gadget, os.path.join(descriptor_dir, "bootkbd.bin"))
+    return DualReport(nkro, boot, sender)
+
+
+def press(report, key_code):
+    report.press(key_code)
+    report.send()
+
+
+def release(report, key_code):
+    report.release(key_code)
+    report.send()
+
+
+def test_boot_mode_drops_reports_the_nkro_interface_never_read():
+    hid = MemoryHid()
+    hid.stalled = True
+    boot_hid = MemoryHid()
+    sender = ReportSender(hid, stall_time=0.02)
+    try:
+        report = make_report(sender, boot_hid)
+        press(report, Keyboard.KEY_F2)
+        wait_until(lambda: report.mirrored)
+        release(report, Keyboard.KEY_F2)
+        wait_until(lambda: report.boot_mode)
+        # The BIOS saw the tap...
+        assert boot_hid.last_report == report.fallback.render(())
+        assert report.fallback.render([Keyboard.KEY_F2]) in sent(boot_hid)
+
+        # ...and the OS doesn't see it again once it reads the NKRO interface.
+        hid.stalled = False
+        assert sender.flush(1.0)
+    finally:
+        sender.stop()
+    assert sent(hid) == [report.primary.render(())]
+    assert sender.dropped == 2
+
+
+def test_loop_boot_mode_drops_reports_the_nkro_interface_never_read():
+    async def test(loop):
+        hid = MemoryHid()
+        hid.stalled = True
+        boot_hid = MemoryHid()
+        sender = LoopSender(hid, loop, stall_time=0.05)
+        report = make_report(sender, boot_hid)
+        press(report, Keyboard.KEY_F2)
+        await asyncio.sleep(0.02)
+        release(report, Keyboard.KEY_F2)
+        await asyncio.sleep(0.05)
+        assert report.boot_mode
+        assert boot_hid.last_report == report.fallback.render(())
+        assert report.fallback.render([Keyboard.KEY_F2]) in sent(boot_hid)
+
+        hid.stalled = False
+        await asyncio.sleep(0.01)
+        assert sent(hid) == [report.primary.render(())]
+        assert sender.dropped == 2
+        sender.stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
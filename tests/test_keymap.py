@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import keymap
+from hid.usages import Keyboard
+
+
+def compile_layer(actions):
+    return keymap.compile_keymap({"layers": {"1": actions}})
+
+
+def test_numeric_codes_without_a_name_are_accepted():
+    # Keyboard ErrorRollOver is listed by the usage tables but has no KEY_ name.
+    assert Keyboard.name(0x01) is None
+    compile_layer([0x01, Keyboard.KEY_A])
+
+
+def test_unlisted_numeric_codes_are_rejected():
+    with pytest.raises(keymap.KeymapError):
+        compile_layer([0xFFFF])
+    with pytest.raises(keymap.KeymapError):
+        compile_layer([True])
+
+
+def test_cache_keeps_other_keymaps(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = tmp_path / "first.json"
+    second = tmp_path / "second.json"
+    first.write_text(json.dumps({"layers": {"1": ["KEY_A"]}}))
+    second.write_text(json.dumps({"layers": {"1": ["KEY_B"]}}))
+
+    keymap.load(str(first), cache_dir)
+    keymap.load(str(second), cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+    # Editing a keymap replaces its own entry only.
+    first.write_text(json.dumps({"layers": {"1": ["KEY_C"]}}))
+    keymap.load(str(first), cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
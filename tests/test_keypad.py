@@ -0,0 +1,168 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from keys import HELD, PRESSED, RELEASED, Key, KeyEvent, Keypad
+from metrics import Histogram
+
+
+class Recorder:
+    """
+    Key handler that remembers what it was called with.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event, key):
+        self.events.append((event.type, key.num))
+
+
+def make_keypad(key_count=4):
+    keys = [Key(i, None, debounce=0, bind=False) for i in range(key_count)]
+    return Keypad(keys)
+
+
+def send(keypad, num, type):
+    keypad.keys[num].handler(KeyEvent(type, 0.0), keypad.keys[num])
+
+
+def test_layer_key_enters_and_leaves_selecting():
+    keypad = make_keypad()
+    assert keypad.state == Keypad.IDLE
+
+    send(keypad, 0, PRESSED)
+    assert keypad.state == Keypad.SELECTING
+
+    send(keypad, 0, RELEASED)
+    assert keypad.state == Keypad.IDLE
+
+
+def test_selecting_switches_to_pressed_layer():
+    keypad = make_keypad()
+    one = Recorder()
+    two = Recorder()
+    keypad.add_layer(1, [one, one, one])
+    keypad.add_layer(2, [two, two, two])
+
+    send(keypad, 0, PRESSED)
+    send(keypad, 2, PRESSED)
+    send(keypad, 2, RELEASED)
+    send(keypad, 0, RELEASED)
+    assert keypad.current_layer == 2
+    # Choosing the layer doesn't type anything.
+    assert one.events == two.events == []
+
+    send(keypad, 1, PRESSED)
+    send(keypad, 1, RELEASED)
+    assert two.events == [(PRESSED, 1), (RELEASED, 1)]
+    assert one.events == []
+
+
+def test_selecting_ignores_keys_that_arent_layers():
+    keypad = make_keypad()
+    one = Recorder()
+    keypad.add_layer(1, [one, one, one])
+
+    send(keypad, 0, PRESSED)
+    send(keypad, 3, PRESSED)
+    send(keypad, 3, RELEASED)
+    send(keypad, 0, RELEASED)
+
+    assert keypad.current_layer == 1
+    assert keypad.state == Keypad.IDLE
+    assert one.events == []
+
+
+def test_release_goes_to_handler_that_saw_press():
+    keypad = make_keypad()
+    one = Recorder()
+    two = Recorder()
+    keypad.add_layer(1, [one, one, one])
+    keypad.add_layer(2, [two, two, two])
+
+    send(keypad, 3, PRESSED)
+    keypad.select_layer(2)
+    send(keypad, 3, HELD)
+    send(keypad, 3, RELEASED)
+
+    assert one.events == [(PRESSED, 3), (HELD, 3), (RELEASED, 3)]
+    assert two.events == []
+
+
+def test_release_after_set_layers_uses_old_handler():
+    keypad = make_keypad()
+    old = Recorder()
+    new = Recorder()
+    keypad.add_layer(1, [old, old, old])
+
+    send(keypad, 1, PRESSED)
+    keypad.set_layers({1: [new, new, new]})
+    send(keypad, 1, RELEASED)
+    send(keypad, 2, PRESSED)
+
+    assert old.events == [(PRESSED, 1), (RELEASED, 1)]
+    assert new.events == [(PRESSED, 2)]
+
+
+def test_set_layers_falls_back_when_current_layer_goes():
+    keypad = make_keypad()
+    keypad.add_layer(1, [None])
+    keypad.add_layer(3, [None])
+    keypad.select_layer(3)
+
+    keypad.set_layers({1: [None], 2: [None]})
+    assert keypad.current_layer == 1
+
+
+def test_select_layer_stores_layer_number():
+    keypad = make_keypad()
+    keypad.add_layer(1, [Recorder()])
+    keypad.add_layer(2, [Recorder()])
+
+    keypad.select_layer(2)
+    assert keypad.current_layer == 2
+    assert isinstance(keypad.current_layer, int)
+
+    keypad.select_layer(1)
+    assert keypad.current_layer == 1
+
+
+def test_unmapped_keys_are_ignored():
+    keypad = make_keypad()
+    keypad.add_layer(1, [None])
+
+    send(keypad, 2, PRESSED)
+    send(keypad, 2, RELEASED)
+
+
+def test_layer_listeners_skip_key_events():
+    keypad = make_keypad()
+    keypad.add_layer(1, [Recorder(), Recorder(), Recorder()])
+    keypad.add_layer(2, [Recorder(), Recorder(), Recorder()])
+    every = []
+    layers = []
+    keypad.add_listener(lambda k: every.append(k.current_layer))
+    keypad.add_listener(lambda k: layers.append(k.current_layer), key_events=False)
+
+    send(keypad, 1, PRESSED)
+    send(keypad, 1, RELEASED)
+    assert len(every) == 2
+    assert layers == []
+
+    send(keypad, 0, PRESSED)
+    send(keypad, 2, PRESSED)
+    send(keypad, 2, RELEASED)
+    send(keypad, 0, RELEASED)
+    assert layers == [1, 2, 2]
+
+
+def test_key_records_edge_latency():
+    key = Key(1, None, handler=Recorder(), debounce=0, clock=lambda: 1.5, bind=False)
+    key.latency_timer = Histogram()
+
+    key.edge(True, timestamp=1.0)
+    key.edge(False, timestamp=1.25)
+    assert key.latency_timer.count == 2
+    assert key.latency_timer.sum == 0.75
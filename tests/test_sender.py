@@ -0,0 +1,241 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backends import MemoryHid
+from hid.sender import LoopSender, ReportSender, _mergeable
+
+UP = b"\x00\x00"
+A = b"\x01\x00"
+B = b"\x02\x00"
+AB = b"\x03\x00"
+
+
+def sent(hid):
+    return [r for (_, r) in hid.reports]
+
+
+def no_repeats(reports):
+    return all(a != b for (a, b) in zip(reports, reports[1:]))
+
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_mergeable_allows_independent_changes():
+    # A went down, then B went down too: the host still sees every key go down.
+    assert _mergeable(UP, A, AB, False)
+
+
+def test_mergeable_refuses_to_hide_a_flip():
+    # A went down and came back up: merging would lose the whole key press.
+    assert not _mergeable(UP, A, UP, False)
+    assert not _mergeable(A, AB, A, False)
+
+
+def test_mergeable_needs_a_predecessor_of_the_same_shape():
+    assert not _mergeable(None, A, AB, False)
+    assert not _mergeable(b"\x00", A, AB, False)
+
+
+def test_mergeable_never_mixes_report_ids():
+    assert not _mergeable(b"\x01\x00", b"\x01\x01", b"\x02\x01", True)
+    assert _mergeable(b"\x01\x00", b"\x01\x01", b"\x01\x03", True)
+
+
+def test_report_sender_coalesces_duplicates():
+    hid = MemoryHid()
+    sender = ReportSender(hid)
+    try:
+        sender.send_report(A)
+        sender.send_report(A)
+        sender.send_report(UP)
+        assert sender.flush(1.0)
+    finally:
+        sender.stop()
+    assert sent(hid) == [A, UP]
+    assert sender.coalesced == 1
+
+
+def test_report_sender_keeps_every_transition_while_there_is_room():
+    hid = MemoryHid()
+    hid.stalled = True
+    sender = ReportSender(hid, max_depth=8)
+    try:
+        for snapshot in (A, UP, B, UP, A, UP):
+            sender.send_report(snapshot)
+        hid.stalled = False
+        assert sender.flush(1.0)
+    finally:
+        sender.stop()
+    assert sent(hid) == [A, UP, B, UP, A, UP]
+    assert sender.merged == sender.dropped == 0
+
+
+def test_report_sender_merges_on_overflow():
+    hid = MemoryHid()
+    hid.stalled = True
+    sender = ReportSender(hid, max_depth=1, put_timeout=0.01)
+    try:
+        sender.send_report(UP)
+        wait_until(lambda: sender.retries)
+        sender.send_report(A)
+        sender.send_report(AB)
+        hid.stalled = False
+        assert sender.flush(1.0)
+    finally:
+        sender.stop()
+    assert sent(hid) == [UP, AB]
+    assert sender.merged == 1
+
+
+def test_report_sender_overflow_loses_undone_presses_but_not_the_final_state():
+    hid = MemoryHid()
+    hid.stalled = True
+    sender = ReportSender(hid, max_depth=2, put_timeout=0.01, stall_time=0.01)
+    try:
+        sender.send_report(A)
+        wait_until(lambda: sender.stalled)
+        start = time.monotonic()
+        for snapshot in (UP, B, UP, A, UP):
+            sender.send_report(snapshot)
+        # A stalled gadget isn't waited for.
+        assert time.monotonic() - start < 0.01
+        hid.stalled = False
+        assert sender.flush(1.0)
+    finally:
+        sender.stop()
+    reports = sent(hid)
+    assert reports[-1] == UP
+    assert no_repeats(reports)
+    assert sender.dropped > 0
+
+
+def run_on_loop(test):
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def test_loop_sender_coalesces_duplicates():
+    async def test(loop):
+        hid = MemoryHid()
+        sender = LoopSender(hid, loop)
+        sender.send_report(A)
+        sender.send_report(A)
+        sender.send_report(UP)
+        assert sent(hid) == [A, UP]
+        assert sender.coalesced == 1
+
+    run_on_loop(test)
+
+
+def test_loop_sender_queues_while_refused():
+    async def test(loop):
+        hid = MemoryHid()
+        hid.stalled = True
+        sender = LoopSender(hid, loop, max_depth=8)
+        for snapshot in (A, UP, B, UP, A, UP):
+            sender.send_report(snapshot)
+        assert sender.depth == 6
+        hid.stalled = False
+        await asyncio.sleep(0.01)
+        assert sent(hid) == [A, UP, B, UP, A, UP]
+        assert sender.depth == 0
+
+    run_on_loop(test)
+
+
+def test_loop_sender_merges_on_overflow():
+    async def test(loop):
+        hid = MemoryHid()
+        hid.stalled = True
+        sender = LoopSender(hid, loop, max_depth=2)
+        for snapshot in (UP, A, AB):
+            sender.send_report(snapshot)
+        hid.stalled = False
+        await asyncio.sleep(0.01)
+        assert sent(hid) == [UP, AB]
+        assert sender.merged == 1
+
+    run_on_loop(test)
+
+
+def test_loop_sender_overflow_never_repeats_a_report():
+    async def test(loop):
+        hid = MemoryHid()
+        hid.stalled = True
+        sender = LoopSender(hid, loop, max_depth=4)
+        for n in range(20):
+            sender.send_report(A if n % 2 else UP)
+            sender.send_report(B if n % 3 else AB)
+        sender.send_report(UP)
+        hid.stalled = False
+        await asyncio.sleep(0.01)
+        reports = sent(hid)
+        assert reports[-1] == UP
+        assert no_repeats(reports)
+
+    run_on_loop(test)
+
+
+def test_loop_sender_wait_never_merges_or_drops():
+    async def test(loop):
+        hid = MemoryHid()
+        hid.stalled = True
+        sender = LoopSender(hid, loop, max_depth=2)
+        snapshots = [A, UP] * 10
+        for snapshot in snapshots:
+            sender.send_report(snapshot, wait=True)
+        hid.stalled = False
+        await asyncio.sleep(0.01)
+        assert sent(hid) == snapshots
+        assert sender.merged == sender.dropped == 0
+
+    run_on_loop(test)
+
+
+def test_report_sender_paced_snapshots_leave_room_for_live_ones():
+    hid = MemoryHid()
+    hid.stalled = True
+    sender = ReportSender(hid, max_depth=4, put_timeout=0.01)
+    try:
+        macro = [b"\x00\x04", UP, b"\x00\x05", UP]
+        for snapshot in macro:
+            sender.send_report(snapshot, wait=True)
+        for snapshot in (A, UP, B):
+            sender.send_report(snapshot)
+        hid.stalled = False
+        assert sender.flush(1.0)
+    finally:
+        sender.stop()
+    assert sent(hid) == macro + [A, UP, B]
+    assert sender.merged == sender.dropped == 0
+
+
+def test_loop_sender_paced_snapshots_leave_room_for_live_ones():
+    async def test(loop):
+        hid = MemoryHid()
+        hid.stalled = True
+        sender = LoopSender(hid, loop, max_depth=4)
+        macro = [b"\x00\x04", UP] * 100
+        for snapshot in macro:
+            sender.send_report(snapshot, wait=True)
+        # A key held and let go while the macro is still queued.
+        sender.send_report(A)
+        sender.send_report(UP)
+        hid.stalled = False
+        await asyncio.sleep(0.05)
+        assert sent(hid) == macro + [A, UP]
+        assert sender.merged == sender.dropped == 0
+
+    run_on_loop(test)
@@ -0,0 +1,170 @@
+"""
+Watch a file for changes.
+
+Uses inotify (through ctypes, so no extra dependencies) on the file's directory, which also catches editors that save
+by writing a new file and renaming it over the old one. Falls back to polling the file's mtime where inotify isn't
+available.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+
+log = logging.getLogger(__name__)
+
+_IN_CLOEXEC = 0o2000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+
+# struct inotify_event: int wd, uint32 mask, uint32 cookie, uint32 len, char name[len].
+_EVENT = struct.Struct("iIII")
+
+
+def _inotify():
+    """
+    :return: (libc, inotify fd), or None if inotify isn't available.
+    """
+    name = ctypes.util.find_library("c")
+    if name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        fd = libc.inotify_init1(_IN_CLOEXEC | _IN_NONBLOCK)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    return libc, fd
+
+
+class FileWatcher:
+    """
+    Calls a function from a background thread whenever a file changes.
+    """
+
+    def __init__(self, path, callback, settle=0.05, poll_interval=1.0):
+        """
+        :param path: File to watch. It doesn't have to exist yet, but its directory does.
+        :param callback: Function to call, with no arguments, after the file changes.
+        :param settle: How long to wait for further changes before calling back, so a save that takes several writes
+            only triggers one call.
+        :param poll_interval: How often to check the file's mtime if inotify isn't available.
+        """
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.settle = settle
+        self.poll_interval = poll_interval
+
+        self._dir, name = os.path.split(self.path)
+        self._name = os.fsencode(name)
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = None
+
+        self._fd = None
+        found = _inotify()
+        if found is not None:
+            (libc, fd) = found
+            mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE_SELF | _IN_MOVE_SELF
+            if libc.inotify_add_watch(fd, os.fsencode(self._dir), mask) < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                log.warning("Couldn't watch %s (%s), polling instead", self._dir, os.strerror(err))
+            else:
+                self._fd = fd
+        else:
+            log.info("inotify isn't available, polling %s", self.path)
+
+    @property
+    def uses_inotify(self):
+        return self._fd is not None
+
+    def start(self):
+        """
+        Start watching.
+        """
+        target = self._watch if self._fd is not None else self._poll
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop watching and release the inotify descriptor.
+        """
+        os.write(self._stop_w, b"x")
+        if self._thread is not None:
+            self._thread.join()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+
+    def _matches(self, data):
+        offset = 0
+        matched = False
+        while offset + _EVENT.size <= len(data):
+            (_, mask, _, length) = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            if name == self._name or mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                matched = True
+            offset += _EVENT.size + length
+        return matched
+
+    def _read_events(self):
+        try:
+            return self._matches(os.read(self._fd, 4096))
+        except OSError as ex:
+            if ex.errno == errno.EAGAIN:
+                return False
+            raise
+
+    def _watch(self):
+        fds = [self._fd, self._stop_r]
+        while True:
+            (ready, _, _) = select.select(fds, [], [])
+            if self._stop_r in ready:
+                return
+            if not self._read_events():
+                continue
+            # Soak up the rest of the save before calling back.
+            while True:
+                (ready, _, _) = select.select(fds, [], [], self.settle)
+                if self._stop_r in ready:
+                    return
+                if not ready:
+                    break
+                self._read_events()
+            self._call()
+
+    def _mtime(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def _poll(self):
+        last = self._mtime()
+        while True:
+            (ready, _, _) = select.select([self._stop_r], [], [], self.poll_interval)
+            if ready:
+                return
+            current = self._mtime()
+            if current != last:
+                last = current
+                self._call()
+
+    def _call(self):
+        try:
+            self.callback()
+        except Exception:
+            log.exception("File watcher callback failed")